@@ -90,10 +90,45 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Transações começam com BEGIN IMMEDIATE: a verificação de conflito
+            # e a gravação de uma reserva não se intercalam com outra requisição
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # Banco de testes em arquivo: o SQLite em memória compartilhada não
+        # espera pelo lock, o que impede testar requisições concorrentes
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
 
+# Cache
+# Precisa ser compartilhado entre os workers do gunicorn: guarda as versões
+# usadas em ETags e respostas pré-serializadas. Usa Redis quando REDIS_URL
+# estiver definido e, caso contrário, arquivos locais.
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'cache',
+        }
+    }
+
+# Os testes usam um LocMemCache próprio (ver test_runner.py)
+TEST_RUNNER = 'backend.test_runner.TestRunner'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -137,6 +172,15 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Maior planta aceita, em pixels (largura × altura). Acima de ~179 milhões o
+# próprio Pillow recusa a imagem (DecompressionBombError)
+FLOOR_PLAN_MAX_PIXELS = int(os.getenv('FLOOR_PLAN_MAX_PIXELS', 100_000_000))
+
+# Maior período de uma reserva recorrente, em dias. Cada dia selecionado vira
+# uma linha em ReservationOccurrence; sem limite, uma data final distante
+# geraria dezenas de milhares de linhas
+RESERVATION_MAX_RECURRENCE_DAYS = int(os.getenv('RESERVATION_MAX_RECURRENCE_DAYS', 731))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -253,13 +297,23 @@ CORS_ALLOW_HEADERS = [
 # Usar apenas o modelo Token sem registrar no admin
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'spaces.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+# Segundos que o token autenticado fica no cache (CachedTokenAuthentication)
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 300))
+
+# Broker dos eventos ao vivo (/api/spaces/<pk>/events/). O padrão só alcança
+# conexões no mesmo processo; use uma implementação compartilhada com vários workers.
+SPACES_EVENT_BROKER = os.getenv('SPACES_EVENT_BROKER', 'spaces.events.InProcessBroker')
+
+# Threads dedicadas à verificação de senha em POST /api/auth/login/
+LOGIN_HASH_WORKERS = int(os.getenv('LOGIN_HASH_WORKERS', 4))
+
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
@@ -0,0 +1,35 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+# Cache próprio dos testes: cache.clear() nos testes não pode apagar o cache
+# compartilhado (Redis ou arquivos) do ambiente em que eles rodam
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tests',
+    }
+}
+
+# Testes com grandes volumes de dados: só rodam com --tag benchmark
+BENCHMARK_TAG = 'benchmark'
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Roda os testes com um LocMemCache no lugar do cache configurado e deixa
+    de fora os benchmarks, a menos que sejam pedidos com --tag benchmark
+    """
+
+    def __init__(self, tags=None, exclude_tags=None, **kwargs):
+        if BENCHMARK_TAG not in (tags or ()):
+            exclude_tags = {*(exclude_tags or ()), BENCHMARK_TAG}
+        super().__init__(tags=tags, exclude_tags=exclude_tags, **kwargs)
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_override = override_settings(CACHES=TEST_CACHES)
+        self.cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_override.disable()
+        super().teardown_test_environment(**kwargs)
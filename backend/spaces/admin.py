@@ -1,7 +1,15 @@
-from django.contrib import admin
+from functools import lru_cache
+
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.exceptions import ValidationError
 from django.utils.html import format_html
-from .models import Building, SpaceType, FloorPlan, Space, Reservation, Notification
+from .models import Building, SpaceType, FloorPlan, Space, Reservation, Notification, WEEKDAY_NAMES
 from .forms import SpaceAdminForm, ReservationAdminForm
+from .exports import export_reservations
+from .pagination import EstimatedCountPaginator
+from .transitions import bulk_transition
 
 # Customizar o site admin
 admin.site.site_header = "Sistema de Gerenciamento"
@@ -29,7 +37,7 @@ class FloorPlanAdmin(admin.ModelAdmin):
         if obj.plan_image:
             return format_html(
                 '<img src="{}" style="max-width: 100px; max-height: 100px;"/>',
-                obj.plan_image.url
+                obj.get_variant_url(200)
             )
         return "Sem imagem"
     preview_image.short_description = 'Planta'
@@ -42,12 +50,16 @@ class SpaceAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     readonly_fields = ('floor_preview',)
 
+    def get_queryset(self, request):
+        # O nome da sala inclui o campus (listagem e autocomplete das reservas)
+        return super().get_queryset(request).select_related('building')
+
     def floor_preview(self, obj):
         image_html = ''
         if obj and obj.floor_name and obj.floor_name.plan_image:
             image_html = format_html(
                 '<img id="floor-plan-img" src="{}" style="max-width: 400px; max-height: 225px; object-fit: contain;">',
-                obj.floor_name.plan_image.url
+                obj.floor_name.get_variant_url(800)
             )
         
         return format_html('''
@@ -85,12 +97,59 @@ class CustomReservationAdminForm(ReservationAdminForm):
         self.fields['sunday_start'].label = 'Horário Domingo'
         self.fields['sunday_end'].label = ''
 
+class AutocompleteFilter(admin.RelatedFieldListFilter):
+    """
+    Filtro por chave estrangeira com busca (o autocomplete do admin) no lugar
+    da lista com todos os usuários ou salas: só o item selecionado é lido
+    """
+    template = 'admin/spaces/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.app_label = model._meta.app_label
+        self.model_name = model._meta.model_name
+        self.field_name = field.name
+
+    def has_output(self):
+        return True
+
+    def field_choices(self, field, request, model_admin):
+        if not self.lookup_val:
+            return []
+        # Id inválido na URL: o admin redireciona com ?e=1, como no filtro padrão
+        try:
+            pks = [field.target_field.to_python(value) for value in self.lookup_val]
+        except ValidationError as e:
+            raise IncorrectLookupParameters(e)
+        related = field.remote_field.model._default_manager.filter(pk__in=pks)
+        if field.remote_field.model is Space:
+            related = related.select_related('building')
+        return [(obj.pk, str(obj)) for obj in related]
+
+
+@lru_cache(maxsize=128)
+def get_recurring_label(weekdays):
+    """Texto da coluna Horário de uma reserva recorrente, por máscara de dias"""
+    days = [WEEKDAY_NAMES[weekday] for weekday in range(7) if weekdays & (1 << weekday)]
+    return f"Recorrente: {', '.join(days)}"
+
+
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
     form = CustomReservationAdminForm
     list_display = ('space', 'user', 'phone', 'course', 'get_time_display', 'is_recurring', 'status')
-    list_filter = ('space', 'user', 'is_recurring', 'status')
-    search_fields = ('space__name', 'user__username', 'description', 'phone', 'course')
+    list_filter = (('space', AutocompleteFilter), ('user', AutocompleteFilter), 'is_recurring', 'status')
+    # Busca por prefixo nas tabelas relacionadas; contém só nos campos da reserva
+    search_fields = ('^space__name', '^user__username', '^user__email', 'description', 'phone', 'course')
+    autocomplete_fields = ('space', 'user')
+
+    # Listagem para tabelas grandes: salas (com campus) e usuários no mesmo
+    # SELECT, navegação por data sobre reservation_date_idx e total estimado
+    list_select_related = ('space__building', 'user')
+    date_hierarchy = 'date'
+    ordering = ('-date', '-start_time')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         ('Geral', {
@@ -117,6 +176,10 @@ class ReservationAdmin(admin.ModelAdmin):
     )
 
     readonly_fields = ('recurring_times_display',)
+    actions = [
+        'confirm_selected', 'cancel_selected', 'complete_selected',
+        'export_csv', 'export_xlsx', 'export_occurrences_csv',
+    ]
 
     class Media:
         css = {
@@ -128,46 +191,72 @@ class ReservationAdmin(admin.ModelAdmin):
 
     def recurring_times_display(self, obj):
         """Exibe os horários recorrentes em formato de tabela"""
-        if not obj.recurring_times or not obj.is_recurring:
+        slot_times = obj.get_slot_times() if obj.is_recurring else {}
+        if not slot_times:
             return format_html('<p style="color: #999;">Nenhum horário definido</p>')
         
-        days_map = {
-            'seg': 'Segunda-feira',
-            'ter': 'Terça-feira',
-            'qua': 'Quarta-feira',
-            'qui': 'Quinta-feira',
-            'sex': 'Sexta-feira',
-            'sab': 'Sábado',
-            'dom': 'Domingo'
-        }
-        
         html = '<table style="width: 100%; border-collapse: collapse; margin-top: 10px;">'
         html += '<thead><tr style="background-color: #f0f0f0;"><th style="border: 1px solid #ddd; padding: 8px; text-align: left;">Dia</th><th style="border: 1px solid #ddd; padding: 8px; text-align: left;">Horário</th></tr></thead>'
         html += '<tbody>'
         
-        for day_key, day_name in days_map.items():
-            if day_key in obj.recurring_times:
-                time_data = obj.recurring_times[day_key]
-                start = time_data.get('start', 'N/A')
-                end = time_data.get('end', 'N/A')
-                html += f'<tr><td style="border: 1px solid #ddd; padding: 8px;">{day_name}</td><td style="border: 1px solid #ddd; padding: 8px;">{start} - {end}</td></tr>'
+        for weekday, (start, end) in sorted(slot_times.items()):
+            start = start.strftime('%H:%M') if start else 'N/A'
+            end = end.strftime('%H:%M') if end else 'N/A'
+            html += f'<tr><td style="border: 1px solid #ddd; padding: 8px;">{WEEKDAY_NAMES[weekday]}</td><td style="border: 1px solid #ddd; padding: 8px;">{start} - {end}</td></tr>'
         
         html += '</tbody></table>'
         return format_html(html)
     recurring_times_display.short_description = 'Horários Recorrentes'
 
+    @property
+    def media(self):
+        # select2 do autocomplete também na listagem, para os filtros com busca
+        return super().media + AutocompleteSelect(Reservation._meta.get_field('space'), self.admin_site).media
+
     def get_time_display(self, obj):
         if obj.is_recurring:
-            days = []
-            for day_num in (obj.recurring_days or '').split(','):
-                if day_num:
-                    day_name = dict(self.form.WEEKDAYS).get(day_num, '')
-                    days.append(day_name)
-            return f"Recorrente: {', '.join(days)}"
+            return get_recurring_label(obj.recurring_weekdays)
         if obj.date and obj.start_time and obj.end_time:
-            return f"{obj.date.strftime('%d/%m/%Y')} {obj.start_time.strftime('%H:%M')} - {obj.end_time.strftime('%H:%M')}"
+            return f"{obj.date:%d/%m/%Y} {obj.start_time:%H:%M} - {obj.end_time:%H:%M}"
         return "N/A"
     get_time_display.short_description = 'Horário'
+    get_time_display.admin_order_field = 'date'
+
+    @admin.action(description='Confirmar selecionadas', permissions=['change'])
+    def confirm_selected(self, request, queryset):
+        self.transition(request, queryset, 'confirmado')
+
+    @admin.action(description='Cancelar selecionadas', permissions=['change'])
+    def cancel_selected(self, request, queryset):
+        self.transition(request, queryset, 'canceled')
+
+    @admin.action(description='Marcar selecionadas como concluídas', permissions=['change'])
+    def complete_selected(self, request, queryset):
+        self.transition(request, queryset, 'completed')
+
+    def transition(self, request, queryset, target):
+        """Mesmo UPDATE em lote da API (transitions.bulk_transition)"""
+        ids = list(queryset.values_list('pk', flat=True))
+        updated, skipped = bulk_transition(Reservation.objects.all(), ids, target)
+        if updated:
+            self.message_user(request, f"{len(updated)} reserva(s) atualizada(s).", messages.SUCCESS)
+        by_reason = {}
+        for pk, reason in skipped.items():
+            by_reason.setdefault(reason, []).append(str(pk))
+        for reason, pks in by_reason.items():
+            self.message_user(request, f"Reservas ignoradas ({', '.join(pks)}): {reason}", messages.WARNING)
+
+    @admin.action(description='Exportar selecionadas (CSV)')
+    def export_csv(self, request, queryset):
+        return export_reservations(queryset, 'csv')
+
+    @admin.action(description='Exportar selecionadas (XLSX)')
+    def export_xlsx(self, request, queryset):
+        return export_reservations(queryset, 'xlsx')
+
+    @admin.action(description='Exportar selecionadas, uma linha por ocorrência (CSV)')
+    def export_occurrences_csv(self, request, queryset):
+        return export_reservations(queryset, 'csv', expand=True)
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
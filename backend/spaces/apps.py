@@ -5,3 +5,6 @@ class SpacesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'spaces'
     verbose_name = 'Espaços'  # Add this line
+
+    def ready(self):
+        from . import signals  # noqa: F401
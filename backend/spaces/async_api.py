@@ -0,0 +1,57 @@
+from django.http import HttpResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from .authentication import CachedTokenAuthentication
+
+
+def json_response(data, status=200):
+    """Mesmo JSON gerado pelas views DRF (JSONRenderer)"""
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+class AsyncAPIView(View):
+    """
+    Base das views de leitura assíncronas. O APIView do DRF 3.14 é só
+    síncrono, então aqui a autenticação por token (CachedTokenAuthentication
+    .aauthenticate), a exigência de usuário autenticado e a conversão das
+    exceções do DRF em respostas JSON são feitas diretamente, e os handlers
+    (get, ...) usam o ORM assíncrono. Sob ASGI a requisição não ocupa uma
+    thread enquanto espera o banco.
+    """
+    authentication_classes = (CachedTokenAuthentication,)
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Como no DRF: autenticação por token dispensa o CSRF
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        authenticators = [authentication() for authentication in self.authentication_classes]
+        try:
+            for authenticator in authenticators:
+                credentials = await authenticator.aauthenticate(request)
+                if credentials is not None:
+                    break
+            else:
+                raise exceptions.NotAuthenticated()
+            request.user, request.auth = credentials
+            # query_params e build_absolute_uri para filtros e paginação do DRF
+            self.drf_request = Request(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc, authenticators[0])
+
+    def handle_exception(self, exc, authenticator):
+        if isinstance(exc.detail, (list, dict)):
+            data = exc.detail
+        else:
+            data = {'detail': exc.detail}
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response = json_response(data, status=401)
+            response['WWW-Authenticate'] = authenticator.authenticate_header(self.request)
+            return response
+        return json_response(data, status=exc.status_code)
@@ -0,0 +1,145 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+
+# Tempo (segundos) que o par token → usuário fica no cache
+TOKEN_CACHE_TIMEOUT = getattr(settings, 'AUTH_TOKEN_CACHE_TIMEOUT', 300)
+
+# Campos do usuário que nunca vão para o cache compartilhado
+UNCACHED_USER_FIELDS = ('password',)
+
+
+def token_cache_key(key):
+    return f'auth:token-user:{key}'
+
+
+def user_token_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_token(key):
+    cache.delete(token_cache_key(key))
+
+
+def invalidate_user_tokens(user_id):
+    """Remove do cache o token do usuário (após salvar ou desativar a conta)"""
+    key = cache.get(user_token_cache_key(user_id))
+    if key:
+        cache.delete_many([token_cache_key(key), user_token_cache_key(user_id)])
+
+
+def get_snapshot_fields():
+    return [
+        field.attname for field in get_user_model()._meta.concrete_fields
+        if field.attname not in UNCACHED_USER_FIELDS
+    ]
+
+
+def build_snapshot(token):
+    """
+    Dados do token que vão para o cache: chave, data de criação e as colunas
+    do usuário, sem a senha. Grupos e permissões não entram (são consultados
+    sob demanda, como em qualquer usuário carregado do banco).
+    """
+    user = token.user
+    return {
+        'key': token.key,
+        'created': token.created,
+        'db': user._state.db,
+        'user': [getattr(user, name) for name in get_snapshot_fields()],
+    }
+
+
+def restore_snapshot(model, snapshot):
+    """
+    Token e usuário montados a partir do cache. A senha fica adiada: ler
+    user.password consulta o banco e save() grava só os campos carregados.
+    """
+    user = get_user_model().from_db(snapshot['db'], get_snapshot_fields(), snapshot['user'])
+    token = model(key=snapshot['key'], user_id=user.pk, created=snapshot['created'])
+    token.user = user
+    return token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication que guarda o token (com os dados do usuário, menos a
+    senha) no cache compartilhado, evitando a consulta authtoken_token +
+    usuarios a cada requisição. A entrada é removida pelos sinais em
+    spaces/signals.py quando o token é apagado ou o usuário é
+    salvo/desativado, e expira sozinha após TOKEN_CACHE_TIMEOUT.
+    """
+
+    def authenticate_credentials(self, key):
+        snapshot = cache.get(token_cache_key(key))
+        if snapshot is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(token_cache_key(key), build_snapshot(token), TOKEN_CACHE_TIMEOUT)
+            cache.set(user_token_cache_key(user.pk), key, TOKEN_CACHE_TIMEOUT)
+            return user, token
+
+        token = restore_snapshot(self.get_model(), snapshot)
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return token.user, token
+
+    async def aauthenticate(self, request):
+        """Versão assíncrona de authenticate(), para as views async (ver async_api.py)"""
+        key = self.get_key(request)
+        if key is None:
+            return None
+        return await self.aauthenticate_credentials(key)
+
+    async def aauthenticate_credentials(self, key):
+        snapshot = await cache.aget(token_cache_key(key))
+        if snapshot is None:
+            try:
+                token = await self.get_model().objects.select_related('user').aget(key=key)
+            except self.get_model().DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            if token.user.is_active:
+                await cache.aset(token_cache_key(key), build_snapshot(token), TOKEN_CACHE_TIMEOUT)
+                await cache.aset(user_token_cache_key(token.user_id), key, TOKEN_CACHE_TIMEOUT)
+        else:
+            token = restore_snapshot(self.get_model(), snapshot)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        return token.user, token
+
+    def get_key(self, request):
+        """Extrai o token do cabeçalho Authorization (mesmas regras do DRF)"""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. No credentials provided.'))
+        if len(auth) > 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. Token string should not contain spaces.'))
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(
+                _('Invalid token header. Token string should not contain invalid characters.')
+            )
+
+
+class QueryStringTokenAuthentication(CachedTokenAuthentication):
+    """
+    Token enviado como ?token=. Usado nos feeds iCalendar e no fluxo de
+    eventos, porque aplicativos de calendário e o EventSource do navegador
+    não conseguem enviar o cabeçalho Authorization.
+    """
+    query_param = 'token'
+
+    def authenticate(self, request):
+        key = self.get_key(request)
+        if not key:
+            return None
+        return self.authenticate_credentials(key)
+
+    def get_key(self, request):
+        return request.GET.get(self.query_param) or None
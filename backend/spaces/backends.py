@@ -1,19 +1,42 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.base_user import BaseUserManager
+
+# Domínio dos e-mails institucionais aceitos no login
+EMAIL_DOMAIN = '@cesmac.edu.br'
+
+
+def get_login_lookup(identifier):
+    """
+    Filtro para encontrar o usuário pelo que foi digitado no login: e-mail
+    institucional ou nome de usuário. Os dois campos são únicos (indexados),
+    então a busca é sempre uma única consulta.
+    """
+    identifier = identifier.strip()
+    if identifier.lower().endswith(EMAIL_DOMAIN):
+        # Busca exata (usa o índice único); o domínio é gravado em minúsculas
+        return {'email': BaseUserManager.normalize_email(identifier)}
+    return {'username': identifier}
+
 
 class EmailBackend(ModelBackend):
     def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None or password is None:
+            return None
         UserModel = get_user_model()
         try:
-            user = UserModel.objects.get(email=username)
-            if user.check_password(password):
-                return user
+            user = UserModel.objects.get(**get_login_lookup(username))
         except UserModel.DoesNotExist:
+            # Mesmo custo de um usuário existente (evita enumeração por tempo)
+            UserModel().set_password(password)
             return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
 
     def get_user(self, user_id):
         UserModel = get_user_model()
         try:
             return UserModel.objects.get(pk=user_id)
         except UserModel.DoesNotExist:
-            return None
\ No newline at end of file
+            return None
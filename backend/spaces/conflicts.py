@@ -0,0 +1,124 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from .models import ReservationOccurrence
+
+# Status que ocupam o horário da sala
+ACTIVE_STATUSES = ('pending', 'confirmado')
+
+
+class IntervalIndex:
+    """
+    Intervalos de uma sala em um dia, ordenados pelo horário de início.
+    Guarda também o maior horário de fim de cada prefixo, o que permite
+    responder "existe sobreposição?" com uma busca binária.
+    """
+
+    def __init__(self, intervals=()):
+        self.intervals = sorted(intervals, key=self._key)
+        self._rebuild()
+
+    @staticmethod
+    def _key(interval):
+        # Ordena só por horário: o id pode ser None em reservas ainda não salvas
+        return interval[0], interval[1]
+
+    def _rebuild(self):
+        self.starts = [interval[0] for interval in self.intervals]
+        self.max_ends = []
+        current = None
+        for _, end, _ in self.intervals:
+            current = end if current is None or end > current else current
+            self.max_ends.append(current)
+
+    def add(self, start, end, reservation_id=None):
+        insort(self.intervals, (start, end, reservation_id), key=self._key)
+        self._rebuild()
+
+    def overlapping(self, start, end):
+        """Retorna os intervalos que se sobrepõem a [start, end)"""
+        # Só intervalos que começam antes do fim informado podem se sobrepor
+        limit = bisect_left(self.starts, end)
+        if limit == 0 or self.max_ends[limit - 1] <= start:
+            return []
+        return [
+            interval for interval in self.intervals[:limit]
+            if interval[1] > start
+        ]
+
+
+def build_indexes(space_ids, start_date, end_date, exclude_reservation_id=None, statuses=ACTIVE_STATUSES):
+    """
+    Monta um IntervalIndex por (sala, dia) com as ocorrências ativas das salas
+    informadas entre start_date e end_date, usando uma única consulta
+    """
+    occurrences = ReservationOccurrence.objects.filter(
+        space_id__in=space_ids,
+        date__range=(start_date, end_date),
+        status__in=statuses,
+        start_time__isnull=False,
+        end_time__isnull=False
+    )
+    if exclude_reservation_id:
+        occurrences = occurrences.exclude(reservation_id=exclude_reservation_id)
+
+    intervals = defaultdict(list)
+    for space_id, day, start, end, reservation_id in occurrences.values_list(
+        'space_id', 'date', 'start_time', 'end_time', 'reservation_id'
+    ):
+        intervals[(space_id, day)].append((start, end, reservation_id))
+
+    return defaultdict(IntervalIndex, {
+        key: IntervalIndex(key_intervals) for key, key_intervals in intervals.items()
+    })
+
+
+def get_occurrence_slots(reservation):
+    """Ocorrências (data, início, fim) com horário definido"""
+    return [
+        (day, start, end)
+        for day, start, end in reservation.iter_occurrences()
+        if start and end
+    ]
+
+
+def find_conflicts(reservation, indexes=None):
+    """
+    Retorna (data, início, fim, id da reserva existente) para cada ocorrência
+    da reserva informada que se sobrepõe a outra reserva ativa da mesma sala.
+    Serve tanto para reservas únicas quanto recorrentes, ainda não salvas ou não.
+    """
+    occurrences = get_occurrence_slots(reservation)
+    if not occurrences:
+        return []
+
+    if indexes is None:
+        indexes = build_indexes(
+            [reservation.space_id],
+            min(day for day, _, _ in occurrences),
+            max(day for day, _, _ in occurrences),
+            exclude_reservation_id=reservation.pk
+        )
+
+    conflicts = []
+    for day, start, end in occurrences:
+        for _, _, reservation_id in indexes[(reservation.space_id, day)].overlapping(start, end):
+            conflicts.append((day, start, end, reservation_id))
+    return conflicts
+
+
+def add_to_indexes(reservation, indexes):
+    """Registra as ocorrências da reserva nos índices (validação em lote)"""
+    for day, start, end in get_occurrence_slots(reservation):
+        indexes[(reservation.space_id, day)].add(start, end, reservation.pk)
+
+
+def format_conflicts(conflicts, limit=5):
+    """Mensagem legível com as primeiras datas em conflito"""
+    items = [
+        f"{day.strftime('%d/%m/%Y')} {start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
+        for day, start, end, _ in conflicts[:limit]
+    ]
+    if len(conflicts) > limit:
+        items.append(f"e mais {len(conflicts) - limit}")
+    return "Conflito de horário com reservas existentes em: " + ', '.join(items)
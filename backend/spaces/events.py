@@ -0,0 +1,84 @@
+import asyncio
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class InProcessBroker:
+    """
+    Distribui eventos entre as conexões abertas no mesmo processo. Cada
+    assinante recebe uma asyncio.Queue ligada ao seu event loop; publish()
+    pode ser chamado de qualquer thread (os sinais do ORM rodam fora do loop).
+
+    Com vários workers, cada um só enxerga as alterações feitas nele mesmo:
+    nesse caso troque SPACES_EVENT_BROKER por uma implementação com a mesma
+    interface sobre um serviço compartilhado (ex.: pub/sub do Redis).
+    """
+    queue_size = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, channel):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(channel, {})[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, channel, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(channel, {})
+            subscribers.pop(queue, None)
+            if not subscribers:
+                self._subscribers.pop(channel, None)
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, {}).items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._put, queue, event)
+            except RuntimeError:
+                # Loop já encerrado: a conexão caiu sem cancelar a assinatura
+                self.unsubscribe(channel, queue)
+
+    @staticmethod
+    def _put(queue, event):
+        # Cliente lento: descarta o evento em vez de acumular memória
+        if not queue.full():
+            queue.put_nowait(event)
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(settings.SPACES_EVENT_BROKER)()
+
+
+def space_channel(space_id):
+    return f'space:{space_id}'
+
+
+def build_reservation_event(reservation, action):
+    """Evento compacto: o suficiente para o cliente saber quais dias recarregar"""
+    event = {
+        'action': action,
+        'reservation': reservation.pk,
+        'status': reservation.status,
+        'date': reservation.date,
+        'start_time': reservation.start_time,
+        'end_time': reservation.end_time,
+    }
+    if reservation.is_recurring:
+        event.update({
+            'recurring_days': reservation.recurring_days,
+            'recurring_start_date': reservation.recurring_start_date,
+            'recurring_end_date': reservation.recurring_end_date,
+        })
+    return {
+        key: value.isoformat() if hasattr(value, 'isoformat') else value
+        for key, value in event.items()
+    }
+
@@ -0,0 +1,217 @@
+import csv
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+
+from .models import Reservation, ReservationOccurrence, format_weekdays
+
+# (cabeçalho, campo da reserva)
+EXPORT_COLUMNS = [
+    ('ID', 'id'),
+    ('Campus', 'space__building__name'),
+    ('Andar', 'space__floor_name__name'),
+    ('Sala', 'space__name'),
+    ('Usuário', 'user__email'),
+    ('Data', 'date'),
+    ('Hora Início', 'start_time'),
+    ('Hora Fim', 'end_time'),
+    ('Status', 'status'),
+    ('Recorrente', 'is_recurring'),
+    ('Dias da Semana', 'recurring_weekdays'),
+    ('Início Recorrência', 'recurring_start_date'),
+    ('Fim Recorrência', 'recurring_end_date'),
+    ('Telefone', 'phone'),
+    ('Curso', 'course'),
+    ('Descrição', 'description'),
+]
+
+# Na exportação por ocorrência, data e horários vêm da ocorrência
+OCCURRENCE_FIELDS = {'date', 'start_time', 'end_time', 'status'}
+
+STATUS_LABELS = dict(Reservation.STATUS_CHOICES)
+
+CHUNK_SIZE = 2000
+
+# Texto que o Excel/LibreOffice interpretaria como fórmula ao abrir o arquivo
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def format_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Sim' if value else 'Não'
+    if hasattr(value, 'strftime'):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # O apóstrofo faz a planilha tratar a célula como texto
+        return f"'{value}"
+    return value
+
+
+def iter_rows(queryset, expand=False, date_from=None, date_to=None, chunk_size=CHUNK_SIZE):
+    """
+    Linhas da exportação (cabeçalho primeiro). Usa values_list + iterator,
+    então nenhuma instância de modelo é criada e a memória não cresce com
+    o número de reservas. Com expand=True, reservas recorrentes viram uma
+    linha por ocorrência, só as de date_from a date_to quando informados.
+    """
+    yield [header for header, _ in EXPORT_COLUMNS]
+
+    if expand:
+        fields = [
+            field if field in OCCURRENCE_FIELDS else f'reservation__{field}'
+            for _, field in EXPORT_COLUMNS
+        ]
+        occurrences = ReservationOccurrence.objects.filter(reservation__in=queryset.order_by().values('pk'))
+        if date_from:
+            occurrences = occurrences.filter(date__gte=date_from)
+        if date_to:
+            occurrences = occurrences.filter(date__lte=date_to)
+        rows = occurrences.order_by('date', 'start_time', 'reservation_id').values_list(*fields)
+    else:
+        rows = queryset.values_list(*[field for _, field in EXPORT_COLUMNS])
+
+    status_index = [field for _, field in EXPORT_COLUMNS].index('status')
+    weekdays_index = [field for _, field in EXPORT_COLUMNS].index('recurring_weekdays')
+    for row in rows.iterator(chunk_size=chunk_size):
+        row = [format_value(value) for value in row]
+        row[status_index] = STATUS_LABELS.get(row[status_index], row[status_index])
+        row[weekdays_index] = format_weekdays(row[weekdays_index]) or ''
+        yield row
+
+
+class _Echo:
+    """Pseudo-arquivo: csv.writer devolve a linha em vez de gravá-la"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, filename):
+    writer = csv.writer(_Echo())
+
+    def content():
+        yield '\ufeff'  # BOM para o Excel reconhecer UTF-8
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(content(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Destino não posicionável do zipfile; os bytes são repassados à resposta"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Reservas" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_cell(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_INVALID_XML_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def stream_xlsx(rows, filename):
+    """
+    Planilha XLSX mínima (uma aba, textos inline) gerada enquanto é enviada:
+    o zip é escrito em um buffer que é esvaziado a cada bloco de linhas.
+    """
+
+    def content():
+        buffer = _ChunkBuffer()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, xml in _XLSX_PARTS.items():
+                archive.writestr(name, xml)
+            yield buffer.pop()
+
+            with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+                sheet.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                    b'<sheetData>'
+                )
+                for count, row in enumerate(rows, start=1):
+                    cells = ''.join(_xlsx_cell(value) for value in row)
+                    sheet.write(f'<row>{cells}</row>'.encode())
+                    if count % 500 == 0:
+                        yield buffer.pop()
+                sheet.write(b'</sheetData></worksheet>')
+        yield buffer.pop()
+
+    response = StreamingHttpResponse(
+        content(),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.xlsx"'
+    return response
+
+
+EXPORT_FORMATS = {
+    'csv': stream_csv,
+    'xlsx': stream_xlsx,
+}
+
+
+def export_reservations(queryset, export_format='csv', expand=False, date_from=None, date_to=None,
+                        filename='reservas'):
+    rows = iter_rows(queryset, expand=expand, date_from=date_from, date_to=date_to)
+    return EXPORT_FORMATS[export_format](rows, filename)
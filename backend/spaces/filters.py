@@ -0,0 +1,135 @@
+from django.db.models import Exists, OuterRef, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .conflicts import ACTIVE_STATUSES
+from .models import Reservation, ReservationOccurrence, parse_weekday, weekdays_filter
+
+
+class QueryParamFilterBackend(BaseFilterBackend):
+    """Conversão dos parâmetros da URL, com erro 400 por parâmetro"""
+
+    def parse_id(self, name, value):
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError({name: 'Informe um número inteiro'})
+
+    def parse_date(self, name, value):
+        if not value:
+            return None
+        date_field = Reservation._meta.get_field('date')
+        try:
+            return date_field.to_python(value)
+        except Exception:
+            raise ValidationError({name: 'Data deve estar no formato YYYY-MM-DD'})
+
+    def parse_time(self, name, value):
+        if not value:
+            return None
+        time_field = Reservation._meta.get_field('start_time')
+        try:
+            return time_field.to_python(value)
+        except Exception:
+            raise ValidationError({name: 'Horário deve estar no formato HH:MM'})
+
+
+class ReservationFilterBackend(QueryParamFilterBackend):
+    """
+    Filtros de reservas aplicados no SQL:
+    ?space=, ?building=, ?status= (aceita vários separados por vírgula)
+    e a janela ?date_from=/?date_to= (YYYY-MM-DD). Reservas recorrentes entram
+    quando o período de recorrência se sobrepõe à janela. ?weekday=seg,qua
+    seleciona reservas únicas nesses dias e recorrências que passam por eles.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        space = params.get('space')
+        if space:
+            queryset = queryset.filter(space_id=self.parse_id('space', space))
+
+        building = params.get('building')
+        if building:
+            queryset = queryset.filter(space__building_id=self.parse_id('building', building))
+
+        status = params.get('status')
+        if status:
+            statuses = [value for value in status.split(',') if value]
+            valid = dict(Reservation.STATUS_CHOICES)
+            invalid = [value for value in statuses if value not in valid]
+            if invalid:
+                raise ValidationError({'status': f"Status inválido: {', '.join(invalid)}"})
+            queryset = queryset.filter(status__in=statuses)
+
+        date_from = self.parse_date('date_from', params.get('date_from'))
+        date_to = self.parse_date('date_to', params.get('date_to'))
+        if date_from or date_to:
+            single = Q(is_recurring=False)
+            recurring = Q(is_recurring=True)
+            if date_from:
+                single &= Q(date__gte=date_from)
+                recurring &= Q(recurring_end_date__gte=date_from)
+            if date_to:
+                single &= Q(date__lte=date_to)
+                recurring &= Q(recurring_start_date__lte=date_to)
+            queryset = queryset.filter(single | recurring)
+
+        weekday = params.get('weekday')
+        if weekday:
+            weekdays = {parse_weekday(code) for code in weekday.split(',') if code}
+            if None in weekdays:
+                raise ValidationError({'weekday': 'Use os códigos seg, ter, qua, qui, sex, sab, dom'})
+            queryset = queryset.filter(
+                Q(is_recurring=False, date__iso_week_day__in=[day + 1 for day in weekdays]) |
+                weekdays_filter(weekdays)
+            )
+
+        return queryset
+
+
+class FreeSpaceFilterBackend(QueryParamFilterBackend):
+    """
+    Salas ativas livres em ?date= das ?start= às ?end= (HH:MM), com os filtros
+    opcionais ?min_capacity=, ?building=, ?floor= e ?type= (tipo de sala).
+    A ocupação é um anti-join (NOT EXISTS) com as ocorrências ativas da sala
+    no dia, onde reservas recorrentes já estão expandidas, então a busca sai
+    em uma única consulta usando occurrence_space_date_idx.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        day, start, end = self.parse_window(params)
+        queryset = exclude_occupied(queryset, day, start, end).filter(is_active=True)
+
+        for name, lookup in (('min_capacity', 'capacity__gte'), ('building', 'building_id'),
+                             ('floor', 'floor_name_id'), ('type', 'space_type_id')):
+            value = params.get(name)
+            if value:
+                queryset = queryset.filter(**{lookup: self.parse_id(name, value)})
+        return queryset
+
+    def parse_window(self, params):
+        """(data, início, fim) de ?date=&start=&end=, todos obrigatórios"""
+        day = self.parse_date('date', params.get('date'))
+        start = self.parse_time('start', params.get('start'))
+        end = self.parse_time('end', params.get('end'))
+        missing = {name: 'Parâmetro obrigatório' for name, value in (('date', day), ('start', start), ('end', end)) if not value}
+        if missing:
+            raise ValidationError(missing)
+        if start >= end:
+            raise ValidationError({'end': 'O horário final deve ser depois do inicial'})
+        return day, start, end
+
+
+def exclude_occupied(queryset, day, start, end):
+    """Salas do queryset sem ocorrência ativa sobreposta à janela (NOT EXISTS)"""
+    occupied = ReservationOccurrence.objects.filter(
+        space_id=OuterRef('pk'),
+        date=day,
+        status__in=ACTIVE_STATUSES,
+        start_time__lt=end,
+        end_time__gt=start
+    )
+    return queryset.filter(~Exists(occupied))
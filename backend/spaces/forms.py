@@ -1,5 +1,9 @@
 from django import forms
-from .models import Space, FloorPlan, Reservation
+from django.core.exceptions import ValidationError
+from .models import (
+    Space, FloorPlan, Reservation, WEEKDAY_CODES, WEEKDAY_NAMES, WEEKDAY_TIME_FIELDS, parse_weekday,
+    validate_recurrence_span
+)
 from django.contrib.admin.widgets import AdminTimeWidget, AdminDateWidget
 
 class SpaceAdminForm(forms.ModelForm):
@@ -7,16 +11,16 @@ class SpaceAdminForm(forms.ModelForm):
         model = Space
         fields = '__all__'
 
+def day_time_field(label):
+    return forms.TimeField(
+        label=label,
+        required=False,
+        widget=forms.TimeInput(attrs={'type': 'time'}, format='%H:%M')
+    )
+
 class ReservationAdminForm(forms.ModelForm):
-    WEEKDAYS = [
-        ('0', 'Segunda-feira'),
-        ('1', 'Terça-feira'),
-        ('2', 'Quarta-feira'),
-        ('3', 'Quinta-feira'),
-        ('4', 'Sexta-feira'),
-        ('5', 'Sábado'),
-        ('6', 'Domingo'),
-    ]
+    # Mesmos códigos da API ('seg'..'dom'); guardados em recurring_weekdays
+    WEEKDAYS = list(zip(WEEKDAY_CODES, WEEKDAY_NAMES))
 
     recurring_days = forms.MultipleChoiceField(
         choices=WEEKDAYS,
@@ -25,6 +29,22 @@ class ReservationAdminForm(forms.ModelForm):
         label='Dias da Semana'
     )
 
+    # Horários por dia, gravados em ReservationSlot
+    monday_start = day_time_field('Hora Início Segunda')
+    monday_end = day_time_field('Hora Fim Segunda')
+    tuesday_start = day_time_field('Hora Início Terça')
+    tuesday_end = day_time_field('Hora Fim Terça')
+    wednesday_start = day_time_field('Hora Início Quarta')
+    wednesday_end = day_time_field('Hora Fim Quarta')
+    thursday_start = day_time_field('Hora Início Quinta')
+    thursday_end = day_time_field('Hora Fim Quinta')
+    friday_start = day_time_field('Hora Início Sexta')
+    friday_end = day_time_field('Hora Fim Sexta')
+    saturday_start = day_time_field('Hora Início Sábado')
+    saturday_end = day_time_field('Hora Fim Sábado')
+    sunday_start = day_time_field('Hora Início Domingo')
+    sunday_end = day_time_field('Hora Fim Domingo')
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         instance = kwargs.get('instance')
@@ -34,66 +54,37 @@ class ReservationAdminForm(forms.ModelForm):
             if instance.recurring_days:
                 self.initial['recurring_days'] = instance.recurring_days.split(',')
             
-            # Map dias para os campos corretos do modelo
-            day_map = {
-                '0': ('monday_start', 'monday_end'),
-                '1': ('tuesday_start', 'tuesday_end'),
-                '2': ('wednesday_start', 'wednesday_end'),
-                '3': ('thursday_start', 'thursday_end'),
-                '4': ('friday_start', 'friday_end'),
-                '5': ('saturday_start', 'saturday_end'),
-                '6': ('sunday_start', 'sunday_end'),
-            }
-            
             # Set initial values for day-specific times
-            if instance.recurring_times:
-                for day, time_data in instance.recurring_times.items():
-                    if day in day_map:
-                        start_field, end_field = day_map[day]
-                        if 'start' in time_data:
-                            self.initial[start_field] = time_data['start']
-                        if 'end' in time_data:
-                            self.initial[end_field] = time_data['end']
+            for weekday, (start, end) in instance.get_slot_times().items():
+                start_field, end_field = WEEKDAY_TIME_FIELDS[weekday]
+                self.initial[start_field] = start
+                self.initial[end_field] = end
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Reservas recorrentes existentes não mudam de período (ver Reservation.save)
+        if cleaned_data.get('is_recurring') and self.instance._state.adding:
+            try:
+                validate_recurrence_span(
+                    cleaned_data.get('recurring_start_date'), cleaned_data.get('recurring_end_date')
+                )
+            except ValidationError as e:
+                self.add_error('recurring_end_date', e)
+        return cleaned_data
 
     def save(self, commit=True):
         instance = super().save(commit=False)
         
         if instance.is_recurring:
-            # Save selected days as comma-separated string
             days = self.cleaned_data.get('recurring_days', [])
-            instance.recurring_days = ','.join(days) if days else ''
-            
-            # Map dos dias para os campos do modelo
-            day_map = {
-                '0': ('monday_start', 'monday_end'),
-                '1': ('tuesday_start', 'tuesday_end'),
-                '2': ('wednesday_start', 'wednesday_end'),
-                '3': ('thursday_start', 'thursday_end'),
-                '4': ('friday_start', 'friday_end'),
-                '5': ('saturday_start', 'saturday_end'),
-                '6': ('sunday_start', 'sunday_end'),
-            }
+            instance.recurring_days = days
             
             # Save time values for each day
-            times = {}
+            instance.recurring_times = {}
             for day in days:
-                if day in day_map:
-                    start_field, end_field = day_map[day]
-                    start_time = self.cleaned_data.get(start_field)
-                    end_time = self.cleaned_data.get(end_field)
-                    
-                    # Salvar nos campos específicos do modelo
-                    setattr(instance, start_field, start_time)
-                    setattr(instance, end_field, end_time)
-                    
-                    # Salvar também no JSONField recurring_times
-                    if start_time and end_time:
-                        times[day] = {
-                            'start': start_time.strftime('%H:%M'),
-                            'end': end_time.strftime('%H:%M')
-                        }
-            
-            instance.recurring_times = times
+                start_field, end_field = WEEKDAY_TIME_FIELDS[parse_weekday(day)]
+                setattr(instance, start_field, self.cleaned_data.get(start_field))
+                setattr(instance, end_field, self.cleaned_data.get(end_field))
 
         if commit:
             instance.save()
@@ -119,18 +110,4 @@ class ReservationAdminForm(forms.ModelForm):
             'date': AdminDateWidget(),
             'recurring_start_date': AdminDateWidget(),
             'recurring_end_date': AdminDateWidget(),
-            'monday_start': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'monday_end': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'tuesday_start': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'tuesday_end': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'wednesday_start': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'wednesday_end': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'thursday_start': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'thursday_end': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'friday_start': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'friday_end': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'saturday_start': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'saturday_end': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'sunday_start': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-            'sunday_end': forms.TimeInput(attrs={'type': 'time'}, format='%H:%M'),
-        }
\ No newline at end of file
+        }
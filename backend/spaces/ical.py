@@ -0,0 +1,172 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer
+
+from .models import WEEKDAY_CODES
+
+# Códigos BYDAY do RFC 5545 na ordem de date.weekday()
+ICAL_WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+ICAL_STATUS = {
+    'pending': 'TENTATIVE',
+    'confirmado': 'CONFIRMED',
+    'completed': 'CONFIRMED',
+    'canceled': 'CANCELLED',
+}
+
+PRODID = '-//CESMAC//Gerenciamento de Salas//PT'
+
+
+class ICalendarRenderer(BaseRenderer):
+    media_type = 'text/calendar'
+    format = 'ics'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # Respostas de erro (401, 404...) viram texto simples
+            return str(data.get('detail', ''))
+        return data
+
+
+def escape_text(value):
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def fold_line(line):
+    """Quebra linhas com mais de 75 octetos, como pede o RFC 5545"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        size = 75 if not parts else 74
+        # Não cortar no meio de um caractere UTF-8
+        while size < len(encoded) and (encoded[size] & 0xC0) == 0x80:
+            size -= 1
+        parts.append(encoded[:size].decode('utf-8'))
+        encoded = encoded[size:]
+    return '\r\n '.join(parts)
+
+
+def format_local(day, moment):
+    return datetime.combine(day, moment or time(0, 0)).strftime('%Y%m%dT%H%M%S')
+
+
+def format_utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def build_event(uid, reservation, day, start, end, stamp, rrule=None):
+    space = reservation.space
+    location = [space.building.name]
+    if space.floor_name:
+        location.append(space.floor_name.name)
+    location.append(space.name)
+
+    summary = f'{space.name} - {reservation.description}' if reservation.description else space.name
+    description = [f'Reservado por: {reservation.user.email}']
+    if reservation.course:
+        description.append(f'Curso: {reservation.course}')
+    if reservation.phone:
+        description.append(f'Telefone: {reservation.phone}')
+
+    tzid = settings.TIME_ZONE
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}',
+        f'DTSTAMP:{format_utc(stamp)}',
+        f'DTSTART;TZID={tzid}:{format_local(day, start)}',
+        f'DTEND;TZID={tzid}:{format_local(day, end)}',
+    ]
+    if rrule:
+        lines.append(f'RRULE:{rrule}')
+    lines += [
+        f'SUMMARY:{escape_text(summary)}',
+        f'LOCATION:{escape_text(" - ".join(location))}',
+        f'DESCRIPTION:{escape_text(chr(10).join(description))}',
+        f'STATUS:{ICAL_STATUS.get(reservation.status, "CONFIRMED")}',
+        'END:VEVENT',
+    ]
+    return lines
+
+
+def build_reservation_events(reservation):
+    """
+    Eventos de uma reserva. Reservas recorrentes geram um evento com RRULE
+    semanal para cada horário distinto (dias com o mesmo horário são agrupados
+    no BYDAY), em vez de um evento por ocorrência.
+    """
+    stamp = reservation.created_at or datetime.now(dt_timezone.utc)
+    uid_base = f'reserva-{reservation.pk}@gerenciamento-salas'
+
+    if not reservation.is_recurring:
+        if not reservation.date:
+            return []
+        return build_event(
+            uid_base, reservation, reservation.date,
+            reservation.start_time, reservation.end_time, stamp
+        )
+
+    if not reservation.recurring_start_date or not reservation.recurring_end_date:
+        return []
+
+    slots = {}
+    for weekday in sorted(reservation.get_recurring_weekdays()):
+        slots.setdefault(reservation.get_times_for_weekday(weekday), []).append(weekday)
+
+    # UNTIL em UTC: fim do último dia da recorrência no fuso local
+    until = datetime.combine(
+        reservation.recurring_end_date, time(23, 59, 59), tzinfo=ZoneInfo(settings.TIME_ZONE)
+    )
+
+    lines = []
+    for index, ((start, end), weekdays) in enumerate(sorted(slots.items(), key=lambda item: item[1])):
+        first_day = reservation.recurring_start_date
+        while first_day.weekday() not in weekdays:
+            first_day += timedelta(days=1)
+        if first_day > reservation.recurring_end_date:
+            continue
+        rrule = 'FREQ=WEEKLY;BYDAY={};UNTIL={}'.format(
+            ','.join(ICAL_WEEKDAYS[weekday] for weekday in weekdays),
+            format_utc(until)
+        )
+        uid = f'reserva-{reservation.pk}-{WEEKDAY_CODES[weekdays[0]]}@gerenciamento-salas' if index else uid_base
+        lines += build_event(uid, reservation, first_day, start, end, stamp, rrule=rrule)
+    return lines
+
+
+def build_calendar(name, reservations):
+    offset = datetime.now(ZoneInfo(settings.TIME_ZONE)).strftime('%z')
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+        f'X-WR-TIMEZONE:{settings.TIME_ZONE}',
+        # Fuso com deslocamento fixo: o Brasil não tem horário de verão desde 2019
+        'BEGIN:VTIMEZONE',
+        f'TZID:{settings.TIME_ZONE}',
+        'BEGIN:STANDARD',
+        'DTSTART:19700101T000000',
+        f'TZOFFSETFROM:{offset}',
+        f'TZOFFSETTO:{offset}',
+        f'TZNAME:{offset[:3]}',
+        'END:STANDARD',
+        'END:VTIMEZONE',
+    ]
+    for reservation in reservations:
+        lines += build_reservation_events(reservation)
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(fold_line(line) for line in lines) + '\r\n'
@@ -0,0 +1,139 @@
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Larguras geradas para cada planta: 200 cobre a miniatura de 100px do admin
+# em telas de alta densidade, 800 a prévia de 400px e 1600 o mapa do frontend
+FLOOR_PLAN_WIDTHS = (200, 400, 800, 1600)
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+# Formato de cada variação: WebP e o mesmo formato do original (fallback)
+FORMAT_EXTENSIONS = {
+    'webp': 'webp',
+    'jpeg': 'jpg',
+    'png': 'png',
+}
+
+CONTENT_TYPES = {
+    'webp': 'image/webp',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+}
+
+
+def get_max_pixels():
+    return getattr(settings, 'FLOOR_PLAN_MAX_PIXELS', Image.MAX_IMAGE_PIXELS)
+
+
+def open_plan(source):
+    """
+    Abre a planta sem decodificar os pixels. Acima de FLOOR_PLAN_MAX_PIXELS
+    levanta Image.DecompressionBombError, como o Pillow faz no limite dele.
+    """
+    image = Image.open(source)
+    if image.width * image.height > get_max_pixels():
+        raise Image.DecompressionBombError(
+            f'{image.width}x{image.height} excede o limite de {get_max_pixels()} pixels das plantas'
+        )
+    return image
+
+
+def validate_plan_pixels(field_file):
+    """Recusa no upload as plantas que open_plan não processaria"""
+    try:
+        width, height = field_file.width, field_file.height
+    except (OSError, ValueError):
+        return
+    if width and height and width * height > get_max_pixels():
+        raise ValidationError(
+            f'Planta muito grande ({width}×{height} pixels). O limite é de '
+            f'{get_max_pixels()} pixels; reduza a resolução antes de enviar.'
+        )
+
+
+def get_fallback_format(image):
+    return 'jpeg' if image.format == 'JPEG' else 'png'
+
+
+def encode(image, image_format):
+    buffer = BytesIO()
+    if image_format == 'webp':
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=4)
+    elif image_format == 'jpeg':
+        image.convert('RGB').save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def generate_variants(field_file):
+    """
+    Gera as variações (larguras fixas, em WebP e no formato original) da
+    imagem de um ImageField e retorna o mapa gravado em FloorPlan.plan_variants:
+
+        {'source': nome do original, 'width': largura do original,
+         'sizes': {'200': {'webp': nome, 'png': nome}, ...}}
+
+    Larguras maiores que o original não são geradas. Se a imagem não puder
+    ser lida, o mapa sai sem 'sizes' e as telas usam o original.
+    """
+    variants = {'source': field_file.name, 'sizes': {}}
+    storage = field_file.storage
+    stem = os.path.splitext(os.path.basename(field_file.name))[0]
+    directory = os.path.join(os.path.dirname(field_file.name), 'variants')
+
+    try:
+        with field_file.open('rb') as source:
+            original = open_plan(source)
+            fallback_format = get_fallback_format(original)
+            original = ImageOps.exif_transpose(original)
+            original.load()
+    except (OSError, ValueError, UnidentifiedImageError, Image.DecompressionBombError) as error:
+        logger.warning('Não foi possível gerar variações de %s: %s', field_file.name, error)
+        return variants
+
+    if original.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        original = original.convert('RGBA' if 'transparency' in original.info else 'RGB')
+    variants['width'] = original.width
+
+    for width in FLOOR_PLAN_WIDTHS:
+        if width >= original.width:
+            break
+        height = max(1, round(original.height * width / original.width))
+        resized = original.resize((width, height), Image.LANCZOS)
+
+        size = {}
+        for image_format in ('webp', fallback_format):
+            name = os.path.join(directory, f'{stem}-{width}.{FORMAT_EXTENSIONS[image_format]}')
+            size[image_format] = storage.save(name, ContentFile(encode(resized, image_format)))
+        variants['sizes'][str(width)] = size
+
+    return variants
+
+
+def delete_variants(variants, storage):
+    for size in (variants or {}).get('sizes', {}).values():
+        for name in size.values():
+            storage.delete(name)
+
+
+def get_srcset(variants, storage, build_url=None):
+    """
+    Mapa formato → srcset ("url 200w, url 400w, ...") pronto para
+    <picture><source type="image/webp" srcset="...">
+    """
+    build_url = build_url or (lambda url: url)
+    srcset = {}
+    for width, size in sorted((variants or {}).get('sizes', {}).items(), key=lambda item: int(item[0])):
+        for image_format, name in size.items():
+            srcset.setdefault(image_format, []).append(f'{build_url(storage.url(name))} {width}w')
+    return {image_format: ', '.join(entries) for image_format, entries in srcset.items()}
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from spaces.models import Reservation, ReservationOccurrence
+
+
+class Command(BaseCommand):
+    help = 'Recria a tabela de ocorrências a partir das reservas existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Quantidade de ocorrências gravadas por INSERT'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        reservations = Reservation.objects.order_by('pk')
+        total = 0
+
+        with transaction.atomic():
+            ReservationOccurrence.objects.all().delete()
+
+            batch = []
+            for reservation in reservations.iterator(chunk_size=batch_size):
+                batch.extend(reservation.build_occurrences())
+                if len(batch) >= batch_size:
+                    ReservationOccurrence.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+
+            if batch:
+                ReservationOccurrence.objects.bulk_create(batch)
+                total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} ocorrências geradas para {reservations.count()} reservas'
+        ))
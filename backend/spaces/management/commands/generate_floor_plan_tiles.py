@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from spaces.models import FloorPlan
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera a pirâmide de tiles (Deep Zoom) das plantas enviadas ou trocadas '
+        'desde a última execução. Rode periodicamente (ex.: cron a cada minuto).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Confere todas as plantas; as de arquivo igual (mesmo hash) são puladas'
+        )
+
+    def handle(self, *args, **options):
+        floors = FloorPlan.objects.exclude(plan_image='')
+        if not options['force']:
+            floors = floors.exclude(plan_tiles__complete=True)
+
+        updated = 0
+        for floor in floors.order_by('pk').iterator():
+            previous = floor.plan_tiles
+            floor.refresh_tiles()
+            if floor.plan_tiles != previous:
+                updated += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Tiles gerados para {updated} plantas'))
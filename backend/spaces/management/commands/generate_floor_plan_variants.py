@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from spaces.models import FloorPlan
+
+
+class Command(BaseCommand):
+    help = 'Gera miniaturas e versões WebP das plantas já cadastradas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regera também as plantas que já têm variações'
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for floor in FloorPlan.objects.exclude(plan_image='').order_by('pk').iterator():
+            if options['force'] or floor.plan_variants.get('source') != floor.plan_image.name:
+                floor.refresh_variants()
+                total += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Variações geradas para {total} plantas'))
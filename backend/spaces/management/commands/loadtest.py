@@ -0,0 +1,57 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Dispara requisições concorrentes contra um servidor já em execução e '
+        'mostra vazão e latência. Serve para comparar o mesmo endpoint sob '
+        'gunicorn síncrono (WSGI) e gunicorn com workers uvicorn (ASGI).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help='URLs completas a testar')
+        parser.add_argument('--token', help='Token enviado no cabeçalho Authorization')
+        parser.add_argument('--concurrency', type=int, default=50, help='Clientes simultâneos')
+        parser.add_argument('--requests', type=int, default=1000, help='Requisições por URL')
+
+    def handle(self, *args, **options):
+        headers = {'Authorization': f"Token {options['token']}"} if options['token'] else {}
+        for url in options['urls']:
+            self.run(url, headers, options['concurrency'], options['requests'])
+
+    def run(self, url, headers, concurrency, total):
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        def fetch(_):
+            started = time.perf_counter()
+            try:
+                status = session.get(url, headers=headers, timeout=30).status_code
+            except requests.RequestException:
+                status = None
+            return status, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(fetch, range(total)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency * 1000 for _, latency in results)
+        errors = sum(1 for status, _ in results if status != 200)
+        if len(latencies) < 2:
+            raise CommandError('Use --requests maior que 1')
+
+        self.stdout.write(
+            f'{url}\n'
+            f'  {total / elapsed:.1f} req/s  '
+            f'p50 {statistics.median(latencies):.1f} ms  '
+            f'p95 {statistics.quantiles(latencies, n=20)[-1]:.1f} ms  '
+            f'erros {errors}/{total}'
+        )
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spaces', '0005_reservation_course_reservation_phone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Data')),
+                ('start_time', models.TimeField(null=True, verbose_name='Hora Início')),
+                ('end_time', models.TimeField(null=True, verbose_name='Hora Fim')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('confirmado', 'Confirmado'), ('canceled', 'Cancelado'), ('completed', 'Concluído')], max_length=20, verbose_name='Status')),
+                ('reservation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='spaces.reservation', verbose_name='Reserva')),
+                ('space', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='spaces.space', verbose_name='Sala')),
+            ],
+            options={
+                'verbose_name': 'Ocorrência de Reserva',
+                'verbose_name_plural': 'Ocorrências de Reserva',
+                'indexes': [models.Index(fields=['space', 'date'], name='occurrence_space_date_idx')],
+            },
+        ),
+    ]
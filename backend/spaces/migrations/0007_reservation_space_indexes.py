@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spaces', '0006_reservationoccurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['space', 'date', 'start_time'], name='reservation_space_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['space', 'status'], name='reservation_space_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', '-date', '-start_time'], name='reservation_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('is_recurring', True)), fields=['recurring_start_date', 'recurring_end_date'], name='reservation_recurring_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='space',
+            index=models.Index(fields=['building', 'floor_name', 'is_active'], name='space_building_floor_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spaces', '0008_notification_index_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='floorplan',
+            name='plan_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Variações da planta'),
+        ),
+    ]
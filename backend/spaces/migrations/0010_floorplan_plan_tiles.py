@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spaces', '0009_floorplan_plan_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='floorplan',
+            name='plan_tiles',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Tiles da planta'),
+        ),
+        migrations.AlterField(
+            model_name='space',
+            name='location_x',
+            field=models.FloatField(blank=True, help_text='Fração da largura da planta (0 = esquerda, 1 = direita)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='space',
+            name='location_y',
+            field=models.FloatField(blank=True, help_text='Fração da altura da planta (0 = topo, 1 = base)', null=True),
+        ),
+    ]
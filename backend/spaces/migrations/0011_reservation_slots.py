@@ -0,0 +1,201 @@
+# Generated by Django 5.2.8 on 2026-10-18 07:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.dateparse import parse_time
+
+
+WEEKDAY_CODES = ['seg', 'ter', 'qua', 'qui', 'sex', 'sab', 'dom']
+
+WEEKDAY_TIME_FIELDS = [
+    ('monday_start', 'monday_end'),
+    ('tuesday_start', 'tuesday_end'),
+    ('wednesday_start', 'wednesday_end'),
+    ('thursday_start', 'thursday_end'),
+    ('friday_start', 'friday_end'),
+    ('saturday_start', 'saturday_end'),
+    ('sunday_start', 'sunday_end'),
+]
+
+
+def parse_weekday(code):
+    code = str(code).strip()
+    if code in WEEKDAY_CODES:
+        return WEEKDAY_CODES.index(code)
+    if code.isdigit() and int(code) < 7:
+        return int(code)
+    return None
+
+
+def get_times(reservation, weekday):
+    """Mesma precedência da versão anterior: recurring_times, colunas do dia, start/end"""
+    times = reservation.recurring_times or {}
+    for key in (WEEKDAY_CODES[weekday], str(weekday)):
+        day_times = times.get(key)
+        if isinstance(day_times, dict) and day_times.get('start') and day_times.get('end'):
+            start, end = parse_time(str(day_times['start'])), parse_time(str(day_times['end']))
+            if start and end:
+                return start, end
+    start_field, end_field = WEEKDAY_TIME_FIELDS[weekday]
+    start, end = getattr(reservation, start_field), getattr(reservation, end_field)
+    if start and end:
+        return start, end
+    return reservation.start_time, reservation.end_time
+
+
+def copy_recurrence(apps, schema_editor):
+    Reservation = apps.get_model('spaces', 'Reservation')
+    ReservationSlot = apps.get_model('spaces', 'ReservationSlot')
+    reservations = Reservation.objects.exclude(recurring_days__isnull=True).exclude(recurring_days='')
+    updated, slots = [], []
+    for reservation in reservations.iterator(chunk_size=1000):
+        weekdays = {parse_weekday(code) for code in reservation.recurring_days.split(',')} - {None}
+        if not weekdays:
+            continue
+        reservation.recurring_weekdays = sum(1 << weekday for weekday in weekdays)
+        updated.append(reservation)
+        if reservation.is_recurring:
+            for weekday in sorted(weekdays):
+                start, end = get_times(reservation, weekday)
+                if start and end:
+                    slots.append(ReservationSlot(
+                        reservation_id=reservation.pk, weekday=weekday, start_time=start, end_time=end
+                    ))
+    Reservation.objects.bulk_update(updated, ['recurring_weekdays'], batch_size=1000)
+    ReservationSlot.objects.bulk_create(slots, batch_size=1000)
+
+
+def restore_recurrence(apps, schema_editor):
+    Reservation = apps.get_model('spaces', 'Reservation')
+    ReservationSlot = apps.get_model('spaces', 'ReservationSlot')
+    slots = {}
+    for slot in ReservationSlot.objects.all():
+        slots.setdefault(slot.reservation_id, []).append(slot)
+    updated = []
+    for reservation in Reservation.objects.filter(recurring_weekdays__gt=0).iterator(chunk_size=1000):
+        reservation.recurring_days = ','.join(
+            code for weekday, code in enumerate(WEEKDAY_CODES) if reservation.recurring_weekdays & (1 << weekday)
+        )
+        reservation.recurring_times = {}
+        for slot in slots.get(reservation.pk, []):
+            start_field, end_field = WEEKDAY_TIME_FIELDS[slot.weekday]
+            setattr(reservation, start_field, slot.start_time)
+            setattr(reservation, end_field, slot.end_time)
+            reservation.recurring_times[WEEKDAY_CODES[slot.weekday]] = {
+                'start': slot.start_time.strftime('%H:%M'),
+                'end': slot.end_time.strftime('%H:%M'),
+            }
+        updated.append(reservation)
+    Reservation.objects.bulk_update(
+        updated,
+        ['recurring_days', 'recurring_times'] + [field for fields in WEEKDAY_TIME_FIELDS for field in fields],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spaces', '0010_floorplan_plan_tiles'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReservationSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Segunda-feira'), (1, 'Terça-feira'), (2, 'Quarta-feira'), (3, 'Quinta-feira'), (4, 'Sexta-feira'), (5, 'Sábado'), (6, 'Domingo')], verbose_name='Dia da Semana')),
+                ('start_time', models.TimeField(verbose_name='Hora Início')),
+                ('end_time', models.TimeField(verbose_name='Hora Fim')),
+            ],
+            options={
+                'verbose_name': 'Horário Recorrente',
+                'verbose_name_plural': 'Horários Recorrentes',
+            },
+        ),
+        migrations.AddField(
+            model_name='reservationslot',
+            name='reservation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='spaces.reservation', verbose_name='Reserva'),
+        ),
+        migrations.AddConstraint(
+            model_name='reservationslot',
+            constraint=models.UniqueConstraint(fields=('reservation', 'weekday'), name='slot_reservation_weekday_uniq'),
+        ),
+        migrations.AddField(
+            model_name='reservation',
+            name='recurring_weekdays',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Dias da Semana'),
+        ),
+        migrations.RunPython(copy_recurrence, restore_recurrence),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='friday_end',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='friday_start',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='monday_end',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='monday_start',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='recurring_days',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='recurring_times',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='saturday_end',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='saturday_start',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='sunday_end',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='sunday_start',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='thursday_end',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='thursday_start',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='tuesday_end',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='tuesday_start',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='wednesday_end',
+        ),
+        migrations.RemoveField(
+            model_name='reservation',
+            name='wednesday_start',
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(condition=models.Q(('is_recurring', True)), fields=['space', 'recurring_weekdays'], name='reservation_weekdays_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 08:04
+
+import spaces.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('spaces', '0012_reservation_date_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='floorplan',
+            name='plan_image',
+            field=models.ImageField(upload_to='floor_plans/', validators=[spaces.images.validate_plan_pixels], verbose_name='Planta'),
+        ),
+    ]
@@ -1,13 +1,94 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_time
+from datetime import datetime, timedelta
 import json
 from django.conf import settings
 
+from .images import delete_variants, generate_variants, validate_plan_pixels
+from .tiles import delete_tiles, generate_tiles
+from .versioning import bump_version
+
 def get_default_end_time():
     return (timezone.now() + timedelta(hours=1)).time()
 
+# Códigos dos dias da semana na ordem de date.weekday() (segunda = 0).
+# A API e o admin usam 'seg'..'dom'; '0'..'6' (formato antigo do admin)
+# continua aceito na entrada.
+WEEKDAY_CODES = ['seg', 'ter', 'qua', 'qui', 'sex', 'sab', 'dom']
+
+WEEKDAY_NAMES = [
+    'Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira',
+    'Sexta-feira', 'Sábado', 'Domingo',
+]
+
+# Campos de horário por dia aceitos pela API e pelo admin; os valores ficam
+# em ReservationSlot (ver as propriedades criadas abaixo de Reservation)
+WEEKDAY_TIME_FIELDS = [
+    ('monday_start', 'monday_end'),
+    ('tuesday_start', 'tuesday_end'),
+    ('wednesday_start', 'wednesday_end'),
+    ('thursday_start', 'thursday_end'),
+    ('friday_start', 'friday_end'),
+    ('saturday_start', 'saturday_end'),
+    ('sunday_start', 'sunday_end'),
+]
+
+def parse_weekday(code):
+    """Converte um código de dia ('seg' ou '0') para o índice de date.weekday()"""
+    code = str(code).strip()
+    if code in WEEKDAY_CODES:
+        return WEEKDAY_CODES.index(code)
+    if code.isdigit() and int(code) < 7:
+        return int(code)
+    return None
+
+def weekday_mask(weekdays):
+    """Máscara de Reservation.recurring_weekdays: bit 0 = segunda ... bit 6 = domingo"""
+    mask = 0
+    for weekday in weekdays:
+        mask |= 1 << weekday
+    return mask
+
+def format_weekdays(mask):
+    """Máscara → 'seg,qua' (None sem dias), o formato de recurring_days na API"""
+    return ','.join(code for weekday, code in enumerate(WEEKDAY_CODES) if mask & (1 << weekday)) or None
+
+def weekdays_filter(weekdays):
+    """
+    Reservas recorrentes que caem em algum dos dias informados. Compara a
+    máscara com a lista dos valores que têm algum desses bits (no máximo
+    127), o que o banco resolve pelo índice de recurring_weekdays.
+    """
+    mask = weekday_mask(weekdays)
+    return models.Q(is_recurring=True, recurring_weekdays__in=[value for value in range(1, 128) if value & mask])
+
+def format_recurring_times(slot_times):
+    """{dia: (início, fim)} → {'seg': {'start': 'HH:MM', 'end': 'HH:MM'}}, o formato de recurring_times"""
+    return {
+        WEEKDAY_CODES[weekday]: {'start': start.strftime('%H:%M'), 'end': end.strftime('%H:%M')}
+        for weekday, (start, end) in sorted(slot_times.items())
+        if start and end
+    }
+
+def to_time(value):
+    if isinstance(value, str):
+        return parse_time(value)
+    if isinstance(value, datetime):
+        return value.time()
+    return value
+
+def validate_recurrence_span(start_date, end_date):
+    """Recusa recorrências mais longas que RESERVATION_MAX_RECURRENCE_DAYS"""
+    max_days = settings.RESERVATION_MAX_RECURRENCE_DAYS
+    if start_date and end_date and (end_date - start_date).days > max_days:
+        raise ValidationError(
+            f'O período da recorrência não pode passar de {max_days} dias. '
+            'Crie uma nova reserva para o período seguinte.'
+        )
+
 class Building(models.Model):
     name = models.CharField('Nome do Campus', max_length=100)
     address = models.TextField('Endereço', blank=True)
@@ -34,7 +115,11 @@ class SpaceType(models.Model):
 class FloorPlan(models.Model):
     building = models.ForeignKey(Building, on_delete=models.CASCADE, verbose_name='Campus')
     name = models.CharField('Nome', max_length=100)
-    plan_image = models.ImageField('Planta', upload_to='floor_plans/')
+    plan_image = models.ImageField('Planta', upload_to='floor_plans/', validators=[validate_plan_pixels])
+    # Miniaturas e versões WebP geradas a partir de plan_image (ver spaces/images.py)
+    plan_variants = models.JSONField('Variações da planta', default=dict, blank=True, editable=False)
+    # Pirâmide Deep Zoom da planta (ver spaces/tiles.py)
+    plan_tiles = models.JSONField('Tiles da planta', default=dict, blank=True, editable=False)
 
     class Meta:
         verbose_name = 'Planta'
@@ -42,9 +127,56 @@ class FloorPlan(models.Model):
 
     def __str__(self):
         return f"{self.building.name} - {self.name}"
-    
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Gera as variações quando a planta é enviada ou trocada. Os tiles de
+        # uma planta grande levam segundos ou minutos, então ficam para o
+        # comando generate_floor_plan_tiles, fora da requisição do upload
+        if self.plan_image and self.plan_variants.get('source') != self.plan_image.name:
+            self.refresh_variants()
+            self.mark_tiles_stale()
+
+    def refresh_variants(self):
+        delete_variants(self.plan_variants, self.plan_image.storage)
+        self.plan_variants = generate_variants(self.plan_image)
+        FloorPlan.objects.filter(pk=self.pk).update(plan_variants=self.plan_variants)
+        # update() não dispara os sinais: o catálogo precisa saber da mudança
+        transaction.on_commit(lambda: bump_version('model:floorplan'))
+
+    def mark_tiles_stale(self):
+        """
+        Tira a pirâmide de uso até o comando refazê-la. O hash anterior fica
+        guardado para os tiles antigos serem apagados depois da nova geração.
+        """
+        self.plan_tiles = {**self.plan_tiles, 'complete': False}
+        FloorPlan.objects.filter(pk=self.pk).update(plan_tiles=self.plan_tiles)
+        transaction.on_commit(lambda: bump_version('model:floorplan'))
+
+    def refresh_tiles(self):
+        """Refaz a pirâmide de tiles se o conteúdo da planta mudou (compara o hash)"""
+        tiles = generate_tiles(self, self.plan_tiles)
+        if tiles != self.plan_tiles:
+            self.plan_tiles = tiles
+            FloorPlan.objects.filter(pk=self.pk).update(plan_tiles=tiles)
+            transaction.on_commit(lambda: bump_version('model:floorplan'))
+
+    def get_variant_url(self, width, image_format=None):
+        """
+        URL da menor variação com pelo menos `width` pixels (no formato
+        informado ou no formato do original); sem variação adequada, o original
+        """
+        for size_width, size in sorted(self.plan_variants.get('sizes', {}).items(), key=lambda item: int(item[0])):
+            if int(size_width) < width:
+                continue
+            name = size.get(image_format) or next(name for key, name in size.items() if key != 'webp')
+            return self.plan_image.storage.url(name)
+        return self.plan_image.url
+
     def delete(self, *args, **kwargs):
         if self.plan_image:
+            delete_variants(self.plan_variants, self.plan_image.storage)
+            delete_tiles(self.pk, self.plan_tiles, self.plan_image.storage)
             self.plan_image.delete(save=False)
         super().delete(*args, **kwargs)
 
@@ -55,12 +187,17 @@ class Space(models.Model):
     floor_name = models.ForeignKey(FloorPlan, on_delete=models.SET_NULL, null=True, blank=True, verbose_name='Andar')
     capacity = models.IntegerField('Capacidade')
     is_active = models.BooleanField('Ativo', default=True)
-    location_x = models.FloatField(null=True, blank=True)
-    location_y = models.FloatField(null=True, blank=True)
+    # Posição na planta normalizada (0 a 1), independente da resolução da
+    # imagem: vale para o original, as miniaturas e todos os níveis de tiles
+    location_x = models.FloatField(null=True, blank=True, help_text='Fração da largura da planta (0 = esquerda, 1 = direita)')
+    location_y = models.FloatField(null=True, blank=True, help_text='Fração da altura da planta (0 = topo, 1 = base)')
 
     class Meta:
         verbose_name = 'Sala'
         verbose_name_plural = 'Salas'
+        indexes = [
+            models.Index(fields=['building', 'floor_name', 'is_active'], name='space_building_floor_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.building.name}"
@@ -88,86 +225,353 @@ class Reservation(models.Model):
         verbose_name='Status'
     )
     is_recurring = models.BooleanField('Reserva Recorrente', default=False)
-    recurring_days = models.TextField('Dias da Semana', blank=True, null=True)
+    # Dias da recorrência (ver weekday_mask); os horários de cada dia ficam em
+    # ReservationSlot. recurring_days, recurring_times e <dia>_start/_end são
+    # propriedades de compatibilidade sobre esses dois.
+    recurring_weekdays = models.PositiveSmallIntegerField('Dias da Semana', default=0, editable=False)
     recurring_start_date = models.DateField('Data Início Recorrência', null=True, blank=True)
     recurring_end_date = models.DateField('Data Fim Recorrência', null=True, blank=True)
-    recurring_times = models.JSONField('Horários Recorrentes', default=dict, blank=True, null=True)
-    
-    # Add time fields for each day
-    monday_start = models.TimeField('Hora Início Segunda', null=True, blank=True)
-    monday_end = models.TimeField('Hora Fim Segunda', null=True, blank=True)
-    tuesday_start = models.TimeField('Hora Início Terça', null=True, blank=True)
-    tuesday_end = models.TimeField('Hora Fim Terça', null=True, blank=True)
-    wednesday_start = models.TimeField('Hora Início Quarta', null=True, blank=True)
-    wednesday_end = models.TimeField('Hora Fim Quarta', null=True, blank=True)
-    thursday_start = models.TimeField('Hora Início Quinta', null=True, blank=True)
-    thursday_end = models.TimeField('Hora Fim Quinta', null=True, blank=True)
-    friday_start = models.TimeField('Hora Início Sexta', null=True, blank=True)
-    friday_end = models.TimeField('Hora Fim Sexta', null=True, blank=True)
-    saturday_start = models.TimeField('Hora Início Sábado', null=True, blank=True)
-    saturday_end = models.TimeField('Hora Fim Sábado', null=True, blank=True)
-    sunday_start = models.TimeField('Hora Início Domingo', null=True, blank=True)
-    sunday_end = models.TimeField('Hora Fim Domingo', null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = 'Reserva'
         verbose_name_plural = 'Reservas'
+        indexes = [
+            # Reservas de uma sala por data (e listagem ordenada por data/hora)
+            models.Index(fields=['space', 'date', 'start_time'], name='reservation_space_date_idx'),
+            models.Index(fields=['space', 'status'], name='reservation_space_status_idx'),
+            # Listagem do admin (date_hierarchy e ordem por data/hora)
+            models.Index(fields=['date', 'start_time'], name='reservation_date_idx'),
+            # "Minhas reservas": filtro por usuário já na ordem da listagem
+            models.Index(fields=['user', '-date', '-start_time'], name='reservation_user_date_idx'),
+            # Intervalo de recorrência, só para reservas recorrentes
+            models.Index(
+                fields=['recurring_start_date', 'recurring_end_date'],
+                name='reservation_recurring_idx',
+                condition=models.Q(is_recurring=True)
+            ),
+            # Recorrências de uma sala por dia da semana (weekdays_filter)
+            models.Index(
+                fields=['space', 'recurring_weekdays'],
+                name='reservation_weekdays_idx',
+                condition=models.Q(is_recurring=True)
+            ),
+        ]
+
+    # Campos do horário: se algum mudar, as ocorrências são regeneradas
+    SCHEDULE_FIELDS = {
+        'space_id', 'date', 'start_time', 'end_time', 'is_recurring',
+        'recurring_weekdays', 'recurring_start_date', 'recurring_end_date',
+    }
+    # Dados de uma reserva recorrente que não mudam depois de criada (ver save)
+    PROTECTED_RECURRING_FIELDS = (
+        'recurring_weekdays', 'recurring_start_date', 'recurring_end_date',
+        'date', 'start_time', 'end_time',
+    )
+
+    # Horários por dia da semana ainda não gravados, ou já lidos de slots
+    _slot_times = None
+    # Valores lidos do banco (attname → valor), para saber o que mudou
+    _loaded_values = None
 
     def __str__(self):
         return f"{self.space.name} - {self.date}"
 
+    def _clean_value(self, field_name):
+        # Valores atribuídos antes do save podem ser strings ou datetimes
+        return self._meta.get_field(field_name).to_python(getattr(self, field_name))
+
+    def get_recurring_weekdays(self):
+        """Retorna os dias da semana (0 = segunda) de uma reserva recorrente"""
+        return {weekday for weekday in range(7) if self.recurring_weekdays & (1 << weekday)}
+
+    @property
+    def recurring_days(self):
+        return format_weekdays(self.recurring_weekdays)
+
+    @recurring_days.setter
+    def recurring_days(self, value):
+        codes = value.split(',') if isinstance(value, str) else (value or [])
+        self.recurring_weekdays = weekday_mask(
+            weekday for weekday in map(parse_weekday, codes) if weekday is not None
+        )
+
+    def get_slot_times(self):
+        """Horários por dia da semana, {0: (início, fim), ...}, lidos uma vez de slots"""
+        if self._slot_times is None:
+            # Só reservas recorrentes têm slots gravados (ver build_slots)
+            self._slot_times = {} if self.pk is None or not self.is_recurring else {
+                slot.weekday: (slot.start_time, slot.end_time) for slot in self.slots.all()
+            }
+        return self._slot_times
+
+    def set_slot_time(self, weekday, start=False, end=False):
+        # Copia antes de alterar: cópias da instância (copy.copy) dividem o dicionário
+        times = dict(self.get_slot_times())
+        current_start, current_end = times.get(weekday, (None, None))
+        times[weekday] = (
+            current_start if start is False else to_time(start),
+            current_end if end is False else to_time(end),
+        )
+        self._slot_times = times
+
+    @property
+    def recurring_times(self):
+        return format_recurring_times(self.get_slot_times())
+
+    @recurring_times.setter
+    def recurring_times(self, value):
+        """Aceita o formato da API: {'seg' ou '0': {'start': 'HH:MM', 'end': 'HH:MM'}}"""
+        self._slot_times = {}
+        for code, day_times in (value or {}).items():
+            weekday = parse_weekday(code)
+            if weekday is not None and day_times:
+                self.set_slot_time(weekday, day_times.get('start'), day_times.get('end'))
+
+    def get_times_for_weekday(self, weekday):
+        """
+        Retorna (início, fim) de uma recorrência no dia da semana informado:
+        o horário do dia em slots ou, se não houver, start_time/end_time.
+        """
+        start, end = self.get_slot_times().get(weekday, (None, None))
+        if start and end:
+            return start, end
+        return self._clean_value('start_time'), self._clean_value('end_time')
+
+    def iter_occurrences(self, start_date=None, end_date=None):
+        """
+        Gera (data, início, fim) para cada ocorrência da reserva entre
+        start_date e end_date (inclusive). Reservas únicas geram no máximo uma.
+        """
+        if not self.is_recurring:
+            day = self._clean_value('date')
+            if day is None:
+                return
+            if start_date and day < start_date:
+                return
+            if end_date and day > end_date:
+                return
+            yield day, self._clean_value('start_time'), self._clean_value('end_time')
+            return
+
+        recurring_start = self._clean_value('recurring_start_date')
+        recurring_end = self._clean_value('recurring_end_date')
+        if not recurring_start or not recurring_end:
+            return
+
+        first = max(filter(None, [recurring_start, start_date]))
+        last = min(filter(None, [recurring_end, end_date]))
+        weekdays = self.get_recurring_weekdays()
+        if not weekdays:
+            return
+
+        slots = {weekday: self.get_times_for_weekday(weekday) for weekday in weekdays}
+        current = first
+        while current <= last:
+            slot = slots.get(current.weekday())
+            if slot:
+                yield current, slot[0], slot[1]
+            current += timedelta(days=1)
+
+    def build_occurrences(self):
+        """Cria (sem salvar) as ocorrências materializadas desta reserva"""
+        return [
+            ReservationOccurrence(
+                reservation=self,
+                space_id=self.space_id,
+                date=day,
+                start_time=start,
+                end_time=end,
+                status=self.status
+            )
+            for day, start, end in self.iter_occurrences()
+        ]
+
+    def sync_occurrences(self):
+        """Regenera a tabela de ocorrências a partir dos dados da reserva"""
+        self.occurrences.all().delete()
+        ReservationOccurrence.objects.bulk_create(self.build_occurrences())
+
+    def normalize_recurring_times(self):
+        """Garante um horário para cada dia selecionado, e só para eles"""
+        self._slot_times = {
+            weekday: self.get_times_for_weekday(weekday)
+            for weekday in self.get_recurring_weekdays()
+        }
+
+    def build_slots(self):
+        """Cria (sem salvar) os horários por dia desta reserva recorrente"""
+        if not self.is_recurring:
+            return []
+        return [
+            ReservationSlot(reservation=self, weekday=weekday, start_time=start, end_time=end)
+            for weekday, (start, end) in sorted(self.get_slot_times().items())
+            if weekday in self.get_recurring_weekdays() and start and end
+        ]
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._slot_times = None
+        refreshed = self.get_field_values()
+        if fields is not None:
+            names = {self._meta.get_field(name).attname for name in fields}
+            refreshed = {
+                **(self._loaded_values or {}),
+                **{name: value for name, value in refreshed.items() if name in names},
+            }
+        self._loaded_values = refreshed
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valores como vieram do banco (campos adiados ficam de fora)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_field_values(self):
+        return {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def get_changed_fields(self):
+        """
+        Campos (attname) alterados desde a leitura do banco, ou None se a
+        instância não veio do banco
+        """
+        if self._loaded_values is None:
+            return None
+        return {
+            name for name, value in self._loaded_values.items()
+            if self.__dict__.get(name, value) != value
+        }
+
     def save(self, *args, **kwargs):
         # Se é uma reserva recorrente SENDO CRIADA (não tem ID ainda)
-        if self.is_recurring and not self.pk and self.recurring_days:
-            # Converter dias recorrentes para lista
-            days = [d for d in self.recurring_days.split(',') if d]
-            times = self.recurring_times or {}
-            
-            # Garantir que temos entradas de tempo para todos os dias selecionados
-            for day in days:
-                if day not in times:
-                    times[day] = {
-                        'start': self.start_time.strftime('%H:%M') if self.start_time else None,
-                        'end': self.end_time.strftime('%H:%M') if self.end_time else None
-                    }
-            
-            # Remover tempos para dias não selecionados
-            self.recurring_times = {k: v for k, v in times.items() if k in days}
+        creating = not self.pk
+        if self.is_recurring and creating and self.recurring_weekdays:
+            self.normalize_recurring_times()
         
         # Se é uma reserva recorrente JÁ EXISTENTE, NÃO MODIFICAR dados recorrentes
         # Apenas permitir mudança de status
         elif self.pk and self.is_recurring:
-            # Recuperar dados antigos do banco
-            try:
-                old_instance = Reservation.objects.get(pk=self.pk)
-                # Preservar todos os dados recorrentes originais
-                self.recurring_days = old_instance.recurring_days
-                self.recurring_start_date = old_instance.recurring_start_date
-                self.recurring_end_date = old_instance.recurring_end_date
-                self.recurring_times = old_instance.recurring_times
-                self.monday_start = old_instance.monday_start
-                self.monday_end = old_instance.monday_end
-                self.tuesday_start = old_instance.tuesday_start
-                self.tuesday_end = old_instance.tuesday_end
-                self.wednesday_start = old_instance.wednesday_start
-                self.wednesday_end = old_instance.wednesday_end
-                self.thursday_start = old_instance.thursday_start
-                self.thursday_end = old_instance.thursday_end
-                self.friday_start = old_instance.friday_start
-                self.friday_end = old_instance.friday_end
-                self.saturday_start = old_instance.saturday_start
-                self.saturday_end = old_instance.saturday_end
-                self.sunday_start = old_instance.sunday_start
-                self.sunday_end = old_instance.sunday_end
-                self.date = old_instance.date
-                self.start_time = old_instance.start_time
-                self.end_time = old_instance.end_time
-            except Reservation.DoesNotExist:
-                pass
+            # Os valores originais vêm da leitura do banco; só instâncias
+            # montadas à mão precisam de uma consulta
+            original = self._loaded_values
+            if original is None:
+                original = Reservation.objects.filter(pk=self.pk).values(*self.PROTECTED_RECURRING_FIELDS).first() or {}
+            for name in self.PROTECTED_RECURRING_FIELDS:
+                if name in original:
+                    setattr(self, name, original[name])
+            # Os horários por dia voltam a ser lidos de slots
+            self._slot_times = None
+
+        # Grava só as colunas alteradas
+        changed = None if creating else self.get_changed_fields()
+        if kwargs.get('update_fields') is not None:
+            changed = {self._meta.get_field(name).attname for name in kwargs['update_fields']}
+        elif changed is not None and not args:
+            if not changed:
+                return
+            kwargs['update_fields'] = changed
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if creating:
+                ReservationSlot.objects.bulk_create(self.build_slots())
+            if changed is None or changed & self.SCHEDULE_FIELDS:
+                self.sync_occurrences()
+            elif 'status' in changed:
+                self.occurrences.update(status=self.status)
+
+        saved = self.get_field_values()
+        if changed is not None:
+            # Com update_fields, o que ficou de fora continua pendente
+            saved = {**(self._loaded_values or {}), **{name: saved[name] for name in changed if name in saved}}
+        self._loaded_values = saved
+
+def _weekday_time_property(weekday, edge):
+    index = 0 if edge == 'start' else 1
+
+    def getter(self):
+        return self.get_slot_times().get(weekday, (None, None))[index]
+
+    def setter(self, value):
+        self.set_slot_time(weekday, **{edge: value})
+
+    return property(getter, setter)
+
+# monday_start, monday_end, ...: compatibilidade com as antigas colunas por dia
+for _weekday, _fields in enumerate(WEEKDAY_TIME_FIELDS):
+    for _edge, _field in zip(('start', 'end'), _fields):
+        setattr(Reservation, _field, _weekday_time_property(_weekday, _edge))
+
+class ReservationSlot(models.Model):
+    """
+    Horário de uma reserva recorrente em um dia da semana (uma linha por
+    dia). Substitui o JSON recurring_times e as 14 colunas <dia>_start/_end.
+    """
+    reservation = models.ForeignKey(
+        Reservation,
+        on_delete=models.CASCADE,
+        related_name='slots',
+        verbose_name='Reserva'
+    )
+    weekday = models.PositiveSmallIntegerField(
+        'Dia da Semana',
+        choices=list(enumerate(WEEKDAY_NAMES))
+    )
+    start_time = models.TimeField('Hora Início')
+    end_time = models.TimeField('Hora Fim')
+
+    class Meta:
+        verbose_name = 'Horário Recorrente'
+        verbose_name_plural = 'Horários Recorrentes'
+        constraints = [
+            models.UniqueConstraint(fields=['reservation', 'weekday'], name='slot_reservation_weekday_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.reservation_id} - {WEEKDAY_CODES[self.weekday]}"
+
+class ReservationOccurrence(models.Model):
+    """
+    Ocorrência expandida de uma reserva (uma linha por dia reservado).
+    Mantida por Reservation.save, permite consultar disponibilidade e
+    conflitos com filtros simples por sala e data.
+    """
+    reservation = models.ForeignKey(
+        Reservation,
+        on_delete=models.CASCADE,
+        related_name='occurrences',
+        verbose_name='Reserva'
+    )
+    space = models.ForeignKey(
+        Space,
+        on_delete=models.CASCADE,
+        related_name='occurrences',
+        verbose_name='Sala'
+    )
+    date = models.DateField('Data')
+    start_time = models.TimeField('Hora Início', null=True)
+    end_time = models.TimeField('Hora Fim', null=True)
+    status = models.CharField(
+        max_length=20,
+        choices=Reservation.STATUS_CHOICES,
+        verbose_name='Status'
+    )
+
+    class Meta:
+        verbose_name = 'Ocorrência de Reserva'
+        verbose_name_plural = 'Ocorrências de Reserva'
+        indexes = [
+            models.Index(fields=['space', 'date'], name='occurrence_space_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.reservation_id} - {self.date}"
 
 class Notification(models.Model):
     user = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
@@ -176,5 +580,33 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     read = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # Listagem do usuário (mais recentes primeiro) e "marcar todas como lidas"
+            models.Index(fields=['user', 'read', '-created_at'], name='notification_user_read_idx'),
+        ]
+
     def __str__(self):
         return self.title
+
+class NotificationCounter(models.Model):
+    """
+    Quantidade de notificações não lidas por usuário, mantida junto com as
+    notificações (ver spaces/notifications.py) para o contador do cabeçalho
+    não precisar contar linhas. Fica fora da tabela de usuários para não
+    invalidar o cache de autenticação a cada notificação.
+    """
+    user = models.OneToOneField(
+        get_user_model(),
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter'
+    )
+    unread = models.PositiveIntegerField(default=0, verbose_name='Não lidas')
+
+    class Meta:
+        verbose_name = 'Contador de Notificações'
+        verbose_name_plural = 'Contadores de Notificações'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread}"
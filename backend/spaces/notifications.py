@@ -0,0 +1,113 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+
+from .models import Notification, NotificationCounter, Reservation
+
+STATUS_LABELS = dict(Reservation.STATUS_CHOICES)
+
+
+def notify(notifications):
+    """
+    Grava várias notificações com um único INSERT e soma as não lidas nos
+    contadores (um UPDATE por quantidade distinta, não um por usuário)
+    """
+    notifications = list(notifications)
+    if not notifications:
+        return []
+
+    per_user = Counter(notification.user_id for notification in notifications)
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(notifications)
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id) for user_id in per_user],
+            ignore_conflicts=True
+        )
+        by_amount = {}
+        for user_id, amount in per_user.items():
+            by_amount.setdefault(amount, []).append(user_id)
+        for amount, user_ids in by_amount.items():
+            NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + amount)
+    return created
+
+
+def mark_read(user, notification_id):
+    """Marca uma notificação como lida; retorna False se não existir ou já estiver lida"""
+    with transaction.atomic():
+        updated = Notification.objects.filter(pk=notification_id, user=user, read=False).update(read=True)
+        if updated:
+            NotificationCounter.objects.filter(user=user, unread__gt=0).update(unread=F('unread') - 1)
+    return bool(updated)
+
+
+def mark_all_read(user):
+    """Um único UPDATE nas notificações do usuário, e o contador volta a zero"""
+    with transaction.atomic():
+        updated = Notification.objects.filter(user=user, read=False).update(read=True)
+        NotificationCounter.objects.filter(user=user).update(unread=0)
+    return updated
+
+
+def get_unread_count(user):
+    return NotificationCounter.objects.filter(user=user).values_list('unread', flat=True).first() or 0
+
+
+def recount_unread(user_ids, create=True):
+    """
+    Recalcula os contadores a partir das notificações (edições pelo admin).
+    Com create=False (exclusões) só atualiza contadores existentes: o usuário
+    pode estar sendo apagado junto com as notificações.
+    """
+    for user_id in set(user_ids):
+        unread = Notification.objects.filter(user_id=user_id, read=False).count()
+        if create:
+            NotificationCounter.objects.update_or_create(user_id=user_id, defaults={'unread': unread})
+        else:
+            NotificationCounter.objects.filter(user_id=user_id).update(unread=unread)
+
+
+def describe_reservation(reservation):
+    value = reservation._clean_value
+    if reservation.is_recurring and value('recurring_start_date') and value('recurring_end_date'):
+        when = (
+            f"de {value('recurring_start_date').strftime('%d/%m/%Y')} "
+            f"a {value('recurring_end_date').strftime('%d/%m/%Y')}"
+        )
+    else:
+        when = value('date').strftime('%d/%m/%Y') if value('date') else ''
+        if value('start_time') and value('end_time'):
+            when += f" {value('start_time').strftime('%H:%M')}-{value('end_time').strftime('%H:%M')}"
+    return f"{reservation.space.name} {when}".strip()
+
+
+def notify_new_reservations(reservations):
+    """Avisa a equipe administrativa sobre reservas pendentes de aprovação"""
+    pending = [reservation for reservation in reservations if reservation.status == 'pending']
+    if not pending:
+        return []
+
+    staff_ids = get_user_model().objects.filter(is_staff=True, is_active=True).values_list('pk', flat=True)
+    return notify(
+        Notification(
+            user_id=staff_id,
+            title='Nova reserva pendente',
+            message=f"{reservation.user.email} solicitou {describe_reservation(reservation)}"
+        )
+        for staff_id in staff_ids
+        for reservation in pending
+    )
+
+
+def notify_status_changes(reservations):
+    """Avisa cada dono de reserva sobre o novo status"""
+    return notify(
+        Notification(
+            user_id=reservation.user_id,
+            title=f"Status da reserva: {STATUS_LABELS.get(reservation.status, reservation.status)}",
+            message=f"Sua reserva de {describe_reservation(reservation)} agora está com status "
+                    f"{STATUS_LABELS.get(reservation.status, reservation.status)}."
+        )
+        for reservation in reservations
+    )
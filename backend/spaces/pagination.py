@@ -0,0 +1,162 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por cursor (keyset). O cursor guarda os valores dos campos de
+    `ordering` da última linha da página, e a próxima página é buscada com
+    um filtro "depois desta linha" em vez de OFFSET, então o custo depende só
+    do tamanho da página. O último campo de `ordering` deve ser único.
+    """
+    ordering = ('-id',)
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Versão assíncrona, para as views async (ver async_api.py)"""
+        return self.set_page([row async for row in self.get_page_queryset(queryset, request)])
+
+    def get_page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.get_cursor_filter(self.decode_cursor(cursor)))
+        # Uma linha a mais indica se existe próxima página
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def get_cursor_filter(self, values):
+        """(a > x) OU (a = x E b > y) OU ... respeitando a direção de cada campo"""
+        cursor_filter = Q()
+        equal = {}
+        for (name, descending), value in zip(self.get_fields(), values):
+            lookup = f'{name}__lt' if descending else f'{name}__gt'
+            cursor_filter |= Q(**equal, **{lookup: value})
+            equal[name] = value
+        return cursor_filter
+
+    def encode_cursor(self, instance):
+        values = []
+        for name, _ in self.get_fields():
+            value = getattr(instance, name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            fields = self.get_fields()
+            if len(values) != len(fields):
+                raise ValueError
+            return [
+                self.model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(fields, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+
+class ReservationPagination(KeysetPagination):
+    ordering = ('-date', '-start_time', '-id')
+
+
+class NotificationPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator do admin para tabelas grandes. Sem filtros, o total vem de uma
+    estimativa (estatísticas do PostgreSQL, ou o maior id nos demais bancos)
+    em vez de um COUNT(*) na tabela inteira; com filtros, a contagem continua
+    exata, já que os filtros usam índices. Tabelas pequenas também são
+    contadas normalmente.
+    """
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_rows(queryset)
+            if estimate is not None and estimate > self.estimate_threshold:
+                return estimate
+        return super().count
+
+
+def estimate_rows(queryset):
+    """Número aproximado de linhas da tabela do queryset, ou None"""
+    model = queryset.model
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [connection.ops.quote_name(model._meta.db_table)]
+            )
+            row = cursor.fetchone()
+        # -1: tabela ainda sem ANALYZE
+        if row and row[0] >= 0:
+            return row[0]
+        return None
+    # Ids sequenciais: exclusões deixam a estimativa um pouco acima do real
+    return model._default_manager.using(queryset.db).aggregate(last=Max('pk'))['last'] or 0
@@ -0,0 +1,180 @@
+import math
+import threading
+from collections import defaultdict
+
+from .filters import exclude_occupied
+from .models import Space
+from .versioning import get_versions
+
+# O índice é refeito quando alguma destas versões muda (ver signals.py)
+VERSION_KEYS = ('model:space', 'model:floorplan', 'model:building')
+
+# Células por eixo da grade de cada andar (coordenadas normalizadas de 0 a 1)
+GRID_SIZE = 8
+
+# Distância arredondada a 1% da planta: salas vizinhas empatam e a
+# capacidade decide entre elas
+DISTANCE_DIGITS = 2
+
+ROOM_FIELDS = (
+    'id', 'name', 'building_id', 'building__name', 'floor_name_id', 'floor_name__name',
+    'space_type_id', 'capacity', 'location_x', 'location_y',
+)
+
+
+class FloorIndex:
+    """
+    Salas de um andar distribuídas em uma grade GRID_SIZE × GRID_SIZE sobre a
+    planta. A busca parte da célula do ponto e cresce em anéis, então só as
+    células próximas são visitadas. Salas sem posição ficam por último.
+    """
+
+    def __init__(self, rooms):
+        self.cells = defaultdict(list)
+        self.unplaced = []
+        for room in rooms:
+            if room['location_x'] is None or room['location_y'] is None:
+                self.unplaced.append(room)
+            else:
+                self.cells[self.get_cell(room['location_x'], room['location_y'])].append(room)
+
+    @staticmethod
+    def get_cell(x, y):
+        return (
+            min(GRID_SIZE - 1, max(0, int(x * GRID_SIZE))),
+            min(GRID_SIZE - 1, max(0, int(y * GRID_SIZE))),
+        )
+
+    def iter_ring(self, center, radius):
+        column, row = center
+        for x in range(column - radius, column + radius + 1):
+            for y in range(row - radius, row + radius + 1):
+                if max(abs(x - column), abs(y - row)) == radius:
+                    yield from self.cells.get((x, y), ())
+
+    def nearest(self, x, y, accept, k):
+        """
+        [(distância, sala)] das salas aceitas por `accept`, da mais próxima de
+        (x, y) para a mais distante. Devolve pelo menos k salas (quando houver)
+        e todas as que empatam com a k-ésima na distância arredondada.
+        """
+        if x is None or y is None:
+            rooms = [room for cell in self.cells.values() for room in cell] + self.unplaced
+            return [(None, room) for room in rooms if accept(room)]
+
+        found = []
+        center = self.get_cell(x, y)
+        for radius in range(GRID_SIZE):
+            for room in self.iter_ring(center, radius):
+                if accept(room):
+                    found.append((math.hypot(room['location_x'] - x, room['location_y'] - y), room))
+            # Salas fora dos anéis já vistos estão a pelo menos radius/GRID_SIZE
+            if len(found) >= k:
+                kth = sorted(distance for distance, _ in found)[k - 1]
+                if radius / GRID_SIZE > round(kth, DISTANCE_DIGITS) + 10 ** -DISTANCE_DIGITS:
+                    break
+        if len(found) < k:
+            found.extend((None, room) for room in self.unplaced if accept(room))
+        return found
+
+
+def get_floor_key(room):
+    return room['building_id'], room['floor_name_id']
+
+
+class SpaceIndex:
+    """Salas ativas em memória, com um FloorIndex por andar"""
+
+    def __init__(self, rooms, versions):
+        self.versions = versions
+        self.rooms = {room['id']: room for room in rooms}
+        # Andar = (campus, planta); salas sem planta formam um andar por campus
+        by_floor = defaultdict(list)
+        for room in rooms:
+            by_floor[get_floor_key(room)].append(room)
+        self.floors = {key: FloorIndex(floor_rooms) for key, floor_rooms in by_floor.items()}
+        self.building_floors = defaultdict(set)
+        for key in self.floors:
+            self.building_floors[key[0]].add(key)
+
+    @classmethod
+    def build(cls, versions):
+        return cls(list(Space.objects.filter(is_active=True).values(*ROOM_FIELDS)), versions)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_space_index():
+    """Índice do processo, refeito quando salas, andares ou campi mudam"""
+    global _index
+    versions = get_versions(*VERSION_KEYS)
+    with _index_lock:
+        if _index is None or _index.versions != versions:
+            _index = SpaceIndex.build(versions)
+        return _index
+
+
+def suggest_alternatives(space_id, day, start, end, k=5, min_capacity=None):
+    """
+    Até k salas livres do mesmo tipo para a mesma janela, em ordem: mesmo
+    andar, depois outros andares do mesmo campus, depois outros campi; dentro
+    de cada grupo, menor distância na planta e então a capacidade mais justa.
+    Sem ?min_capacity, a capacidade da sala pedida é o mínimo. Retorna None
+    se a sala não existir (ou estiver inativa).
+    """
+    index = get_space_index()
+    origin = index.rooms.get(space_id)
+    if origin is None:
+        return None
+    required = origin['capacity'] if min_capacity is None else min_capacity
+
+    # Uma consulta: salas candidatas sem ocorrência na janela
+    free = set(exclude_occupied(
+        Space.objects.filter(is_active=True, space_type_id=origin['space_type_id'], capacity__gte=required),
+        day, start, end
+    ).exclude(pk=space_id).values_list('pk', flat=True))
+
+    def accept(room):
+        return room['id'] in free
+
+    x, y = origin['location_x'], origin['location_y']
+    floor = get_floor_key(origin)
+    ranked = []
+    for tier, floors in (
+        (0, [floor]),
+        (1, sorted(index.building_floors[origin['building_id']] - {floor}, key=str)),
+    ):
+        for key in floors:
+            for distance, room in index.floors[key].nearest(x, y, accept, k):
+                ranked.append((tier, distance, room))
+        if len(ranked) >= k:
+            break
+    else:
+        # Outros campi: a posição na planta não se compara, só a capacidade
+        ranked.extend(
+            (2, None, room) for room in index.rooms.values()
+            if room['building_id'] != origin['building_id'] and accept(room)
+        )
+
+    def sort_key(item):
+        tier, distance, room = item
+        rounded = math.inf if distance is None else round(distance, DISTANCE_DIGITS)
+        return tier, rounded, room['capacity'] - required, room['id']
+
+    return [
+        {
+            'id': room['id'],
+            'name': room['name'],
+            'building': room['building_id'],
+            'building_name': room['building__name'],
+            'floor_name': room['floor_name__name'],
+            'capacity': room['capacity'],
+            'location_x': room['location_x'],
+            'location_y': room['location_y'],
+            'same_floor': tier == 0,
+            'distance': None if distance is None else round(distance, DISTANCE_DIGITS + 2),
+        }
+        for tier, distance, room in sorted(ranked, key=sort_key)[:k]
+    ]
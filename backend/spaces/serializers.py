@@ -1,6 +1,14 @@
+import copy
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.contrib.auth import get_user_model
-from .models import Building, FloorPlan, Space, Reservation
+from django.urls import reverse
+from .models import (
+    Building, FloorPlan, Space, Reservation, ReservationSlot, Notification,
+    WEEKDAY_TIME_FIELDS, format_recurring_times, format_weekdays, validate_recurrence_span
+)
+from .images import get_srcset
+from .conflicts import ACTIVE_STATUSES, find_conflicts, format_conflicts
 
 class BuildingSerializer(serializers.ModelSerializer):
     class Meta:
@@ -8,17 +16,81 @@ class BuildingSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'address']
 
 class FloorPlanSerializer(serializers.ModelSerializer):
+    plan_srcset = serializers.SerializerMethodField()
+    plan_tiles = serializers.SerializerMethodField()
+
     class Meta:
         model = FloorPlan
-        fields = ['id', 'name', 'building', 'plan_image']
+        fields = ['id', 'name', 'building', 'plan_image', 'plan_srcset', 'plan_tiles']
+
+    def get_plan_srcset(self, obj):
+        """{'webp': 'url 200w, url 400w, ...', 'png': ...} gerado das variações da planta"""
+        if not obj.plan_image:
+            return {}
+        request = self.context.get('request')
+        return get_srcset(
+            obj.plan_variants,
+            obj.plan_image.storage,
+            request.build_absolute_uri if request else None
+        )
+
+    def get_plan_tiles(self, obj):
+        """
+        Pirâmide Deep Zoom: URL do descritor .dzi (OpenSeadragon e similares)
+        e modelo da URL dos tiles ({z}/{x}_{y}); None enquanto não gerada
+        """
+        tiles = obj.plan_tiles
+        if not tiles.get('complete'):
+            return None
+        request = self.context.get('request')
+        build_url = request.build_absolute_uri if request else (lambda url: url)
+        dzi_url = build_url(reverse('floor-plan-dzi', kwargs={'pk': obj.pk, 'digest': tiles['hash']}))
+        return {
+            'dzi': dzi_url,
+            'tiles': dzi_url.replace('plan.dzi', f"{{z}}/{{x}}_{{y}}.{tiles['format']}"),
+            'width': tiles['width'],
+            'height': tiles['height'],
+            'tile_size': tiles['tile_size'],
+            'max_level': tiles['max_level'],
+        }
+
+def get_fieldset(query_params, available):
+    """
+    Campos pedidos com ?fields= (apenas estes) ou ?omit= (todos menos estes),
+    na ordem de `available`. Sem nenhum dos dois, retorna None (todos).
+    """
+    fields = query_params.get('fields')
+    omit = query_params.get('omit')
+    if fields and omit:
+        raise serializers.ValidationError({'fields': 'Use ?fields= ou ?omit=, não os dois'})
+    param, value = ('fields', fields) if fields else ('omit', omit)
+    if not value:
+        return None
+
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    invalid = names.difference(available)
+    if invalid:
+        raise serializers.ValidationError({param: f"Campos inválidos: {', '.join(sorted(invalid))}"})
+    if param == 'fields':
+        return [name for name in available if name in names]
+    return [name for name in available if name not in names]
+
+class SparseFieldsetMixin:
+    """Aceita fields=[...] no construtor e descarta os demais campos do serializer"""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
-class SpaceSerializer(serializers.ModelSerializer):
+class SpaceSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     building_name = serializers.CharField(source='building.name', read_only=True)
     floor_name = serializers.CharField(source='floor_name.name', read_only=True)
 
     class Meta:
         model = Space
-        fields = ['id', 'name', 'building', 'building_name', 'floor_name', 'capacity']
+        fields = ['id', 'name', 'building', 'building_name', 'floor_name', 'capacity', 'location_x', 'location_y']
 
 class ReservationSerializer(serializers.ModelSerializer):
     space_name = serializers.CharField(source='space.name', read_only=True)
@@ -26,6 +98,24 @@ class ReservationSerializer(serializers.ModelSerializer):
     floor_name = serializers.SerializerMethodField(read_only=True)
     user_email = serializers.CharField(source='user.email', read_only=True)
     capacity = serializers.IntegerField(source='space.capacity', read_only=True)
+    # Recorrência no formato de sempre, guardada em recurring_weekdays e
+    # ReservationSlot (propriedades de compatibilidade do modelo)
+    recurring_days = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    recurring_times = serializers.JSONField(required=False, allow_null=True)
+    monday_start = serializers.TimeField(required=False, allow_null=True)
+    monday_end = serializers.TimeField(required=False, allow_null=True)
+    tuesday_start = serializers.TimeField(required=False, allow_null=True)
+    tuesday_end = serializers.TimeField(required=False, allow_null=True)
+    wednesday_start = serializers.TimeField(required=False, allow_null=True)
+    wednesday_end = serializers.TimeField(required=False, allow_null=True)
+    thursday_start = serializers.TimeField(required=False, allow_null=True)
+    thursday_end = serializers.TimeField(required=False, allow_null=True)
+    friday_start = serializers.TimeField(required=False, allow_null=True)
+    friday_end = serializers.TimeField(required=False, allow_null=True)
+    saturday_start = serializers.TimeField(required=False, allow_null=True)
+    saturday_end = serializers.TimeField(required=False, allow_null=True)
+    sunday_start = serializers.TimeField(required=False, allow_null=True)
+    sunday_end = serializers.TimeField(required=False, allow_null=True)
 
     class Meta:
         model = Reservation
@@ -53,6 +143,18 @@ class ReservationSerializer(serializers.ModelSerializer):
         # Apenas validar se o objeto está sendo criado (POST) ou atualizado completamente (PUT)
         if self.instance is not None:
             # Atualização (PUT ou PATCH) - não forçar validação de todos os campos
+            # Reservas recorrentes existentes não mudam de horário (ver
+            # Reservation.save): só a sala e o status podem criar um conflito,
+            # como ao reativar uma reserva cancelada
+            slot_fields = ('space', 'status') if self.instance.is_recurring else (
+                'space', 'date', 'start_time', 'end_time', 'status'
+            )
+            if any(field in data for field in slot_fields):
+                reservation = copy.copy(self.instance)
+                for field, value in data.items():
+                    if field in slot_fields or not self.instance.is_recurring:
+                        setattr(reservation, field, value)
+                self.validate_conflicts(reservation)
             return data
         
         # Validação para criação (POST)
@@ -64,6 +166,10 @@ class ReservationSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("recurring_start_date é obrigatório")
             if not data.get('recurring_end_date'):
                 raise serializers.ValidationError("recurring_end_date é obrigatório")
+            try:
+                validate_recurrence_span(data['recurring_start_date'], data['recurring_end_date'])
+            except DjangoValidationError as e:
+                raise serializers.ValidationError({'recurring_end_date': e.messages})
         else:
             # Se não for recorrente, validar data e horários
             if not data.get('date'):
@@ -72,9 +178,23 @@ class ReservationSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("start_time é obrigatório")
             if not data.get('end_time'):
                 raise serializers.ValidationError("end_time é obrigatório")
-        
+
+        self.validate_conflicts(Reservation(**data))
         return data
 
+    def validate_conflicts(self, reservation):
+        """Rejeita reservas que se sobrepõem a outra reserva ativa da mesma sala"""
+        # O endpoint de lote verifica conflitos de todos os itens de uma vez
+        if not self.context.get('check_conflicts', True):
+            return
+        if reservation.status not in ACTIVE_STATUSES:
+            return
+        conflicts = find_conflicts(reservation)
+        if conflicts:
+            # A view usa a reserva para sugerir salas livres no mesmo horário
+            self.conflicting_reservation = reservation
+            raise serializers.ValidationError(format_conflicts(conflicts))
+
     def to_representation(self, instance):
         data = super().to_representation(instance)
         
@@ -96,6 +216,131 @@ class ReservationSerializer(serializers.ModelSerializer):
             
         return data
 
+def _isoformat(value):
+    return None if value is None else value.isoformat()
+
+def _clock(value):
+    return None if value is None else value.strftime('%H:%M:%S')
+
+def _floor_name(value):
+    return 'N/A' if value is None else value
+
+def _slot_time(weekday, index):
+    def formatter(slot_times):
+        value = slot_times.get(weekday, (None, None))[index]
+        return None if value is None else value.isoformat()
+    return formatter
+
+# Colunas calculadas a partir dos ReservationSlot da linha
+SLOTS = object()
+
+class ReservationRowSerializer:
+    """
+    Caminho rápido, somente leitura, das listagens de reservas. As linhas vêm
+    de values_list (sem instâncias de modelo nem campos do DRF) e cada coluna
+    tem uma formatação fixa. A saída é idêntica à do ReservationSerializer,
+    campo a campo e na mesma ordem: ao mudar um, mude o outro
+    (ReservationRowSerializerTests compara os dois).
+
+    Com `fields`, só as colunas (e junções) desses campos entram no SELECT.
+    """
+    # (campo na resposta, campo no banco, formatação; None = valor como está)
+    COLUMNS = [
+        ('id', 'id', None),
+        ('space', 'space_id', None),
+        ('space_name', 'space__name', None),
+        ('building_name', 'space__building__name', None),
+        ('floor_name', 'space__floor_name__name', _floor_name),
+        ('date', 'date', _isoformat),
+        ('start_time', 'start_time', _clock),
+        ('end_time', 'end_time', _clock),
+        ('description', 'description', None),
+        ('status', 'status', None),
+        ('user_email', 'user__email', None),
+        ('user', 'user_id', None),
+        ('capacity', 'space__capacity', None),
+        ('is_recurring', 'is_recurring', None),
+        ('recurring_days', 'recurring_weekdays', format_weekdays),
+        ('recurring_start_date', 'recurring_start_date', _isoformat),
+        ('recurring_end_date', 'recurring_end_date', _isoformat),
+        ('recurring_times', SLOTS, format_recurring_times),
+        ('phone', 'phone', None),
+        ('course', 'course', None),
+    ] + [
+        (field, SLOTS, _slot_time(weekday, index))
+        for weekday, fields in enumerate(WEEKDAY_TIME_FIELDS)
+        for index, field in enumerate(fields)
+    ]
+    FIELDS = [name for name, _, _ in COLUMNS]
+
+    def __init__(self, fields=None):
+        self.columns = [column for column in self.COLUMNS if fields is None or column[0] in fields]
+        self.uses_slots = any(lookup is SLOTS for _, lookup, _ in self.columns)
+
+    def project(self, queryset, extra=()):
+        """
+        Troca o queryset por tuplas nomeadas com as colunas da resposta.
+        `extra` acrescenta colunas que não vão para a resposta, como os
+        campos do cursor da paginação (id, date, start_time).
+        """
+        lookups = [lookup for _, lookup, _ in self.columns if lookup is not SLOTS]
+        if self.uses_slots:
+            extra = [*extra, 'id']
+        lookups += [lookup for lookup in extra if lookup not in lookups]
+        return queryset.values_list(*lookups, named=True)
+
+    def get_slots(self, rows):
+        """Horários por dia das reservas da página (uma consulta)"""
+        return ReservationSlot.objects.filter(
+            reservation_id__in=[row.id for row in rows]
+        ).values_list('reservation_id', 'weekday', 'start_time', 'end_time')
+
+    @staticmethod
+    def group_slots(slots):
+        slot_times = {}
+        for reservation_id, weekday, start, end in slots:
+            slot_times.setdefault(reservation_id, {})[weekday] = (start, end)
+        return slot_times
+
+    def serialize(self, rows):
+        rows = list(rows)
+        slot_times = self.group_slots(self.get_slots(rows)) if self.uses_slots and rows else {}
+        return self.build_rows(rows, slot_times)
+
+    async def aserialize(self, rows):
+        """Versão assíncrona, para as views async (ver async_api.py)"""
+        slot_times = {}
+        if self.uses_slots and rows:
+            slot_times = self.group_slots([slot async for slot in self.get_slots(rows)])
+        return self.build_rows(rows, slot_times)
+
+    def build_rows(self, rows, slot_times):
+        # Posição de cada coluna na tupla; as colunas extras ficam no fim e
+        # as calculadas recebem os horários da linha
+        columns, position = [], 0
+        for name, lookup, formatter in self.columns:
+            if lookup is SLOTS:
+                columns.append((name, None, formatter))
+            else:
+                columns.append((name, position, formatter))
+                position += 1
+        return [
+            {
+                name: (
+                    formatter(slot_times.get(row.id, {})) if position is None
+                    else row[position] if formatter is None
+                    else formatter(row[position])
+                )
+                for name, position, formatter in columns
+            }
+            for row in rows
+        ]
+
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ['id', 'title', 'message', 'created_at', 'read']
+
 class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = get_user_model()
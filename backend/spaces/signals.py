@@ -0,0 +1,105 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token, invalidate_user_tokens
+from .events import build_reservation_event, get_broker, space_channel
+from .models import Building, FloorPlan, Notification, Reservation, Space
+from .notifications import notify_new_reservations, notify_status_changes, recount_unread
+from .versioning import bump_version
+
+# Chave de versão de cada modelo do catálogo (campus, andares e salas)
+CATALOG_VERSION_KEYS = {
+    Building: 'model:building',
+    FloorPlan: 'model:floorplan',
+    Space: 'model:space',
+}
+
+
+def bump_reservation_versions(space_id, user_id):
+    """Invalida os feeds da sala e do usuário de uma reserva"""
+    transaction.on_commit(lambda: bump_version(f'reservations:space:{space_id}'))
+    transaction.on_commit(lambda: bump_version(f'reservations:user:{user_id}'))
+
+
+def publish_reservation_event(reservation, action):
+    """Avisa as conexões abertas em /api/spaces/<pk>/events/ após o commit"""
+    channel = space_channel(reservation.space_id)
+    event = build_reservation_event(reservation, action)
+    transaction.on_commit(lambda: get_broker().publish(channel, event))
+
+
+def get_previous_state(instance):
+    """Cópia da reserva com os valores lidos do banco (antes deste save)"""
+    previous = copy.copy(instance)
+    for name, value in instance._loaded_values.items():
+        setattr(previous, name, value)
+    return previous
+
+
+@receiver(post_save, sender=Reservation)
+def reservation_saved(sender, instance, created, **kwargs):
+    bump_reservation_versions(instance.space_id, instance.user_id)
+    publish_reservation_event(instance, 'created' if created else 'updated')
+
+    # Reservation.save atualiza _loaded_values depois dos sinais
+    if not created and instance._loaded_values:
+        previous = get_previous_state(instance)
+        if (previous.space_id, previous.user_id) != (instance.space_id, instance.user_id):
+            bump_reservation_versions(previous.space_id, previous.user_id)
+        if previous.space_id != instance.space_id:
+            # Trocou de sala: para quem acompanha a sala anterior, a reserva saiu
+            publish_reservation_event(previous, 'deleted')
+
+    previous_status = (instance._loaded_values or {}).get('status')
+    if created:
+        notify_new_reservations([instance])
+    elif previous_status and previous_status != instance.status:
+        notify_status_changes([instance])
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs):
+    bump_reservation_versions(instance.space_id, instance.user_id)
+    publish_reservation_event(instance, 'deleted')
+
+
+@receiver([post_save, post_delete], sender=Building)
+@receiver([post_save, post_delete], sender=FloorPlan)
+@receiver([post_save, post_delete], sender=Space)
+def catalog_changed(sender, instance, **kwargs):
+    key = CATALOG_VERSION_KEYS[sender]
+    transaction.on_commit(lambda: bump_version(key))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    key = instance.key
+    transaction.on_commit(lambda: invalidate_token(key))
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    # Cobre alterações de perfil e desativação (is_active=False)
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_user_tokens(user_id))
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, **kwargs):
+    # Só edições linha a linha (admin); a API atualiza os contadores direto
+    recount_unread([instance.user_id])
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, origin=None, **kwargs):
+    # Exclusão do próprio usuário: o contador também é apagado (CASCADE)
+    if isinstance(origin, get_user_model()):
+        return
+    recount_unread([instance.user_id], create=False)
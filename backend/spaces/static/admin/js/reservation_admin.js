@@ -41,3 +41,15 @@ django.jQuery(document).ready(function($) {
         toggleRecurringFields();
     }, 100);
 });
+
+// Filtros com busca da listagem: o select só entra no formulário de busca
+// com um item escolhido (vazio, o admin recusaria o filtro)
+django.jQuery(function($) {
+    $('select.autocomplete-filter').on('change', function() {
+        if (this.value) {
+            this.name = this.dataset.lookup;
+        } else {
+            this.removeAttribute('name');
+        }
+    }).trigger('change');
+});
@@ -1,4 +1,5 @@
 from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
 
 register = template.Library()
 
@@ -8,4 +9,33 @@ def length_is(value, arg):
     try:
         return len(value) == int(arg)
     except (ValueError, TypeError):
-        return False
\ No newline at end of file
+        return False
+
+
+@register.inclusion_tag('admin/date_hierarchy.html')
+def indexed_date_hierarchy(cl):
+    """
+    date_hierarchy do admin sem o SELECT DISTINCT dos anos na tabela inteira:
+    no primeiro nível, os anos vão da primeira à última data (duas leituras
+    pelo índice), mesmo que algum ano no meio não tenha registros
+    """
+    field_name = cl.date_hierarchy
+    if any(cl.params.get(f'{field_name}__{part}') for part in ('year', 'month', 'day')):
+        return date_hierarchy(cl)
+
+    dates = cl.queryset.values_list(field_name, flat=True)
+    first = dates.order_by(field_name).first()
+    last = dates.order_by(f'-{field_name}').first()
+    if first is not None and first.year == last.year:
+        return date_hierarchy(cl)
+
+    years = range(first.year, last.year + 1) if first is not None else ()
+    year_field = f'{field_name}__year'
+    return {
+        'show': True,
+        'back': None,
+        'choices': [
+            {'link': cl.get_query_string({year_field: str(year)}, [f'{field_name}__']), 'title': str(year)}
+            for year in years
+        ],
+    }
@@ -1,3 +1,2108 @@
-from django.test import TestCase
+import asyncio
+import csv
+import json
+import re
+import shutil
+import tempfile
+import threading
+import zipfile
+from datetime import date, time, timedelta
+from io import BytesIO, StringIO
+from time import perf_counter
+from unittest import mock, skipUnless
+from xml.etree import ElementTree
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Max
+from django.db.migrations.executor import MigrationExecutor
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APITestCase
+
+from .authentication import CachedTokenAuthentication, token_cache_key
+from .events import get_broker, space_channel
+from .forms import ReservationAdminForm
+from .models import (
+    Building, FloorPlan, Space, SpaceType, Reservation, ReservationOccurrence, ReservationSlot,
+    Notification, NotificationCounter
+)
+from .notifications import notify
+from .pagination import EstimatedCountPaginator
+from .serializers import ReservationRowSerializer, ReservationSerializer
+from .tiles import get_level_size, to_level_pixels
+from .versioning import get_versions
+from .views import ReservationViewSet, get_reservation_queryset
+
+
+class SpacesTestMixin:
+    """Cria campus, andar, sala e usuário autenticado usados pelos testes"""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        User = get_user_model()
+        self.user = User.objects.create_user(
+            username='professor',
+            email='professor@cesmac.edu.br',
+            password='senha-segura-123'
+        )
+        self.building = Building.objects.create(name='Campus I')
+        self.space_type = SpaceType.objects.create(name='Sala de Aula')
+        # Arquivo inexistente: plan_variants preenchido evita gerar variações
+        self.floor = FloorPlan.objects.create(
+            building=self.building,
+            name='Térreo',
+            plan_image='floor_plans/terreo.png',
+            plan_variants={'source': 'floor_plans/terreo.png'}
+        )
+        self.space = Space.objects.create(
+            name='Sala 101',
+            building=self.building,
+            space_type=self.space_type,
+            floor_name=self.floor,
+            capacity=40
+        )
+        if isinstance(self, APITestCase):
+            token = Token.objects.create(user=self.user)
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def make_reservation(self, **kwargs):
+        data = {
+            'space': self.space,
+            'user': self.user,
+            'date': date(2026, 3, 2),
+            'start_time': time(8, 0),
+            'end_time': time(10, 0),
+            'status': 'confirmado',
+        }
+        data.update(kwargs)
+        return Reservation.objects.create(**data)
+
+
+class ReservationOccurrencesTests(SpacesTestMixin, TestCase):
+    def test_single_reservation_has_one_occurrence(self):
+        reservation = self.make_reservation()
+        self.assertEqual(
+            list(reservation.iter_occurrences()),
+            [(date(2026, 3, 2), time(8, 0), time(10, 0))]
+        )
+
+    def test_recurring_reservation_accepts_both_day_codes(self):
+        reservation = self.make_reservation(
+            is_recurring=True,
+            recurring_days='seg,2',
+            recurring_start_date=date(2026, 3, 1),
+            recurring_end_date=date(2026, 3, 14),
+            recurring_times={'seg': {'start': '19:00', 'end': '21:00'}},
+        )
+        self.assertEqual(list(reservation.iter_occurrences()), [
+            (date(2026, 3, 2), time(19, 0), time(21, 0)),
+            (date(2026, 3, 4), time(8, 0), time(10, 0)),
+            (date(2026, 3, 9), time(19, 0), time(21, 0)),
+            (date(2026, 3, 11), time(8, 0), time(10, 0)),
+        ])
+
+
+class SpaceCalendarTests(SpacesTestMixin, APITestCase):
+    def get_calendar(self, **params):
+        url = reverse('space-calendar', args=[self.space.pk])
+        return self.client.get(url, {'month': '2026-03', **params})
+
+    def test_month_statuses(self):
+        self.make_reservation(date=date(2026, 3, 3))
+        self.make_reservation(
+            date=date(2026, 3, 1),
+            is_recurring=True,
+            recurring_days='qua',
+            recurring_start_date=date(2026, 3, 1),
+            recurring_end_date=date(2026, 3, 31),
+        )
+        self.make_reservation(date=date(2026, 3, 5), status='pending')
+
+        with self.assertNumQueries(2):  # token (1) + reservas (1)
+            response = self.get_calendar()
+
+        self.assertEqual(response.status_code, 200)
+        days = {day['date']: day for day in response.data['days']}
+        self.assertEqual(len(days), 31)
+        self.assertEqual(days['2026-03-03']['status'], 'ocupado')
+        self.assertEqual(days['2026-03-04']['status'], 'ocupado-recorrente')
+        self.assertEqual(days['2026-03-25']['status'], 'ocupado-recorrente')
+        self.assertEqual(days['2026-03-05']['status'], 'disponivel')
+        self.assertEqual(days['2026-03-03']['reservations'][0]['user_name'], 'professor')
+        self.assertEqual(days['2026-03-03']['reservations'][0]['start_time'], '08:00')
+
+    def test_period_filters_by_time(self):
+        self.make_reservation(date=date(2026, 3, 3))
+        response = self.get_calendar(period='noturno')
+        days = {day['date']: day for day in response.data['days']}
+        self.assertEqual(days['2026-03-03']['status'], 'disponivel')
+
+    def test_invalid_month(self):
+        response = self.get_calendar(month='03/2026')
+        self.assertEqual(response.status_code, 400)
+
+
+class ReservationOccurrenceTableTests(SpacesTestMixin, TestCase):
+    def make_recurring(self, **kwargs):
+        return self.make_reservation(
+            is_recurring=True,
+            recurring_days='seg,qua',
+            recurring_start_date=date(2026, 3, 1),
+            recurring_end_date=date(2026, 3, 31),
+            **kwargs
+        )
+
+    def test_save_generates_occurrences(self):
+        reservation = self.make_recurring()
+        self.assertEqual(reservation.occurrences.count(), 9)
+        self.assertEqual(
+            set(reservation.occurrences.values_list('space_id', flat=True)),
+            {self.space.pk}
+        )
+
+    def test_status_change_updates_occurrences(self):
+        reservation = self.make_recurring()
+        reservation.status = 'canceled'
+        reservation.save()
+        self.assertEqual(reservation.occurrences.count(), 9)
+        self.assertFalse(reservation.occurrences.exclude(status='canceled').exists())
+
+    def test_delete_removes_occurrences(self):
+        reservation = self.make_recurring()
+        reservation.delete()
+        self.assertFalse(ReservationOccurrence.objects.exists())
+
+    def test_backfill_command(self):
+        self.make_recurring()
+        self.make_reservation()
+        ReservationOccurrence.objects.all().delete()
+
+        call_command('backfill_occurrences', stdout=StringIO())
+
+        self.assertEqual(ReservationOccurrence.objects.count(), 10)
+
+
+class ReservationConflictTests(SpacesTestMixin, APITestCase):
+    url = '/api/reservations/'
+
+    def post_single(self, day='2026-03-02', start='09:00', end='11:00'):
+        return self.client.post(self.url, {
+            'space': self.space.pk,
+            'date': day,
+            'start_time': start,
+            'end_time': end,
+        }, format='json')
+
+    def post_recurring(self, days='seg', start='09:00', end='11:00'):
+        return self.client.post(self.url, {
+            'space': self.space.pk,
+            'is_recurring': True,
+            'recurring_days': days,
+            'recurring_start_date': '2026-03-01',
+            'recurring_end_date': '2026-06-30',
+            'recurring_times': {days: {'start': start, 'end': end}},
+            'date': '2026-03-01',
+            'start_time': start,
+            'end_time': end,
+        }, format='json')
+
+    def test_single_vs_single(self):
+        self.make_reservation()  # 02/03/2026 08:00-10:00
+        self.assertEqual(self.post_single().status_code, 400)
+        self.assertEqual(self.post_single(start='10:00', end='12:00').status_code, 201)
+
+    def test_canceled_reservations_do_not_conflict(self):
+        self.make_reservation(status='canceled')
+        self.assertEqual(self.post_single().status_code, 201)
+
+    def test_single_vs_recurring(self):
+        self.assertEqual(self.post_recurring().status_code, 201)
+        response = self.post_single(day='2026-05-18')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('18/05/2026', str(response.data))
+        self.assertEqual(self.post_single(day='2026-05-19').status_code, 201)
+
+    def test_recurring_vs_recurring(self):
+        self.make_reservation(
+            date=date(2026, 6, 1),
+            is_recurring=True,
+            recurring_days='0',
+            recurring_start_date=date(2026, 6, 1),
+            recurring_end_date=date(2026, 6, 30),
+        )
+        self.assertEqual(self.post_recurring(days='ter').status_code, 201)
+        self.assertEqual(self.post_recurring(days='seg').status_code, 400)
+
+    def test_update_into_conflict(self):
+        self.make_reservation()
+        other = self.make_reservation(start_time=time(14, 0), end_time=time(15, 0))
+        response = self.client.patch(f'{self.url}{other.pk}/', {'start_time': '09:00'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_reactivating_recurring_into_conflict(self):
+        recurring = self.make_reservation(
+            is_recurring=True,
+            recurring_days='seg',
+            recurring_start_date=date(2026, 3, 1),
+            recurring_end_date=date(2026, 3, 31),
+            status='canceled',
+        )
+        self.make_reservation(date=date(2026, 3, 16))  # segunda, 08:00-10:00
+        response = self.client.patch(f'{self.url}{recurring.pk}/', {'status': 'confirmado'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('16/03/2026', str(response.data))
+        recurring.refresh_from_db()
+        self.assertEqual(recurring.status, 'canceled')
+
+
+class ReservationConcurrencyTests(SpacesTestMixin, TransactionTestCase):
+    def test_parallel_creates_for_same_slot(self):
+        token = Token.objects.create(user=self.user)
+        payload = {
+            'space': self.space.pk,
+            'date': '2026-03-02',
+            'start_time': '09:00',
+            'end_time': '11:00',
+        }
+        barrier = threading.Barrier(6)
+        results = []
+
+        def create():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+            try:
+                barrier.wait()
+                results.append(client.post('/api/reservations/', payload, format='json').status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=create) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), [201, 400, 400, 400, 400, 400])
+        self.assertEqual(Reservation.objects.count(), 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN é específico do SQLite')
+class QueryPlanTests(SpacesTestMixin, APITestCase):
+    """Garante que as consultas mais frequentes usam índices, sem varredura completa"""
+
+    tables = ('spaces_reservation', 'spaces_reservationoccurrence', 'spaces_space')
+
+    def setUp(self):
+        super().setUp()
+        self.make_reservation()
+        self.make_reservation(
+            is_recurring=True,
+            recurring_days='seg',
+            recurring_start_date=date(2026, 3, 1),
+            recurring_end_date=date(2026, 3, 31),
+            start_time=time(14, 0),
+            end_time=time(16, 0),
+        )
+
+    def assertNoFullScan(self, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+
+        queries = [query['sql'] for query in context.captured_queries
+                   if any(table in query['sql'] for table in self.tables)]
+        self.assertTrue(queries)
+        with connection.cursor() as cursor:
+            for sql in queries:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+                for step in plan:
+                    is_full_scan = (
+                        step.startswith('SCAN ') and 'INDEX' not in step
+                        and step.split()[1] in self.tables
+                    )
+                    self.assertFalse(is_full_scan, f'{step}\n{sql}')
+
+    def test_space_availability(self):
+        self.assertNoFullScan(f'/api/spaces/{self.space.pk}/availability/', {'date': '2026-03-02'})
+
+    def test_space_calendar(self):
+        self.assertNoFullScan(f'/api/spaces/{self.space.pk}/calendar/', {'month': '2026-03'})
+
+    def test_user_reservations(self):
+        self.assertNoFullScan('/api/reservations/')
+
+    def test_all_reservations_for_space(self):
+        self.assertNoFullScan('/api/reservations/all_reservations/', {'space': self.space.pk})
+
+    def test_spaces_by_floor(self):
+        self.assertNoFullScan('/api/spaces/', {'building': self.building.pk, 'floor': self.floor.pk})
+
+
+class ReservationListingTests(SpacesTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        for day in range(1, 8):
+            self.make_reservation(date=date(2026, 3, day), start_time=time(8, 0), end_time=time(9, 0))
+            self.make_reservation(date=date(2026, 3, day), start_time=time(10, 0), end_time=time(11, 0))
+
+    def collect(self, url, params):
+        rows, pages = [], 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            rows.extend(data['results'])
+            pages += 1
+            if not data['next']:
+                return rows, pages
+            response = self.client.get(data['next'])
+
+    def test_cursor_walks_every_row_once(self):
+        rows, pages = self.collect('/api/reservations/', {'page_size': 4})
+        self.assertEqual(pages, 4)
+        self.assertEqual(len({row['id'] for row in rows}), 14)
+        keys = [(row['date'], row['start_time'], row['id']) for row in rows]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/reservations/', {'cursor': 'invalido'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_date_window_includes_overlapping_recurrences(self):
+        recurring = self.make_reservation(
+            date=date(2026, 2, 1),
+            is_recurring=True,
+            recurring_days='sex',
+            recurring_start_date=date(2026, 2, 1),
+            recurring_end_date=date(2026, 3, 31),
+            start_time=time(19, 0),
+            end_time=time(21, 0),
+        )
+        self.make_reservation(
+            date=date(2026, 1, 1),
+            is_recurring=True,
+            recurring_days='sex',
+            recurring_start_date=date(2026, 1, 1),
+            recurring_end_date=date(2026, 1, 31),
+            start_time=time(19, 0),
+            end_time=time(21, 0),
+        )
+        rows, _ = self.collect('/api/reservations/all_reservations/', {
+            'space': self.space.pk,
+            'date_from': '2026-03-02',
+            'date_to': '2026-03-03',
+        })
+        ids = {row['id'] for row in rows}
+        self.assertEqual(len(ids), 5)
+        self.assertIn(recurring.pk, ids)
+
+    def test_status_and_building_filters(self):
+        self.make_reservation(date=date(2026, 3, 9), status='canceled')
+        rows, _ = self.collect('/api/reservations/', {'status': 'canceled', 'building': self.building.pk})
+        self.assertEqual(len(rows), 1)
+        response = self.client.get('/api/reservations/', {'status': 'invalido'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ReservationBatchTests(SpacesTestMixin, APITestCase):
+    url = '/api/reservations/batch/'
+
+    def item(self, day, start='09:00', end='11:00'):
+        return {'space': self.space.pk, 'date': day, 'start_time': start, 'end_time': end}
+
+    def test_creates_valid_items_and_reports_conflicts(self):
+        self.make_reservation(date=date(2026, 3, 4))  # 08:00-10:00
+        items = [
+            self.item('2026-03-02'),
+            self.item('2026-03-04'),                  # conflita com o banco
+            self.item('2026-03-02', '10:00', '12:00'),  # conflita com o primeiro item
+            self.item('2026-03-06'),
+            {'space': self.space.pk},                 # inválido
+        ]
+        response = self.client.post(self.url, {'reservations': items}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, ['created', 'error', 'error', 'created', 'error'])
+        self.assertEqual(response.data['results'][0]['reservation']['status'], 'pending')
+        self.assertEqual(Reservation.objects.filter(status='pending').count(), 2)
+        self.assertEqual(ReservationOccurrence.objects.filter(status='pending').count(), 2)
+
+    def test_recurring_items_get_occurrences(self):
+        item = {
+            'space': self.space.pk,
+            'is_recurring': True,
+            'recurring_days': 'seg',
+            'recurring_start_date': '2026-03-01',
+            'recurring_end_date': '2026-03-31',
+            'date': '2026-03-01',
+            'start_time': '19:00',
+            'end_time': '21:00',
+        }
+        response = self.client.post(self.url, [item], format='json')
+        self.assertEqual(response.status_code, 201)
+        reservation = Reservation.objects.get()
+        self.assertEqual(reservation.recurring_times, {'seg': {'start': '19:00', 'end': '21:00'}})
+        self.assertEqual(reservation.occurrences.count(), 5)
+
+    def test_batch_size_limit(self):
+        items = [self.item('2026-03-02')] * 51
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ReservationExportTests(SpacesTestMixin, APITestCase):
+    url = '/api/reservations/export/'
+
+    def setUp(self):
+        super().setUp()
+        self.make_reservation(description='Aula, "prática"')
+        self.make_reservation(
+            date=date(2026, 3, 1),
+            is_recurring=True,
+            recurring_days='seg',
+            recurring_start_date=date(2026, 3, 1),
+            recurring_end_date=date(2026, 3, 31),
+            start_time=time(19, 0),
+            end_time=time(21, 0),
+        )
+
+    def read_csv(self, response):
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return list(csv.reader(StringIO(content)))
+
+    def test_csv(self):
+        rows = self.read_csv(self.client.get(self.url))
+        self.assertEqual(rows[0][0], 'ID')
+        self.assertEqual(len(rows), 3)
+        self.assertIn('Aula, "prática"', rows[1] + rows[2])
+
+    def test_csv_expands_recurring(self):
+        rows = self.read_csv(self.client.get(self.url, {'expand': '1'}))
+        self.assertEqual(len(rows), 1 + 1 + 5)
+
+    def test_csv_applies_list_filters(self):
+        rows = self.read_csv(self.client.get(self.url, {'date_from': '2026-03-03'}))
+        self.assertEqual(len(rows), 2)
+
+    def test_expanded_rows_respect_date_window(self):
+        rows = self.read_csv(self.client.get(
+            self.url, {'expand': '1', 'date_from': '2026-03-01', 'date_to': '2026-03-10'}
+        ))
+        self.assertEqual([row[5] for row in rows[1:]], ['2026-03-02', '2026-03-02', '2026-03-09'])
+
+    def test_formulas_are_exported_as_text(self):
+        Reservation.objects.update(description='=HYPERLINK("http://exemplo.com")', phone='+55 82 99999-0000')
+        rows = self.read_csv(self.client.get(self.url))
+        self.assertEqual(rows[1][-1], '\'=HYPERLINK("http://exemplo.com")')
+        self.assertEqual(rows[1][-3], "'+55 82 99999-0000")
+
+        response = self.client.get(self.url, {'type': 'xlsx'})
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertIn("'=HYPERLINK(", archive.read('xl/worksheets/sheet1.xml').decode())
+
+    def test_xlsx(self):
+        response = self.client.get(self.url, {'type': 'xlsx'})
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        namespace = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+        self.assertEqual(len(sheet.findall(f'{namespace}sheetData/{namespace}row')), 3)
+
+    def test_invalid_type(self):
+        self.assertEqual(self.client.get(self.url, {'type': 'pdf'}).status_code, 400)
+
+
+class CalendarFeedTests(SpacesTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        today = timezone.localdate()
+        self.single = self.make_reservation(date=today, description='Aula; revisão, prova')
+        self.recurring = self.make_reservation(
+            date=today,
+            is_recurring=True,
+            recurring_days='seg,qua,sex',
+            recurring_start_date=today,
+            recurring_end_date=today + timedelta(days=60),
+            recurring_times={
+                'seg': {'start': '19:00', 'end': '21:00'},
+                'qua': {'start': '19:00', 'end': '21:00'},
+                'sex': {'start': '08:00', 'end': '10:00'},
+            },
+        )
+        self.space_url = f'/api/spaces/{self.space.pk}/calendar.ics'
+
+    def test_space_feed_uses_rrule(self):
+        response = self.client.get(self.space_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        content = response.content.decode()
+        self.assertEqual(content.count('BEGIN:VEVENT'), 3)
+        self.assertIn('RRULE:FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=', content)
+        self.assertIn('RRULE:FREQ=WEEKLY;BYDAY=FR;UNTIL=', content)
+        self.assertIn('Aula\\; revisão\\, prova', content)
+
+    def test_unchanged_feed_answers_304_without_reservation_queries(self):
+        response = self.client.get(self.space_url)
+        with CaptureQueriesContext(connection) as context:
+            cached = self.client.get(self.space_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertFalse([q for q in context.captured_queries if 'spaces_reservation' in q['sql']])
+
+    def test_etag_changes_when_reservation_changes(self):
+        etag = self.client.get(self.space_url)['ETag']
+        self.single.status = 'canceled'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.single.save()
+        response = self.client.get(self.space_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content.decode().count('BEGIN:VEVENT'), 2)
+
+    def test_user_feed_with_query_token(self):
+        token = Token.objects.get(user=self.user)
+        self.client.credentials()
+        response = self.client.get('/api/users/me/calendar.ics', {'token': token.key})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/users/me/calendar.ics').status_code, 401)
+
+
+class CatalogConditionalGetTests(SpacesTestMixin, APITestCase):
+    def test_unchanged_catalog_answers_304_before_querying(self):
+        urls = [
+            '/api/buildings/',
+            f'/api/buildings/{self.building.pk}/floors/',
+            f'/api/spaces/?building={self.building.pk}&floor={self.floor.pk}',
+        ]
+        for url in urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('Last-Modified', response)
+            with self.assertNumQueries(0):  # o token também vem do cache
+                cached = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(cached.status_code, 304)
+
+    def test_query_string_is_part_of_the_etag(self):
+        building = f'building={self.building.pk}'
+        etags = {
+            query: self.client.get(f'/api/spaces/?{query}')['ETag']
+            for query in ('', building, f'{building}&fields=id', f'fields=id&{building}')
+        }
+        self.assertEqual(len(set(etags.values())), 3)
+        self.assertEqual(etags[f'{building}&fields=id'], etags[f'fields=id&{building}'])
+
+        response = self.client.get('/api/spaces/?fields=id', HTTP_IF_NONE_MATCH=etags[building])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Authorization', response['Vary'])
+
+    def test_space_change_invalidates_space_list(self):
+        url = f'/api/spaces/?building={self.building.pk}'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get('/api/buildings/')['ETag'], self.client.get('/api/buildings/')['ETag'])
+
+        self.space.capacity = 50
+        with self.captureOnCommitCallbacks(execute=True):
+            self.space.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['capacity'], 50)
+
+
+class CampusCatalogTests(SpacesTestMixin, APITestCase):
+    def test_nested_tree(self):
+        Space.objects.create(name='Sala Inativa', building=self.building, floor_name=self.floor,
+                             space_type=self.space_type, capacity=10, is_active=False)
+        Space.objects.create(name='Auditório', building=self.building,
+                             space_type=self.space_type, capacity=200)
+
+        response = self.client.get('/api/catalog/')
+        self.assertEqual(response.status_code, 200)
+        catalog = json.loads(response.content)
+        self.assertEqual(len(catalog), 1)
+        building = catalog[0]
+        self.assertEqual(building['name'], 'Campus I')
+        self.assertEqual([floor['name'] for floor in building['floors']], ['Térreo'])
+        self.assertEqual([space['name'] for space in building['floors'][0]['spaces']], ['Sala 101'])
+        self.assertEqual([space['name'] for space in building['spaces_without_floor']], ['Auditório'])
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'api.cesmac.edu.br'])
+    def test_floor_urls_match_floor_list(self):
+        self.floor.plan_image = 'floor_plans/andar.png'
+        self.floor.save()
+        catalog = json.loads(self.client.get('/api/catalog/').content)
+        floor = self.client.get(f'/api/buildings/{self.building.pk}/floors/').data[0]
+        self.assertTrue(floor['plan_image'].startswith('http://testserver/'))
+        self.assertEqual(catalog[0]['floors'][0]['plan_image'], floor['plan_image'])
+
+        # Outro endereço do servidor não recebe a cópia do primeiro
+        catalog = json.loads(self.client.get('/api/catalog/', SERVER_NAME='api.cesmac.edu.br').content)
+        self.assertTrue(catalog[0]['floors'][0]['plan_image'].startswith('http://api.cesmac.edu.br/'))
+
+    def test_query_count(self):
+        self.client.get('/api/users/profile/')
+        # Prédios + andares + salas; depois, catálogo e token vêm do cache
+        with self.assertNumQueries(3):
+            self.assertEqual(self.client.get('/api/catalog/').status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/catalog/').status_code, 200)
+
+    def test_save_and_delete_invalidate_cached_tree(self):
+        etag = self.client.get('/api/catalog/')['ETag']
+        self.assertEqual(self.client.get('/api/catalog/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.space.name = 'Sala 102'
+            self.space.save()
+        catalog = json.loads(self.client.get('/api/catalog/').content)
+        self.assertEqual(catalog[0]['floors'][0]['spaces'][0]['name'], 'Sala 102')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.space.delete()
+        catalog = json.loads(self.client.get('/api/catalog/').content)
+        self.assertEqual(catalog[0]['floors'][0]['spaces'], [])
+
+
+@tag('benchmark')
+class CampusCatalogBenchmarkTests(SpacesTestMixin, APITestCase):
+    """Catálogo com 5 campi × 6 andares × 30 salas: as consultas não crescem"""
+
+    def setUp(self):
+        super().setUp()
+        spaces = []
+        for building_number in range(5):
+            building = Building.objects.create(name=f'Campus {building_number + 2}')
+            for floor_number in range(6):
+                floor = FloorPlan.objects.create(
+                    building=building,
+                    name=f'{floor_number}º andar',
+                    plan_image='floor_plans/andar.png',
+                    plan_variants={'source': 'floor_plans/andar.png'}
+                )
+                spaces.extend(
+                    Space(name=f'Sala {floor_number}{room:02d}', building=building, floor_name=floor,
+                          space_type=self.space_type, capacity=40)
+                    for room in range(30)
+                )
+        Space.objects.bulk_create(spaces)
+
+    def test_cold_path(self):
+        # Token + prédios + andares + salas
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/catalog/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(
+            len(floor['spaces'])
+            for building in json.loads(response.content)
+            for floor in building['floors']
+        ), 901)
+
+    def test_warm_path(self):
+        self.client.get('/api/catalog/')
+        with self.assertNumQueries(0):  # catálogo e token vêm do cache
+            self.assertEqual(self.client.get('/api/catalog/').status_code, 200)
+
+
+class CachedTokenAuthenticationTests(SpacesTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_reservation()
+
+    def test_cached_token_skips_auth_queries(self):
+        self.assertEqual(self.client.get('/api/users/profile/').status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/users/profile/')
+        self.assertEqual(response.json()['email'], 'professor@cesmac.edu.br')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(context.captured_queries)
+
+    def test_query_savings(self):
+        for url in ('/api/users/profile/', '/api/reservations/'):
+            cache.clear()
+            cold = self.count_queries(url)
+            self.assertEqual(cold - self.count_queries(url), 1)
+
+    def test_user_save_and_deactivation_invalidate_cache(self):
+        self.client.get('/api/users/profile/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Ana'
+            self.user.save()
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/users/profile/')
+        self.assertEqual(response.json()['first_name'], 'Ana')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertEqual(self.client.get('/api/users/profile/').status_code, 401)
+
+    def test_cache_does_not_store_password(self):
+        key = Token.objects.get(user=self.user).key
+        self.client.get('/api/users/profile/')
+        snapshot = cache.get(token_cache_key(key))
+        self.assertNotIn(self.user.password, repr(snapshot))
+
+        user, token = CachedTokenAuthentication().authenticate_credentials(key)
+        self.assertEqual((user.pk, user.email, token.key), (self.user.pk, self.user.email, key))
+        # A senha adiada não é apagada ao salvar o usuário vindo do cache
+        user.first_name = 'Ana'
+        user.save()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('senha-segura-123'))
+
+    def test_token_delete_revokes_access(self):
+        self.client.get('/api/users/profile/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Token.objects.filter(user=self.user).delete()
+        self.assertEqual(self.client.get('/api/users/profile/').status_code, 401)
+
+
+class LoginTests(SpacesTestMixin, TestCase):
+    def post_login(self, username, password='senha-segura-123'):
+        return self.client.post(
+            '/api/auth/login/',
+            {'username': username, 'password': password},
+            content_type='application/json'
+        )
+
+    def test_login_with_username_or_email(self):
+        for username in ('professor', 'professor@cesmac.edu.br', 'professor@CESMAC.edu.br'):
+            response = self.post_login(username)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertEqual(data['token'], Token.objects.get(user=self.user).key)
+            self.assertEqual(data['user']['email'], 'professor@cesmac.edu.br')
+
+    def test_user_lookup_is_a_single_query(self):
+        Token.objects.create(user=self.user)
+        # Usuário + token existente
+        with self.assertNumQueries(2):
+            self.assertEqual(self.post_login('professor@cesmac.edu.br').status_code, 200)
+
+    def test_invalid_credentials(self):
+        self.assertEqual(self.post_login('professor', 'errada').status_code, 401)
+        self.assertEqual(self.post_login('ninguem@cesmac.edu.br').status_code, 401)
+        self.assertEqual(self.post_login('', '').status_code, 400)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.post_login('professor').status_code, 401)
+
+
+class AsyncReadEndpointsTests(SpacesTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.make_reservation()
+        self.token = Token.objects.get(user=self.user)
+
+    async def test_endpoints_under_async_client(self):
+        client = AsyncClient()
+        headers = {'Authorization': f'Token {self.token.key}'}
+        urls = [
+            '/api/catalog/',
+            '/api/users/profile/',
+            '/api/reservations/',
+            f'/api/spaces/{self.space.pk}/availability/?date=2026-03-02',
+        ]
+        for url in urls:
+            response = await client.get(url, headers=headers)
+            self.assertEqual(response.status_code, 200, url)
+
+        response = await client.get('/api/reservations/', headers=headers)
+        self.assertEqual(len(response.json()['results']), 1)
+        response = await client.get(f'/api/spaces/{self.space.pk}/availability/?date=2026-03-02', headers=headers)
+        self.assertEqual(response.json(), {'available': False})
+
+    async def test_async_reservation_list_matches_viewset(self):
+        headers = {'Authorization': f'Token {self.token.key}'}
+        await sync_to_async(self.make_reservation)(date=date(2026, 3, 3))
+        params = {'page_size': 1, 'fields': 'id,date,space_name'}
+        async_page = await AsyncClient().get('/api/reservations/async/', params, headers=headers)
+        self.assertEqual(async_page.status_code, 200)
+        page = await sync_to_async(self.client.get)('/api/reservations/', params)
+        self.assertEqual(async_page.json()['results'], page.json()['results'])
+
+        response = await AsyncClient().get(async_page.json()['next'], headers=headers)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertIsNone(response.json()['next'])
+
+        # A rota do router continua atendendo listagem e criação
+        self.assertEqual(resolve('/api/reservations/').url_name, 'reservation-list')
+        response = await AsyncClient().post('/api/reservations/async/', {}, headers=headers)
+        self.assertEqual(response.status_code, 405)
+
+    def test_authentication_errors(self):
+        self.client.credentials()
+        response = self.client.get('/api/users/profile/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['WWW-Authenticate'], 'Token')
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token invalido')
+        self.assertEqual(self.client.get('/api/reservations/').status_code, 401)
+
+    def test_validation_errors_keep_drf_format(self):
+        response = self.client.get('/api/reservations/', {'status': 'invalido'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('status', response.json())
+        response = self.client.get(f'/api/spaces/{self.space.pk}/availability/')
+        self.assertEqual(response.status_code, 400)
+
+
+class RecordingBroker:
+    """Broker substituto: guarda os eventos publicados"""
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, event):
+        self.published.append((channel, event))
+
+
+@override_settings(SPACES_EVENT_BROKER='spaces.tests.RecordingBroker')
+class ReservationEventsTests(SpacesTestMixin, APITestCase):
+    def setUp(self):
+        get_broker.cache_clear()
+        self.addCleanup(get_broker.cache_clear)
+        super().setUp()
+
+    def test_signals_publish_compact_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation = self.make_reservation()
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.status = 'canceled'
+            reservation.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.delete()
+
+        channel = space_channel(self.space.pk)
+        published = get_broker().published
+        self.assertEqual([item[0] for item in published], [channel] * 3)
+        self.assertEqual([event['action'] for _, event in published], ['created', 'updated', 'deleted'])
+        self.assertEqual(published[1][1], {
+            'action': 'updated',
+            'reservation': published[0][1]['reservation'],
+            'status': 'canceled',
+            'date': '2026-03-02',
+            'start_time': '08:00:00',
+            'end_time': '10:00:00',
+        })
+
+    def test_room_change_notifies_previous_room(self):
+        other = Space.objects.create(name='Sala 102', building=self.building, space_type=self.space_type, capacity=30)
+        reservation = self.make_reservation()
+        key = f'reservations:space:{self.space.pk}'
+        version = get_versions(key)[key]
+        with self.captureOnCommitCallbacks(execute=True):
+            reservation.space = other
+            reservation.date = date(2026, 3, 9)
+            reservation.save()
+
+        self.assertNotEqual(get_versions(key)[key], version)
+        published = {channel: event for channel, event in get_broker().published}
+        self.assertEqual(published[space_channel(other.pk)]['action'], 'updated')
+        previous = published[space_channel(self.space.pk)]
+        self.assertEqual((previous['action'], previous['date']), ('deleted', '2026-03-02'))
+
+    def test_nothing_published_on_rollback(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            self.make_reservation()
+        self.assertEqual(get_broker().published, [])
+
+    def test_batch_creation_publishes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/reservations/batch/', [
+                {'space': self.space.pk, 'date': '2026-03-02', 'start_time': '09:00', 'end_time': '11:00'},
+                {'space': self.space.pk, 'date': '2026-03-03', 'start_time': '09:00', 'end_time': '11:00'},
+            ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(get_broker().published), 2)
+
+
+class SpaceEventsStreamTests(SpacesTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.token = Token.objects.get(user=self.user)
+
+    async def test_stream_pushes_published_events(self):
+        response = await AsyncClient().get(
+            f'/api/spaces/{self.space.pk}/events/', {'token': self.token.key}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        get_broker().publish(space_channel(self.space.pk), {'action': 'updated', 'status': 'canceled'})
+        chunk = await asyncio.wait_for(anext(stream), timeout=2)
+        self.assertEqual(
+            chunk,
+            b'event: reservation\ndata: {"action": "updated", "status": "canceled"}\n\n'
+        )
+        await response.streaming_content.aclose()
+
+    async def test_unknown_space_and_missing_token(self):
+        client = AsyncClient()
+        response = await client.get('/api/spaces/999/events/', {'token': self.token.key})
+        self.assertEqual(response.status_code, 404)
+        response = await client.get(f'/api/spaces/{self.space.pk}/events/')
+        self.assertEqual(response.status_code, 401)
+
+    def test_wsgi_is_rejected(self):
+        response = self.client.get(f'/api/spaces/{self.space.pk}/events/')
+        self.assertEqual(response.status_code, 501)
+
+
+class NotificationTests(SpacesTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.coordinator = get_user_model().objects.create_user(
+            username='coordenacao',
+            email='coordenacao@cesmac.edu.br',
+            password='senha-segura-123',
+            is_staff=True
+        )
+
+    def unread(self):
+        return self.client.get('/api/notifications/unread_count/').data['unread']
+
+    def test_status_change_notifies_owner(self):
+        reservation = self.make_reservation(status='pending')
+        self.assertEqual(Notification.objects.get(user=self.coordinator).title, 'Nova reserva pendente')
+
+        reservation = Reservation.objects.get(pk=reservation.pk)
+        reservation.status = 'confirmado'
+        reservation.save()
+        reservation.save()  # sem mudança de status: nada novo
+
+        notification = Notification.objects.get(user=self.user)
+        self.assertEqual(notification.title, 'Status da reserva: Confirmado')
+        self.assertIn('Sala 101 02/03/2026 08:00-10:00', notification.message)
+        self.assertEqual(self.unread(), 1)
+
+    def test_fan_out_uses_bulk_insert(self):
+        users = get_user_model().objects.bulk_create([
+            get_user_model()(username=f'aluno{i}', email=f'aluno{i}@cesmac.edu.br') for i in range(20)
+        ])
+        notifications = [Notification(user=user, title='Aviso', message='Sala interditada') for user in users]
+        notifications.append(Notification(user=users[0], title='Aviso', message='Outro'))
+        # Savepoint, INSERT das notificações, INSERT dos contadores e um UPDATE
+        # por quantidade distinta (1 e 2), independente do número de usuários
+        with self.assertNumQueries(6):
+            notify(notifications)
+        self.assertEqual(NotificationCounter.objects.get(user=users[0]).unread, 2)
+        self.assertEqual(NotificationCounter.objects.get(user=users[1]).unread, 1)
+
+    def test_list_and_mark_read(self):
+        notify(Notification(user=self.user, title=f'Aviso {i}', message='') for i in range(5))
+        Notification.objects.create(user=self.coordinator, title='Outro usuário', message='')
+
+        response = self.client.get('/api/notifications/', {'page_size': 3})
+        self.assertEqual([item['title'] for item in response.data['results']], ['Aviso 4', 'Aviso 3', 'Aviso 2'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([item['title'] for item in response.data['results']], ['Aviso 1', 'Aviso 0'])
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.unread(), 5)
+
+        first = Notification.objects.filter(user=self.user).earliest('id')
+        response = self.client.post(f'/api/notifications/{first.pk}/read/')
+        self.assertEqual(response.data['unread'], 4)
+        # Repetir não decrementa de novo
+        self.assertEqual(self.client.post(f'/api/notifications/{first.pk}/read/').data['unread'], 4)
+        other = Notification.objects.get(user=self.coordinator)
+        self.assertEqual(self.client.post(f'/api/notifications/{other.pk}/read/').status_code, 404)
+
+        self.assertEqual(len(self.client.get('/api/notifications/', {'read': 'false'}).data['results']), 4)
+
+    def test_mark_all_read_is_one_update(self):
+        notify(Notification(user=self.user, title=f'Aviso {i}', message='') for i in range(5))
+        self.client.get('/api/notifications/unread_count/')  # token no cache
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/notifications/read_all/')
+        self.assertEqual(response.data['updated'], 5)
+        notification_updates = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "spaces_notification"')
+        ]
+        self.assertEqual(len(notification_updates), 1)
+        self.assertEqual(self.unread(), 0)
+
+    def test_admin_edits_recount(self):
+        notification = Notification.objects.create(user=self.user, title='Aviso', message='')
+        self.assertEqual(self.unread(), 1)
+        notification.read = True
+        notification.save()
+        self.assertEqual(self.unread(), 0)
+
+        other = Notification.objects.create(user=self.user, title='Outro', message='')
+        self.assertEqual(self.unread(), 1)
+        other.delete()
+        self.assertEqual(self.unread(), 0)
+
+
+class NotificationUserDeletionTests(SpacesTestMixin, TransactionTestCase):
+    """Com commit de verdade, para o SQLite conferir as chaves estrangeiras"""
+
+    def test_deleting_user_with_notifications(self):
+        notify(Notification(user=self.user, title=f'Aviso {i}', message='') for i in range(3))
+        self.user.delete()
+        self.assertFalse(Notification.objects.exists())
+        self.assertFalse(NotificationCounter.objects.exists())
+
+    def test_queryset_delete_of_users(self):
+        notify([Notification(user=self.user, title='Aviso', message='')])
+        get_user_model().objects.filter(pk=self.user.pk).delete()
+        self.assertFalse(NotificationCounter.objects.exists())
+
+
+class FloorPlanVariantsTests(SpacesTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = self.settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def upload(self, width=1000, height=500, image_format='PNG', name='andar.png'):
+        buffer = BytesIO()
+        Image.new('RGB', (width, height), 'white').save(buffer, image_format)
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def test_variants_generated_on_upload(self):
+        floor = FloorPlan.objects.create(building=self.building, name='1º andar', plan_image=self.upload())
+        floor.refresh_from_db()
+        sizes = floor.plan_variants['sizes']
+        # 1600 é maior que o original e não é gerada
+        self.assertEqual(sorted(sizes, key=int), ['200', '400', '800'])
+        self.assertEqual(set(sizes['200']), {'webp', 'png'})
+        storage = floor.plan_image.storage
+        with storage.open(sizes['400']['webp']) as variant:
+            image = Image.open(variant)
+            self.assertEqual((image.format, image.size), ('WEBP', (400, 200)))
+
+        self.assertEqual(floor.get_variant_url(100), storage.url(sizes['200']['png']))
+        self.assertEqual(floor.get_variant_url(300, 'webp'), storage.url(sizes['400']['webp']))
+        self.assertEqual(floor.get_variant_url(2000), floor.plan_image.url)
+
+    def test_jpeg_keeps_jpeg_fallback(self):
+        floor = FloorPlan.objects.create(
+            building=self.building, name='2º andar',
+            plan_image=self.upload(image_format='JPEG', name='andar.jpg')
+        )
+        self.assertEqual(set(floor.plan_variants['sizes']['200']), {'webp', 'jpeg'})
+
+    def test_replace_and_delete_clean_up_files(self):
+        floor = FloorPlan.objects.create(building=self.building, name='1º andar', plan_image=self.upload())
+        storage = floor.plan_image.storage
+        old_names = [name for size in floor.plan_variants['sizes'].values() for name in size.values()]
+
+        floor.plan_image = self.upload(width=600, height=300, name='nova.png')
+        floor.save()
+        self.assertFalse(any(storage.exists(name) for name in old_names))
+        self.assertEqual(sorted(floor.plan_variants['sizes'], key=int), ['200', '400'])
+
+        names = [name for size in floor.plan_variants['sizes'].values() for name in size.values()]
+        floor.delete()
+        self.assertFalse(any(storage.exists(name) for name in names))
+
+    def test_oversized_plan_is_rejected_cleanly(self):
+        # Limite do próprio Pillow (DecompressionBombError ao abrir)
+        with mock.patch.object(Image, 'MAX_IMAGE_PIXELS', 1000):
+            floor = FloorPlan.objects.create(building=self.building, name='1º andar', plan_image=self.upload())
+        self.assertEqual(floor.plan_variants['sizes'], {})
+
+        # Limite das plantas: variações não geradas e upload recusado na validação
+        with self.settings(FLOOR_PLAN_MAX_PIXELS=100_000):
+            floor = FloorPlan.objects.create(building=self.building, name='2º andar', plan_image=self.upload())
+            self.assertEqual(floor.plan_variants['sizes'], {})
+            with self.assertRaisesMessage(ValidationError, 'Planta muito grande (1000×500 pixels)'):
+                FloorPlan(building=self.building, name='3º andar', plan_image=self.upload()).full_clean()
+
+    def test_regenerating_variants_refreshes_catalog(self):
+        with self.settings(FLOOR_PLAN_MAX_PIXELS=100_000):
+            FloorPlan.objects.create(building=self.building, name='1º andar', plan_image=self.upload())
+        etag = self.client.get('/api/catalog/')['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('generate_floor_plan_variants', '--force', stdout=StringIO())
+        response = self.client.get('/api/catalog/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        floor = next(floor for floor in json.loads(response.content)[0]['floors'] if floor['name'] == '1º andar')
+        self.assertIn('webp', floor['plan_srcset'])
+
+    def test_serializer_exposes_srcset(self):
+        floor = FloorPlan.objects.create(building=self.building, name='1º andar', plan_image=self.upload())
+        response = self.client.get(f'/api/buildings/{self.building.pk}/floors/')
+        data = next(item for item in response.data if item['id'] == floor.pk)
+        webp = data['plan_srcset']['webp'].split(', ')
+        self.assertEqual([entry.rsplit(' ', 1)[1] for entry in webp], ['200w', '400w', '800w'])
+        self.assertTrue(webp[0].startswith('http://testserver/media/floor_plans/variants/'))
+
+
+class FloorPlanTilesTests(SpacesTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = self.settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def upload(self, width=600, height=300, color='white', name='andar.png'):
+        buffer = BytesIO()
+        Image.new('RGB', (width, height), color).save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue())
+
+    def generate_tiles(self, floor, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('generate_floor_plan_tiles', *args, stdout=StringIO())
+        floor.refresh_from_db()
+        return floor
+
+    def create_floor(self, upload):
+        floor = FloorPlan.objects.create(building=self.building, name='1º andar', plan_image=upload)
+        return self.generate_tiles(floor)
+
+    def test_upload_leaves_tiles_to_the_command(self):
+        with mock.patch('spaces.models.generate_tiles') as generate_tiles:
+            floor = FloorPlan.objects.create(building=self.building, name='1º andar', plan_image=self.upload())
+        generate_tiles.assert_not_called()
+        self.assertFalse(floor.plan_tiles['complete'])
+        etag = self.client.get('/api/catalog/')['ETag']
+        floor_data = json.loads(self.client.get('/api/catalog/').content)[0]['floors']
+        self.assertIsNone(next(item for item in floor_data if item['id'] == floor.pk)['plan_tiles'])
+
+        self.generate_tiles(floor)
+        self.assertTrue(floor.plan_tiles['complete'])
+        response = self.client.get('/api/catalog/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        floor_data = json.loads(response.content)[0]['floors']
+        self.assertIsNotNone(next(item for item in floor_data if item['id'] == floor.pk)['plan_tiles'])
+
+        # Só plantas pendentes: a segunda execução não lê nenhum arquivo
+        with mock.patch('spaces.models.generate_tiles') as generate_tiles:
+            call_command('generate_floor_plan_tiles', stdout=StringIO())
+        generate_tiles.assert_not_called()
+
+    def test_oversized_plan_keeps_tiles_pending(self):
+        with self.settings(FLOOR_PLAN_MAX_PIXELS=100_000):
+            floor = self.create_floor(self.upload())
+        self.assertFalse(floor.plan_tiles['complete'])
+
+    def test_pyramid_layout(self):
+        floor = self.create_floor(self.upload())
+        tiles = floor.plan_tiles
+        self.assertEqual((tiles['width'], tiles['height'], tiles['max_level']), (600, 300, 10))
+        self.assertTrue(tiles['complete'])
+
+        storage = floor.plan_image.storage
+        root = f"floor_plans/tiles/{floor.pk}/{tiles['hash']}"
+        # Nível máximo: 600x300 em tiles de 256 = 3 colunas x 2 linhas
+        self.assertEqual(sorted(storage.listdir(f'{root}/10')[1]), ['0_0.webp', '0_1.webp', '1_0.webp', '1_1.webp', '2_0.webp', '2_1.webp'])
+        with storage.open(f'{root}/10/2_1.webp') as tile:
+            self.assertEqual(Image.open(tile).size, (600 - 512, 300 - 256))
+        self.assertEqual(storage.listdir(f'{root}/0')[1], ['0_0.webp'])
+
+    def test_normalized_location_is_stable_across_levels(self):
+        floor = self.create_floor(self.upload(601, 299))
+        tiles = floor.plan_tiles
+        for level in range(tiles['max_level'] + 1):
+            width, height = get_level_size(tiles['width'], tiles['height'], level, tiles['max_level'])
+            x, y = to_level_pixels(0.25, 0.5, tiles, level)
+            self.assertAlmostEqual(x / width, 0.25)
+            self.assertAlmostEqual(y / height, 0.5)
+
+    def test_same_content_is_skipped_and_new_content_replaces(self):
+        floor = self.create_floor(self.upload())
+        first = floor.plan_tiles
+        storage = floor.plan_image.storage
+
+        # Mesmo conteúdo com outro nome: hash igual, nenhum tile regravado
+        floor.plan_image = self.upload(name='copia.png')
+        floor.save()
+        with mock.patch('spaces.tiles.encode') as encode:
+            self.generate_tiles(floor)
+        self.assertEqual(floor.plan_tiles, first)
+        encode.assert_not_called()
+
+        floor.plan_image = self.upload(color='black', name='nova.png')
+        floor.save()
+        self.generate_tiles(floor)
+        self.assertNotEqual(floor.plan_tiles['hash'], first['hash'])
+        self.assertFalse(storage.exists(f"floor_plans/tiles/{floor.pk}/{first['hash']}/plan.dzi"))
+
+    def test_tile_urls_and_cache_headers(self):
+        floor = self.create_floor(self.upload())
+        response = self.client.get(f'/api/buildings/{self.building.pk}/floors/')
+        data = next(item for item in response.data if item['id'] == floor.pk)['plan_tiles']
+
+        self.client.credentials()  # tiles são públicos, como MEDIA
+        dzi = self.client.get(data['dzi'])
+        self.assertEqual(dzi.status_code, 200)
+        self.assertIn(b'TileSize="256"', b''.join(dzi.streaming_content))
+        self.assertIn('immutable', dzi['Cache-Control'])
+
+        tile = self.client.get(data['tiles'].format(z=10, x=1, y=0))
+        self.assertEqual(tile.status_code, 200)
+        self.assertEqual(tile['Content-Type'], 'image/webp')
+        self.assertEqual(tile['Cache-Control'], 'public, max-age=31536000, immutable')
+        # Lê o arquivo pelo cliente de testes (close() direto fecharia a conexão do banco)
+        self.assertTrue(b''.join(tile.streaming_content))
+
+        self.assertEqual(self.client.get(data['tiles'].format(z=10, x=9, y=9)).status_code, 404)
+
+
+class ReservationRowSerializerTests(SpacesTestMixin, APITestCase):
+    def test_output_matches_model_serializer(self):
+        Space.objects.filter(pk=self.space.pk).update(floor_name=None)
+        other = Space.objects.create(name='Lab 2', building=self.building, space_type=self.space_type,
+                                     floor_name=self.floor, capacity=25)
+        self.make_reservation(start_time=time(8, 0, 0, 123456), description='Aula "especial" ção')
+        self.make_reservation(
+            space=other,
+            is_recurring=True,
+            recurring_days='seg,qua',
+            recurring_start_date=date(2026, 3, 1),
+            recurring_end_date=date(2026, 6, 30),
+            recurring_times={'seg': {'start': '08:00', 'end': '10:00'}},
+            monday_start=time(8, 0),
+            monday_end=time(10, 0, 30),
+            status='pending',
+            phone='82999990000',
+            course='Engenharia',
+        )
+        queryset = get_reservation_queryset()
+
+        expected = JSONRenderer().render(ReservationSerializer(queryset, many=True).data)
+        serializer = ReservationRowSerializer()
+        rows = serializer.serialize(serializer.project(queryset))
+        self.assertEqual(JSONRenderer().render(rows), expected)
+
+    def test_cursor_pagination_keeps_microseconds(self):
+        for microsecond in (1, 2, 3):
+            self.make_reservation(start_time=time(8, 0, 0, microsecond))
+        response = self.client.get('/api/reservations/all_reservations/', {'page_size': 2})
+        ids = [row['id'] for row in response.json()['results']]
+        response = self.client.get(response.json()['next'])
+        ids += [row['id'] for row in response.json()['results']]
+        self.assertEqual(len(set(ids)), 3)
+
+
+@tag('benchmark')
+class ReservationRowSerializerBenchmarkTests(SpacesTestMixin, APITestCase):
+    """Linhas por segundo: ReservationSerializer × caminho rápido, 5000 reservas"""
+
+    def setUp(self):
+        super().setUp()
+        Reservation.objects.bulk_create(
+            Reservation(space=self.space, user=self.user, date=date(2026, 3, 1) + timedelta(days=number % 300),
+                        start_time=time(8, 0), end_time=time(10, 0), status='confirmado',
+                        description=f'Reserva {number}')
+            for number in range(5000)
+        )
+
+    def measure(self, serialize):
+        started = perf_counter()
+        body = JSONRenderer().render(serialize(get_reservation_queryset()))
+        return body, 5000 / (perf_counter() - started)
+
+    def test_rows_per_second(self):
+        expected, slow = self.measure(lambda queryset: ReservationSerializer(queryset, many=True).data)
+        body, fast = self.measure(
+            lambda queryset: ReservationRowSerializer().serialize(ReservationRowSerializer().project(queryset))
+        )
+        self.assertEqual(body, expected)
+        self.assertGreater(fast, slow)
+
+
+class SparseFieldsetTests(SpacesTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        for day in range(1, 6):
+            self.make_reservation(date=date(2026, 3, day))
+
+    def select_sql(self, queries):
+        return [query['sql'] for query in queries if 'spaces_reservation' in query['sql']][-1]
+
+    def test_fields_narrow_columns_and_joins(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/reservations/all_reservations/', {
+                'fields': 'date,start_time,end_time,status', 'page_size': 2
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.data['results'][0]), ['date', 'start_time', 'end_time', 'status'])
+        sql = self.select_sql(queries)
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('monday_start', sql)
+
+        # O cursor continua funcionando sem id na resposta
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_fields_with_names_join_only_what_is_needed(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/reservations/', {'fields': 'id,space_name'})
+        self.assertEqual(response.json()['results'][0], {'id': response.json()['results'][0]['id'], 'space_name': 'Sala 101'})
+        sql = self.select_sql(queries)
+        self.assertIn('"spaces_space"', sql)
+        self.assertNotIn('spaces_building', sql)
+        self.assertNotIn('auth_user"."email', sql)
+
+    def test_omit(self):
+        response = self.client.get('/api/reservations/', {
+            'omit': ','.join(f'{day}_{edge}' for day in ('monday', 'tuesday', 'wednesday', 'thursday',
+                                                          'friday', 'saturday', 'sunday')
+                             for edge in ('start', 'end'))
+        })
+        row = response.json()['results'][0]
+        self.assertIn('building_name', row)
+        self.assertNotIn('monday_start', row)
+        self.assertEqual(len(row), 20)
+
+    def test_invalid_fieldsets(self):
+        response = self.client.get('/api/reservations/all_reservations/', {'fields': 'date,senha'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('senha', response.data['fields'])
+        response = self.client.get('/api/reservations/', {'fields': 'date', 'omit': 'status'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/spaces/', {'omit': 'andar'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_space_list_fields(self):
+        Space.objects.create(name='Lab 2', building=self.building, space_type=self.space_type, capacity=20)
+        with self.assertNumQueries(2), CaptureQueriesContext(connection) as queries:  # token + salas
+            response = self.client.get('/api/spaces/', {'fields': 'id,name,capacity'})
+        self.assertEqual(response.data[0], {'id': self.space.pk, 'name': 'Sala 101', 'capacity': 40})
+        self.assertNotIn('JOIN', queries[-1]['sql'])
+        self.assertNotIn('location_x', queries[-1]['sql'])
+
+        # Sem ?fields=, os nomes de campus e andar vêm na mesma consulta
+        cache.clear()
+        with self.assertNumQueries(2):  # token + salas
+            response = self.client.get('/api/spaces/')
+        self.assertEqual(
+            [(space['building_name'], space.get('floor_name')) for space in response.data],
+            [('Campus I', 'Térreo'), ('Campus I', None)]
+        )
+
+
+class RecurrenceStorageTests(SpacesTestMixin, APITestCase):
+    def make_recurring(self, **kwargs):
+        data = {
+            'date': date(2026, 3, 2),
+            'is_recurring': True,
+            'recurring_days': 'seg,4',
+            'recurring_start_date': date(2026, 3, 1),
+            'recurring_end_date': date(2026, 3, 31),
+            'recurring_times': {'seg': {'start': '19:00', 'end': '21:00'}},
+        }
+        data.update(kwargs)
+        return self.make_reservation(**data)
+
+    def test_mask_and_slots(self):
+        reservation = self.make_recurring()
+        self.assertEqual(reservation.recurring_weekdays, 0b10001)
+        self.assertEqual(
+            list(reservation.slots.order_by('weekday').values_list('weekday', 'start_time', 'end_time')),
+            [(0, time(19, 0), time(21, 0)), (4, time(8, 0), time(10, 0))]
+        )
+
+        reservation = Reservation.objects.get(pk=reservation.pk)
+        self.assertEqual(reservation.recurring_days, 'seg,sex')
+        self.assertEqual(reservation.recurring_times, {
+            'seg': {'start': '19:00', 'end': '21:00'},
+            'sex': {'start': '08:00', 'end': '10:00'},
+        })
+        self.assertEqual((reservation.friday_start, reservation.monday_end), (time(8, 0), time(21, 0)))
+        self.assertIsNone(reservation.tuesday_start)
+
+    def test_api_round_trip(self):
+        response = self.client.post('/api/reservations/', {
+            'space': self.space.pk,
+            'is_recurring': True,
+            'recurring_days': 'ter,qui',
+            'recurring_start_date': '2026-03-01',
+            'recurring_end_date': '2026-03-31',
+            'tuesday_start': '14:00',
+            'tuesday_end': '16:00',
+            'date': '2026-03-01',
+            'start_time': '08:00',
+            'end_time': '09:00',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['recurring_days'], 'ter,qui')
+        self.assertEqual(response.data['tuesday_start'], '14:00:00')
+        self.assertEqual(response.data['thursday_end'], '09:00:00')
+        self.assertIsNone(response.data['monday_start'])
+        self.assertEqual(ReservationOccurrence.objects.filter(start_time=time(14, 0)).count(), 5)
+
+    @override_settings(RESERVATION_MAX_RECURRENCE_DAYS=365)
+    def test_recurrence_span_is_limited(self):
+        payload = {
+            'space': self.space.pk,
+            'is_recurring': True,
+            'recurring_days': 'seg',
+            'recurring_start_date': '2026-03-01',
+            'recurring_end_date': '2056-03-01',
+            'date': '2026-03-02',
+            'start_time': '08:00',
+            'end_time': '10:00',
+        }
+        response = self.client.post('/api/reservations/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('365 dias', response.data['recurring_end_date'][0])
+        self.assertFalse(ReservationOccurrence.objects.exists())
+
+        response = self.client.post('/api/reservations/batch/', [payload], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Reservation.objects.exists())
+
+        payload['recurring_end_date'] = '2027-03-01'
+        response = self.client.post('/api/reservations/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        form = ReservationAdminForm(data={
+            'space': self.space.pk, 'user': self.user.pk, 'is_recurring': True,
+            'recurring_days': ['seg'], 'recurring_start_date': '2026-03-01',
+            'recurring_end_date': '2056-03-01', 'monday_start': '08:00', 'monday_end': '10:00',
+        })
+        self.assertIn('recurring_end_date', form.errors)
+
+    def test_recurrence_is_kept_on_status_change(self):
+        reservation = self.make_recurring()
+        response = self.client.patch(f'/api/reservations/{reservation.pk}/', {
+            'status': 'canceled', 'recurring_days': 'dom', 'monday_start': '07:00',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        reservation.refresh_from_db()
+        self.assertEqual((reservation.status, reservation.recurring_days), ('canceled', 'seg,sex'))
+        self.assertEqual(reservation.monday_start, time(19, 0))
+
+    def test_weekday_filter_runs_in_sql(self):
+        monday_friday = self.make_recurring()
+        self.make_recurring(recurring_days='ter')
+        single_friday = self.make_reservation(date=date(2026, 3, 6))
+        self.make_reservation(date=date(2026, 3, 3))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/reservations/all_reservations/', {'weekday': 'sex', 'fields': 'id'})
+        self.assertEqual({row['id'] for row in response.data['results']}, {monday_friday.pk, single_friday.pk})
+        self.assertIn('recurring_weekdays', queries[-1]['sql'])
+
+        response = self.client.get('/api/reservations/all_reservations/', {'weekday': 'sexta'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_admin_form_uses_api_codes(self):
+        form = ReservationAdminForm(data={
+            'space': self.space.pk,
+            'user': self.user.pk,
+            'is_recurring': True,
+            'date': '2026-03-02',
+            'start_time': '08:00',
+            'end_time': '09:00',
+            'recurring_days': ['qua'],
+            'recurring_start_date': '2026-03-01',
+            'recurring_end_date': '2026-03-31',
+            'wednesday_start': '10:00',
+            'wednesday_end': '12:00',
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        reservation = form.save()
+        self.assertEqual(reservation.recurring_days, 'qua')
+        self.assertEqual(list(reservation.slots.values_list('weekday', 'start_time')), [(2, time(10, 0))])
+
+        form = ReservationAdminForm(instance=Reservation.objects.get(pk=reservation.pk))
+        self.assertEqual(form.initial['recurring_days'], ['qua'])
+        self.assertEqual(form.initial['wednesday_start'], time(10, 0))
+
+
+class ReservationDirtyFieldsTests(SpacesTestMixin, APITestCase):
+    def make_recurring(self):
+        return self.make_reservation(
+            is_recurring=True,
+            recurring_days='seg,qua',
+            recurring_start_date=date(2026, 3, 1),
+            recurring_end_date=date(2026, 3, 31),
+        )
+
+    def patch_status(self, reservation):
+        # Token já em cache: só sobram as consultas da própria edição
+        self.client.get('/api/users/profile/')
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.patch(
+                    f'/api/reservations/{reservation.pk}/', {'status': 'canceled'}, format='json'
+                )
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries.captured_queries]
+
+    def assert_status_only(self, statements):
+        reads = [sql for sql in statements if sql.startswith('SELECT') and 'FROM "spaces_reservation"' in sql]
+        updates = [sql for sql in statements if sql.startswith('UPDATE "spaces_reservation" ')]
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "status" = ', updates[0])
+        self.assertNotIn('"date"', updates[0])
+        # Sem bloqueio da sala: não há horário a conferir
+        self.assertFalse([sql for sql in statements if 'FROM "spaces_space"' in sql])
+        self.assertFalse([sql for sql in statements if sql.startswith(('DELETE', 'INSERT INTO "spaces_reservationoccurrence"'))])
+        self.assertIn(
+            'UPDATE "spaces_reservationoccurrence" SET "status" = ',
+            ' '.join(sql for sql in statements if sql.startswith('UPDATE "spaces_reservationoccurrence"'))
+        )
+
+    def test_status_patch_single(self):
+        reservation = self.make_reservation()
+        statements = self.patch_status(reservation)
+        self.assert_status_only(statements)
+        self.assertEqual(
+            set(reservation.occurrences.values_list('status', flat=True)), {'canceled'}
+        )
+
+    def test_status_patch_recurring(self):
+        reservation = self.make_recurring()
+        occurrences = list(reservation.occurrences.values_list('pk', flat=True))
+        statements = self.patch_status(reservation)
+        self.assert_status_only(statements)
+        self.assertEqual(list(reservation.occurrences.values_list('pk', flat=True)), occurrences)
+        self.assertFalse([sql for sql in statements if sql.startswith('UPDATE "spaces_reservationslot"')])
+
+    def test_reactivation_locks_space(self):
+        reservation = self.make_reservation()
+        Reservation.objects.filter(pk=reservation.pk).update(status='canceled')
+        with mock.patch.object(ReservationViewSet, 'lock_space') as lock_space:
+            response = self.client.patch(f'/api/reservations/{reservation.pk}/', {'status': 'pending'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        lock_space.assert_called_once_with(self.space.pk)
+
+    def test_protected_fields_without_query(self):
+        reservation = Reservation.objects.get(pk=self.make_recurring().pk)
+        reservation.recurring_start_date = date(2026, 1, 1)
+        reservation.status = 'canceled'
+        with CaptureQueriesContext(connection) as queries:
+            reservation.save()
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertFalse([sql for sql in statements if 'FROM "spaces_reservation"' in sql])
+        self.assertEqual(reservation.recurring_start_date, date(2026, 3, 1))
+        reservation.refresh_from_db()
+        self.assertEqual((reservation.recurring_start_date, reservation.status), (date(2026, 3, 1), 'canceled'))
+
+    def test_unchanged_save_is_noop(self):
+        reservation = Reservation.objects.get(pk=self.make_reservation().pk)
+        with self.assertNumQueries(0):
+            reservation.save()
+
+    def test_schedule_change_rebuilds_occurrences(self):
+        reservation = Reservation.objects.get(pk=self.make_reservation().pk)
+        reservation.date = date(2026, 3, 9)
+        reservation.save()
+        self.assertEqual(list(reservation.occurrences.values_list('date', flat=True)), [date(2026, 3, 9)])
+
+
+class ReservationAdminChangelistTests(SpacesTestMixin, TestCase):
+    url = '/admin/spaces/reservation/'
+
+    def setUp(self):
+        super().setUp()
+        admin_user = get_user_model().objects.create_superuser('admin', 'admin@cesmac.edu.br', 'senha-admin-123')
+        self.client.force_login(admin_user)
+
+    def add_reservations(self, count):
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(username=f'aluno{index}', email=f'aluno{index}@cesmac.edu.br')
+            for index in range(Reservation.objects.count(), Reservation.objects.count() + count)
+        )
+        spaces = Space.objects.bulk_create(
+            Space(name=f'Sala {index}', building=self.building, space_type=self.space_type, capacity=30)
+            for index in range(count)
+        )
+        Reservation.objects.bulk_create(
+            Reservation(
+                space=space, user=user, date=date(2025, 12, 1) + timedelta(days=index * 30),
+                start_time=time(8, 0), end_time=time(10, 0),
+                is_recurring=index % 2 == 0, recurring_weekdays=0b101 if index % 2 == 0 else 0
+            )
+            for index, (space, user) in enumerate(zip(spaces, users))
+        )
+        return users
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return [query['sql'] for query in context.captured_queries]
+
+    def test_invalid_filter_id_redirects(self):
+        for query in ('space__id__exact=abc', f'user__id__exact={self.user.pk},abc'):
+            response = self.client.get(f'{self.url}?{query}')
+            self.assertRedirects(response, f'{self.url}?e=1', fetch_redirect_response=False)
+
+    def test_query_budget_does_not_grow(self):
+        urls = [
+            self.url,
+            f'{self.url}?space__id__exact={self.space.pk}&q=Sala',
+            f'{self.url}?date__year=2026&date__month=3',
+            f'{self.url}?date__year=2026',
+        ]
+        self.add_reservations(5)
+        small = [len(self.count_queries(url)) for url in urls]
+        self.add_reservations(120)
+        large = [len(self.count_queries(url)) for url in urls]
+        self.assertEqual(small, large)
+        self.assertLessEqual(max(large), 9, large)
+
+    def test_autocomplete_filters_render_only_selection(self):
+        users = self.add_reservations(30)
+        def user_filter(response):
+            return re.search(r'data-field-name="user".*?</select>', response.content.decode(), re.S).group()
+
+        response = self.client.get(self.url)
+        self.assertContains(response, 'select2')
+        self.assertEqual(user_filter(response).count('<option'), 1)
+
+        response = self.client.get(f'{self.url}?user__id__exact={users[7].pk}')
+        self.assertEqual(user_filter(response).count('<option'), 2)
+        self.assertIn(f'<option value="{users[7].pk}" selected>', user_filter(response))
+
+    def test_unfiltered_count_is_estimated(self):
+        self.add_reservations(20)
+        Reservation.objects.filter(pk__in=Reservation.objects.order_by('pk').values('pk')[:5]).delete()
+        with mock.patch.object(EstimatedCountPaginator, 'estimate_threshold', 0):
+            statements = self.count_queries(self.url)
+            response = self.client.get(self.url)
+            self.assertEqual(response.context['cl'].result_count, Reservation.objects.aggregate(last=Max('pk'))['last'])
+            self.assertFalse([sql for sql in statements if 'COUNT(' in sql])
+
+            # Com filtro, a contagem continua exata
+            response = self.client.get(f'{self.url}?is_recurring__exact=1')
+            self.assertEqual(response.context['cl'].result_count, Reservation.objects.filter(is_recurring=True).count())
+
+    def test_date_hierarchy_years_from_range(self):
+        self.add_reservations(20)
+        response = self.client.get(self.url)
+        for year in (2025, 2026, 2027):
+            self.assertContains(response, f'?date__year={year}')
+
+    def test_time_display(self):
+        self.add_reservations(2)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Recorrente: Segunda-feira, Quarta-feira')
+        self.assertContains(response, '31/12/2025 08:00 - 10:00')
+
+
+@tag('benchmark')
+class ReservationAdminBenchmarkTests(SpacesTestMixin, TestCase):
+    """Listagem do admin com 200 mil reservas: consultas por página"""
+    total = 200_000
+
+    def setUp(self):
+        super().setUp()
+        admin_user = get_user_model().objects.create_superuser('admin', 'admin@cesmac.edu.br', 'senha-admin-123')
+        self.client.force_login(admin_user)
+        Reservation.objects.bulk_create(
+            (
+                Reservation(
+                    space=self.space, user=self.user, date=date(2020, 1, 1) + timedelta(days=index % 2000),
+                    start_time=time(7 + index % 12, 0), end_time=time(8 + index % 12, 0)
+                )
+                for index in range(self.total)
+            ),
+            batch_size=5000
+        )
+
+    def test_changelist(self):
+        for url in (
+            '/admin/spaces/reservation/',
+            '/admin/spaces/reservation/?date__year=2024&date__month=5',
+            f'/admin/spaces/reservation/?user__id__exact={self.user.pk}&p=50',
+        ):
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertLessEqual(len(context.captured_queries), 9)
+
+
+class BulkStatusTransitionTests(SpacesTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.is_staff = True
+        self.user.save()
+
+    def make_pending(self, start, end, **kwargs):
+        return self.make_reservation(start_time=time(start, 0), end_time=time(end, 0), status='pending', **kwargs)
+
+    def post(self, action, ids):
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f'/api/reservations/{action}/', {'ids': ids}, format='json')
+        return response, [query['sql'] for query in queries.captured_queries]
+
+    def test_confirm_with_one_update(self):
+        pending = [
+            self.make_pending(8, 9),
+            self.make_pending(9, 10),
+            self.make_pending(
+                10, 11, is_recurring=True, recurring_days='ter',
+                recurring_start_date=date(2026, 3, 1), recurring_end_date=date(2026, 3, 31)
+            ),
+        ]
+        confirmed = self.make_reservation(start_time=time(14, 0), end_time=time(15, 0))
+        ids = [reservation.pk for reservation in pending]
+        version = cache.get(f'version:reservations:space:{self.space.pk}')
+
+        response, statements = self.post('confirm', ids + [confirmed.pk, 9999])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated'], ids)
+        self.assertEqual([item['id'] for item in response.data['skipped']], [confirmed.pk, 9999])
+        self.assertEqual(response.data['skipped'][1]['reason'], 'Reserva não encontrada')
+
+        self.assertEqual(len([sql for sql in statements if sql.startswith('UPDATE "spaces_reservation" ')]), 1)
+        self.assertEqual(len([sql for sql in statements if sql.startswith('UPDATE "spaces_reservationoccurrence"')]), 1)
+        self.assertEqual(len([sql for sql in statements if sql.startswith('INSERT INTO "spaces_notification"')]), 1)
+        self.assertEqual(
+            set(ReservationOccurrence.objects.filter(reservation_id__in=ids).values_list('status', flat=True)),
+            {'confirmado'}
+        )
+        self.assertEqual(Notification.objects.filter(user=self.user, title__contains='Confirmado').count(), 3)
+        self.assertNotEqual(cache.get(f'version:reservations:space:{self.space.pk}'), version)
+
+    def test_confirm_rechecks_conflicts_in_the_batch(self):
+        self.make_reservation(start_time=time(8, 0), end_time=time(10, 0))
+        blocked = self.make_pending(9, 11)
+        first = self.make_pending(10, 12)
+        second = self.make_pending(11, 13)
+        free = self.make_pending(13, 14)
+
+        response, statements = self.post('confirm', [blocked.pk, first.pk, second.pk, free.pk])
+        self.assertEqual(response.data['updated'], [first.pk, free.pk])
+        self.assertEqual([item['id'] for item in response.data['skipped']], [blocked.pk, second.pk])
+        self.assertIn('02/03/2026 11:00-13:00', response.data['skipped'][1]['reason'])
+        self.assertEqual(
+            dict(Reservation.objects.values_list('pk', 'status'))[second.pk], 'pending'
+        )
+        # Uma leitura de ocorrências do lote e outra das confirmadas, sem N+1
+        self.assertEqual(len([sql for sql in statements if 'FROM "spaces_reservationoccurrence"' in sql]), 2)
+
+    def test_cancel_is_limited_to_own_reservations(self):
+        self.user.is_staff = False
+        self.user.save()
+        other = get_user_model().objects.create_user(username='outro', email='outro@cesmac.edu.br', password='x')
+        own = self.make_pending(8, 9)
+        foreign = self.make_pending(9, 10, user=other)
+
+        response, _ = self.post('cancel', [own.pk, foreign.pk])
+        self.assertEqual(response.data['updated'], [own.pk])
+        self.assertEqual(response.data['skipped'], [{'id': foreign.pk, 'reason': 'Reserva não encontrada'}])
+        self.assertEqual(self.post('confirm', [own.pk])[0].status_code, 403)
+
+    def test_complete_requires_confirmed(self):
+        pending = self.make_pending(8, 9)
+        confirmed = self.make_reservation(start_time=time(9, 0), end_time=time(10, 0))
+        response, _ = self.post('complete', [pending.pk, confirmed.pk])
+        self.assertEqual(response.data['updated'], [confirmed.pk])
+        self.assertIn('pending', response.data['skipped'][0]['reason'])
+
+    def test_invalid_ids(self):
+        for data in ({}, {'ids': []}, {'ids': ['1']}, {'ids': list(range(1, 502))}):
+            response = self.client.post('/api/reservations/cancel/', data, format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_admin_actions(self):
+        self.user.is_superuser = True
+        self.user.save()
+        self.client.force_login(self.user)
+        pending = self.make_pending(8, 9)
+        canceled = self.make_reservation(start_time=time(9, 0), end_time=time(10, 0), status='canceled')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/admin/spaces/reservation/', {
+                'action': 'confirm_selected',
+                '_selected_action': [pending.pk, canceled.pk],
+            }, follow=True)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'confirmado')
+        messages = [str(message) for message in response.context['messages']]
+        self.assertIn('1 reserva(s) atualizada(s).', messages)
+        self.assertTrue(any(str(canceled.pk) in message and 'canceled' in message for message in messages))
+
+
+class FreeSpaceSearchTests(SpacesTestMixin, APITestCase):
+    url = '/api/spaces/free/?date=2026-03-03&start=19:00&end=21:00'
+
+    def add_space(self, name, capacity, **kwargs):
+        data = {'building': self.building, 'space_type': self.space_type, 'floor_name': self.floor}
+        data.update(kwargs)
+        return Space.objects.create(name=name, capacity=capacity, **data)
+
+    def free_ids(self, query=''):
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [space['id'] for space in response.data]
+
+    def test_anti_join(self):
+        tuesday = date(2026, 3, 3)
+        adjacent = self.space
+        self.make_reservation(date=tuesday, start_time=time(18, 0), end_time=time(19, 0))
+        single = self.add_space('Sala 102', 50)
+        self.make_reservation(space=single, date=tuesday, start_time=time(20, 0), end_time=time(22, 0))
+        recurring = self.add_space('Sala 103', 60)
+        self.make_reservation(
+            space=recurring, date=date(2026, 3, 2), start_time=time(18, 30), end_time=time(19, 30),
+            is_recurring=True, recurring_days='ter', recurring_start_date=date(2026, 3, 1),
+            recurring_end_date=date(2026, 3, 31)
+        )
+        pending = self.add_space('Sala 104', 45)
+        self.make_reservation(space=pending, date=tuesday, start_time=time(19, 0), end_time=time(21, 0), status='pending')
+        canceled = self.add_space('Sala 105', 70)
+        self.make_reservation(space=canceled, date=tuesday, start_time=time(19, 0), end_time=time(21, 0), status='canceled')
+        other_day = self.add_space('Sala 106', 30)
+        self.make_reservation(space=other_day, date=date(2026, 3, 4), start_time=time(19, 0), end_time=time(21, 0))
+        self.add_space('Sala 107', 80, is_active=False)
+
+        self.assertEqual(self.free_ids(), [other_day.pk, adjacent.pk, canceled.pk])
+
+    def test_filters_and_single_query(self):
+        other_building = Building.objects.create(name='Campus II')
+        lab_type = SpaceType.objects.create(name='Laboratório')
+        small = self.add_space('Sala 102', 20)
+        lab = self.add_space('Lab 1', 45, space_type=lab_type)
+        far = self.add_space('Sala 201', 50, building=other_building, floor_name=None)
+
+        self.assertEqual(self.free_ids('&min_capacity=40'), [self.space.pk, lab.pk, far.pk])
+        self.assertEqual(self.free_ids(f'&min_capacity=40&building={self.building.pk}'), [self.space.pk, lab.pk])
+        self.assertEqual(self.free_ids(f'&type={lab_type.pk}'), [lab.pk])
+        self.assertIn(small.pk, self.free_ids())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url + '&fields=id,name')
+        self.assertEqual(set(response.data[0]), {'id', 'name'})
+        statements = [query['sql'] for query in queries.captured_queries if 'spaces_' in query['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertIn('NOT EXISTS', statements[0])
+
+    def test_invalid_parameters(self):
+        for query, field in (
+            ('/api/spaces/free/', 'date'),
+            ('/api/spaces/free/?date=2026-03-03&start=19:00', 'end'),
+            ('/api/spaces/free/?date=03/03/2026&start=19:00&end=21:00', 'date'),
+            ('/api/spaces/free/?date=2026-03-03&start=21:00&end=19:00', 'end'),
+            (self.url + '&min_capacity=muitos', 'min_capacity'),
+        ):
+            response = self.client.get(query)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(field, response.data)
+
+
+@tag('benchmark')
+class FreeSpaceSearchBenchmarkTests(SpacesTestMixin, APITestCase):
+    """Busca de salas livres com 3 mil salas, dois terços ocupados no horário"""
+    rooms = 3000
+
+    def setUp(self):
+        super().setUp()
+        spaces = Space.objects.bulk_create(
+            Space(name=f'Sala {index}', building=self.building, space_type=self.space_type,
+                  floor_name=self.floor, capacity=20 + index % 60)
+            for index in range(self.rooms)
+        )
+        tuesday = date(2026, 3, 3)
+        reservations = Reservation.objects.bulk_create(
+            Reservation(space=space, user=self.user, date=tuesday, start_time=time(7 + hour, 0),
+                        end_time=time(9 + hour, 0), status='confirmado')
+            for space in spaces
+            for hour in range(0, 14, 3)
+            if space.pk % 3
+        )
+        ReservationOccurrence.objects.bulk_create(
+            occurrence for reservation in reservations for occurrence in reservation.build_occurrences()
+        )
+
+    def test_search(self):
+        self.client.get('/api/users/profile/')
+        url = '/api/spaces/free/?date=2026-03-03&start=19:00&end=21:00&min_capacity=40&fields=id,name,capacity'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data)
+        self.assertEqual(len(queries.captured_queries), 1)
+
+
+class SpaceAlternativesTests(SpacesTestMixin, APITestCase):
+    window = '?date=2026-03-02&start=08:00&end=10:00'
+
+    def setUp(self):
+        super().setUp()
+        self.space.location_x, self.space.location_y = 0.5, 0.5
+        self.space.save()
+        self.upper = FloorPlan.objects.create(
+            building=self.building, name='1º andar', plan_image='floor_plans/primeiro.png',
+            plan_variants={'source': 'floor_plans/primeiro.png'}
+        )
+        self.rooms = {
+            'near': self.add_space(0.55, 0.5, 40),
+            'tie': self.add_space(0.45, 0.5, 60),
+            'busy': self.add_space(0.5, 0.52, 40),
+            'small': self.add_space(0.51, 0.5, 20),
+            'far': self.add_space(0.9, 0.9, 40),
+            'upstairs': self.add_space(0.5, 0.5, 40, floor_name=self.upper),
+            'other_campus': self.add_space(
+                0.5, 0.5, 40, building=Building.objects.create(name='Campus II'), floor_name=None
+            ),
+            'lab': self.add_space(0.5, 0.49, 40, space_type=SpaceType.objects.create(name='Laboratório')),
+        }
+        self.make_reservation(space=self.rooms['busy'], start_time=time(9, 0), end_time=time(11, 0))
+
+    def add_space(self, x, y, capacity, **kwargs):
+        data = {
+            'name': f'Sala {Space.objects.count() + 101}', 'building': self.building,
+            'space_type': self.space_type, 'floor_name': self.floor, 'capacity': capacity,
+            'location_x': x, 'location_y': y,
+        }
+        data.update(kwargs)
+        return Space.objects.create(**data)
+
+    def get_names(self, query=''):
+        response = self.client.get(f'/api/spaces/{self.space.pk}/alternatives/{self.window}{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        by_id = {space.pk: name for name, space in self.rooms.items()}
+        return [by_id[item['id']] for item in response.data]
+
+    def test_ranking(self):
+        self.assertEqual(self.get_names('&k=3'), ['near', 'tie', 'far'])
+        self.assertEqual(self.get_names('&k=10'), ['near', 'tie', 'far', 'upstairs', 'other_campus'])
+        self.assertEqual(self.get_names('&k=10&min_capacity=50'), ['tie'])
+
+        response = self.client.get(f'/api/spaces/{self.space.pk}/alternatives/{self.window}&k=1')
+        self.assertEqual(response.data[0]['distance'], 0.05)
+        self.assertTrue(response.data[0]['same_floor'])
+
+    def test_index_is_reused_until_spaces_change(self):
+        self.get_names()
+        with CaptureQueriesContext(connection) as queries:
+            self.get_names()
+        statements = [query['sql'] for query in queries.captured_queries if 'spaces_space' in query['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertIn('NOT EXISTS', statements[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rooms['closest'] = self.add_space(0.5, 0.51, 40)
+        self.assertEqual(self.get_names('&k=1'), ['closest'])
+
+    def test_conflict_response_suggests_rooms(self):
+        self.make_reservation()
+        response = self.client.post('/api/reservations/', {
+            'space': self.space.pk,
+            'date': '2026-03-02',
+            'start_time': '09:00',
+            'end_time': '11:00',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('non_field_errors', response.data)
+        self.assertEqual(response.data['alternatives'][0]['id'], self.rooms['near'].pk)
+
+    def test_invalid_parameters(self):
+        url = f'/api/spaces/{self.space.pk}/alternatives/'
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get(url + self.window + '&k=0').status_code, 400)
+        self.assertEqual(self.client.get(f'/api/spaces/9999/alternatives/{self.window}').status_code, 404)
+
+
+@tag('benchmark')
+class SpaceAlternativesBenchmarkTests(SpacesTestMixin, APITestCase):
+    """Sugestões com 40 andares de 50 salas: índice frio e reaproveitado"""
+
+    def setUp(self):
+        super().setUp()
+        spaces = []
+        for floor_number in range(40):
+            floor = FloorPlan.objects.create(
+                building=self.building, name=f'{floor_number}º andar', plan_image='floor_plans/andar.png',
+                plan_variants={'source': 'floor_plans/andar.png'}
+            )
+            spaces.extend(
+                Space(name=f'Sala {floor_number}{room:02d}', building=self.building, floor_name=floor,
+                      space_type=self.space_type, capacity=20 + room % 40,
+                      location_x=(room % 10) / 10 + 0.05, location_y=(room // 10) / 5 + 0.1)
+                for room in range(50)
+            )
+        Space.objects.bulk_create(spaces)
+        self.origin = Space.objects.filter(capacity=40).order_by('pk').first()
+
+    def test_suggestions(self):
+        url = f'/api/spaces/{self.origin.pk}/alternatives/?date=2026-03-02&start=08:00&end=10:00&min_capacity=30'
+        self.client.get('/api/users/profile/')
+        self.assertEqual(len(self.client.get(url).data), 5)
+        # Índice reaproveitado: só a consulta das salas livres
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(self.client.get(url).data), 5)
+        self.assertEqual(len([query for query in queries.captured_queries if 'spaces_space' in query['sql']]), 1)
+
+
+class RecurrenceMigrationTests(TransactionTestCase):
+    """0011 converte recurring_days/recurring_times/colunas por dia em máscara + ReservationSlot"""
+    before = [('spaces', '0010_floorplan_plan_tiles')]
+    after = [('spaces', '0011_reservation_slots')]
+
+    def tearDown(self):
+        MigrationExecutor(connection).migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+        super().tearDown()
+
+    def test_forward_migration(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+
+        building = apps.get_model('spaces', 'Building').objects.create(name='Campus I')
+        space = apps.get_model('spaces', 'Space').objects.create(
+            name='Sala 101', building=building, capacity=40,
+            space_type=apps.get_model('spaces', 'SpaceType').objects.create(name='Sala de Aula')
+        )
+        user = apps.get_model('accounts', 'CustomUser').objects.create(username='professor')
+        OldReservation = apps.get_model('spaces', 'Reservation')
+        common = {'space': space, 'user': user, 'date': date(2026, 3, 2),
+                  'start_time': time(8, 0), 'end_time': time(10, 0)}
+        # Frontend: códigos 'seg', horários no JSON
+        frontend = OldReservation.objects.create(
+            **common, is_recurring=True, recurring_days='seg,qua',
+            recurring_times={'seg': {'start': '19:00', 'end': '21:00'}},
+        )
+        # Admin: códigos '0'..'6', horários nas colunas
+        admin = OldReservation.objects.create(
+            **common, is_recurring=True, recurring_days='1,4',
+            tuesday_start=time(14, 0), tuesday_end=time(16, 0),
+        )
+        single = OldReservation.objects.create(**common, recurring_days='[]')
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+        apps = executor.loader.project_state(self.after).apps
+        Reservation = apps.get_model('spaces', 'Reservation')
+        Slot = apps.get_model('spaces', 'ReservationSlot')
+
+        masks = dict(Reservation.objects.values_list('pk', 'recurring_weekdays'))
+        self.assertEqual(masks, {frontend.pk: 0b101, admin.pk: 0b10010, single.pk: 0})
+        self.assertEqual(
+            sorted(Slot.objects.values_list('reservation_id', 'weekday', 'start_time', 'end_time')),
+            sorted([
+                (frontend.pk, 0, time(19, 0), time(21, 0)),
+                (frontend.pk, 2, time(8, 0), time(10, 0)),
+                (admin.pk, 1, time(14, 0), time(16, 0)),
+                (admin.pk, 4, time(8, 0), time(10, 0)),
+            ])
+        )
@@ -0,0 +1,157 @@
+import hashlib
+import logging
+import math
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .images import encode, open_plan
+
+# Pirâmide Deep Zoom (DZI): o nível `max_level` é a imagem original e cada
+# nível abaixo tem metade da largura e da altura, até 1x1 no nível 0.
+# Os tiles ficam em floor_plans/tiles/<id da planta>/<hash>/, então o hash do
+# arquivo original faz parte da URL e cada tile pode ser guardado para sempre
+# pelo navegador.
+TILE_SIZE = 256
+TILE_OVERLAP = 0
+TILE_FORMAT = 'webp'
+
+TILES_ROOT = 'floor_plans/tiles'
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(field_file, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with field_file.open('rb') as source:
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def get_max_level(width, height):
+    return math.ceil(math.log2(max(width, height, 1)))
+
+
+def get_level_size(width, height, level, max_level):
+    scale = 2 ** (max_level - level)
+    return max(1, math.ceil(width / scale)), max(1, math.ceil(height / scale))
+
+
+def to_level_pixels(x, y, tiles, level):
+    """
+    Converte a posição normalizada de uma sala (location_x/location_y, frações
+    de 0 a 1 da largura e da altura da planta) em pixels do nível informado
+    """
+    width, height = get_level_size(tiles['width'], tiles['height'], level, tiles['max_level'])
+    return x * width, y * height
+
+
+def get_tiles_dir(floor_id, digest):
+    return f'{TILES_ROOT}/{floor_id}/{digest}'
+
+
+def get_tile_name(floor_id, digest, level, column, row):
+    return f'{get_tiles_dir(floor_id, digest)}/{level}/{column}_{row}.{TILE_FORMAT}'
+
+
+def get_descriptor_name(floor_id, digest):
+    return f'{get_tiles_dir(floor_id, digest)}/plan.dzi'
+
+
+def build_descriptor(tiles):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+        f'TileSize="{tiles["tile_size"]}" Overlap="{tiles["overlap"]}" Format="{tiles["format"]}">'
+        f'<Size Width="{tiles["width"]}" Height="{tiles["height"]}"/>'
+        '</Image>'
+    )
+
+
+def generate_tiles(floor_plan, previous=None):
+    """
+    Gera a pirâmide de tiles da planta e retorna os metadados gravados em
+    FloorPlan.plan_tiles. Com o mesmo hash do original, nada é refeito; tiles
+    já gravados são reaproveitados, então uma geração interrompida continua
+    de onde parou. Se o original não puder ser lido (ou passar de
+    FLOOR_PLAN_MAX_PIXELS), mantém os metadados atuais.
+    """
+    previous = previous or {}
+    try:
+        return _generate_tiles(floor_plan, previous)
+    except (OSError, ValueError, UnidentifiedImageError, Image.DecompressionBombError) as error:
+        logger.warning('Não foi possível gerar tiles de %s: %s', floor_plan.plan_image.name, error)
+        return previous
+
+
+def _generate_tiles(floor_plan, previous):
+    field_file = floor_plan.plan_image
+    storage = field_file.storage
+    digest = file_hash(field_file)
+    if previous.get('hash') == digest and previous.get('complete'):
+        return previous
+
+    with field_file.open('rb') as source:
+        image = ImageOps.exif_transpose(open_plan(source))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or 'A' in image.mode else 'RGB')
+
+    width, height = image.size
+    max_level = get_max_level(width, height)
+    tiles = {
+        'hash': digest,
+        'width': width,
+        'height': height,
+        'tile_size': TILE_SIZE,
+        'overlap': TILE_OVERLAP,
+        'format': TILE_FORMAT,
+        'max_level': max_level,
+    }
+
+    level_image = image
+    for level in range(max_level, -1, -1):
+        level_width, level_height = get_level_size(width, height, level, max_level)
+        if level_image.size != (level_width, level_height):
+            level_image = level_image.resize((level_width, level_height), Image.LANCZOS)
+
+        for column in range(math.ceil(level_width / TILE_SIZE)):
+            for row in range(math.ceil(level_height / TILE_SIZE)):
+                name = get_tile_name(floor_plan.pk, digest, level, column, row)
+                if storage.exists(name):
+                    continue
+                box = (
+                    column * TILE_SIZE,
+                    row * TILE_SIZE,
+                    min((column + 1) * TILE_SIZE, level_width),
+                    min((row + 1) * TILE_SIZE, level_height),
+                )
+                storage.save(name, ContentFile(encode(level_image.crop(box), TILE_FORMAT)))
+
+    # O descritor é gravado por último: sua presença indica pirâmide completa
+    descriptor = get_descriptor_name(floor_plan.pk, digest)
+    if not storage.exists(descriptor):
+        storage.save(descriptor, ContentFile(build_descriptor(tiles).encode()))
+
+    if previous.get('hash') and previous['hash'] != digest:
+        delete_tiles(floor_plan.pk, previous, storage)
+
+    tiles['complete'] = True
+    return tiles
+
+
+def delete_tiles(floor_id, tiles, storage):
+    """Remove os arquivos de uma pirâmide (planta trocada ou excluída)"""
+    if not tiles or not tiles.get('hash'):
+        return
+    root = get_tiles_dir(floor_id, tiles['hash'])
+    for level in range(tiles.get('max_level', -1) + 1):
+        level_dir = f'{root}/{level}'
+        try:
+            _, files = storage.listdir(level_dir)
+        except FileNotFoundError:
+            continue
+        for name in files:
+            storage.delete(f'{level_dir}/{name}')
+    storage.delete(get_descriptor_name(floor_id, tiles['hash']))
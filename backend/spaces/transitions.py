@@ -0,0 +1,101 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from .conflicts import build_indexes, format_conflicts
+from .models import Reservation, ReservationOccurrence, Space
+from .notifications import notify_status_changes
+from .signals import bump_reservation_versions, publish_reservation_event
+
+# Mudanças de status em lote: status de destino → status de origem aceitos
+TRANSITIONS = {
+    'confirmado': ('pending',),
+    'canceled': ('pending', 'confirmado'),
+    'completed': ('confirmado',),
+}
+
+
+def bulk_transition(queryset, ids, target):
+    """
+    Leva as reservas `ids` (procuradas dentro de `queryset`) para o status
+    `target` com um único UPDATE condicional, e as ocorrências com outro.
+    Na confirmação, os horários são conferidos de uma vez contra as reservas
+    já confirmadas e contra as confirmadas no próprio lote.
+
+    Retorna (ids atualizados, {id ignorado: motivo}). Como o UPDATE não passa
+    por Reservation.save, versões, eventos e notificações são feitos aqui.
+    """
+    sources = TRANSITIONS[target]
+    ids = list(dict.fromkeys(ids))
+    skipped = {}
+
+    with transaction.atomic():
+        reservations = list(
+            queryset.filter(pk__in=ids).select_related('space').select_for_update(of=('self',)).order_by('pk')
+        )
+        found = {reservation.pk for reservation in reservations}
+        skipped.update({pk: 'Reserva não encontrada' for pk in ids if pk not in found})
+
+        candidates = []
+        for reservation in reservations:
+            if reservation.status in sources:
+                candidates.append(reservation)
+            else:
+                skipped[reservation.pk] = f"Status atual não permite a mudança: {reservation.status}"
+
+        if target == 'confirmado' and candidates:
+            conflicting = find_confirmation_conflicts(candidates)
+            skipped.update(conflicting)
+            candidates = [reservation for reservation in candidates if reservation.pk not in conflicting]
+
+        updated = [reservation.pk for reservation in candidates]
+        if updated:
+            Reservation.objects.filter(pk__in=updated, status__in=sources).update(status=target)
+            ReservationOccurrence.objects.filter(reservation_id__in=updated).update(status=target)
+
+            for reservation in candidates:
+                reservation.status = target
+                publish_reservation_event(reservation, 'updated')
+            for space_id, user_id in {(r.space_id, r.user_id) for r in candidates}:
+                bump_reservation_versions(space_id, user_id)
+            notify_status_changes(candidates)
+
+    return updated, {pk: skipped[pk] for pk in ids if pk in skipped}
+
+
+def find_confirmation_conflicts(candidates):
+    """
+    {id: motivo} das reservas do lote cujas ocorrências se sobrepõem a uma
+    reserva confirmada ou a outra do lote confirmada antes (ordem de id).
+    Uma consulta para as ocorrências do lote e outra para as confirmadas.
+    """
+    space_ids = sorted({reservation.space_id for reservation in candidates})
+    # Mesmo bloqueio da criação de reservas: ninguém ocupa o horário no meio
+    list(Space.objects.select_for_update().filter(pk__in=space_ids).order_by('pk').values_list('pk', flat=True))
+
+    occurrences = defaultdict(list)
+    for reservation_id, day, start, end in ReservationOccurrence.objects.filter(
+        reservation_id__in=[reservation.pk for reservation in candidates],
+        start_time__isnull=False,
+        end_time__isnull=False
+    ).values_list('reservation_id', 'date', 'start_time', 'end_time'):
+        occurrences[reservation_id].append((day, start, end))
+    days = [day for slots in occurrences.values() for day, _, _ in slots]
+    if not days:
+        return {}
+
+    indexes = build_indexes(space_ids, min(days), max(days), statuses=('confirmado',))
+    conflicting = {}
+    for reservation in candidates:
+        slots = sorted(occurrences.get(reservation.pk, ()))
+        conflicts = [
+            (day, start, end, other)
+            for day, start, end in slots
+            for _, _, other in indexes[(reservation.space_id, day)].overlapping(start, end)
+        ]
+        if conflicts:
+            conflicting[reservation.pk] = format_conflicts(conflicts)
+            continue
+        for day, start, end in slots:
+            indexes[(reservation.space_id, day)].add(start, end, reservation.pk)
+    return conflicting
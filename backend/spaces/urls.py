@@ -1,18 +1,33 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework.authtoken.views import obtain_auth_token
 from . import views
 
 # Criar router para ViewSets
 router = DefaultRouter()
 router.register(r'reservations', views.ReservationViewSet, basename='reservation')
+router.register(r'notifications', views.NotificationViewSet, basename='notification')
 
 urlpatterns = [
+    # Antes do router, senão 'async' casaria com a rota de detalhe
+    path('reservations/async/', views.ReservationList.as_view(), name='reservation-list-async'),
     path('', include(router.urls)),  # Inclui as rotas do router
-    path('auth/login/', obtain_auth_token, name='auth_login'),
+    path('auth/login/', views.login, name='auth_login'),
+    path('catalog/', views.Catalog.as_view(), name='catalog'),
     path('buildings/', views.BuildingList.as_view(), name='building-list'),
     path('buildings/<int:pk>/floors/', views.FloorList.as_view(), name='floor-list'),
     path('spaces/', views.SpaceList.as_view(), name='space-list'),
+    path('spaces/free/', views.FreeSpaceList.as_view(), name='space-free'),
+    path('floor-plans/<int:pk>/tiles/<str:digest>/plan.dzi', views.floor_plan_tile, name='floor-plan-dzi'),
+    path(
+        'floor-plans/<int:pk>/tiles/<str:digest>/<int:level>/<int:column>_<int:row>.webp',
+        views.floor_plan_tile,
+        name='floor-plan-tile'
+    ),
     path('spaces/<int:pk>/availability/', views.SpaceAvailability.as_view(), name='space-availability'),
+    path('spaces/<int:pk>/alternatives/', views.SpaceAlternatives.as_view(), name='space-alternatives'),
+    path('spaces/<int:pk>/events/', views.SpaceEvents.as_view(), name='space-events'),
+    path('spaces/<int:pk>/calendar/', views.SpaceCalendar.as_view(), name='space-calendar'),
+    path('spaces/<int:pk>/calendar.ics', views.SpaceCalendarFeed.as_view(), name='space-calendar-feed'),
+    path('users/me/calendar.ics', views.UserCalendarFeed.as_view(), name='user-calendar-feed'),
     path('users/profile/', views.UserProfile.as_view(), name='user-profile'),
 ]
\ No newline at end of file
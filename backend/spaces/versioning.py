@@ -0,0 +1,60 @@
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.cache import cache
+
+# Carimbos de versão guardados no cache compartilhado. Cada chave identifica um
+# conjunto de dados (ex.: reservas de uma sala) e recebe o horário da última
+# alteração. Uma chave ausente (cache limpo) ganha um carimbo novo, o que
+# apenas força os clientes a baixar de novo.
+PREFIX = 'version:'
+
+
+def bump_version(key):
+    version = time.time()
+    cache.set(PREFIX + key, version, timeout=None)
+    return version
+
+
+def get_versions(*keys):
+    found = cache.get_many([PREFIX + key for key in keys])
+    versions = {}
+    for key in keys:
+        version = found.get(PREFIX + key)
+        versions[key] = version if version is not None else bump_version(key)
+    return versions
+
+
+async def abump_version(key):
+    version = time.time()
+    await cache.aset(PREFIX + key, version, timeout=None)
+    return version
+
+
+async def aget_versions(*keys):
+    found = await cache.aget_many([PREFIX + key for key in keys])
+    versions = {}
+    for key in keys:
+        version = found.get(PREFIX + key)
+        versions[key] = version if version is not None else await abump_version(key)
+    return versions
+
+
+def get_etag(*keys, variant=''):
+    """
+    ETag e Last-Modified derivados das versões das chaves informadas.
+    `variant` distingue representações diferentes dos mesmos dados (ex.: a
+    query string de uma listagem filtrada).
+    """
+    return etag_from_versions(get_versions(*keys), variant)
+
+
+async def aget_etag(*keys, variant=''):
+    return etag_from_versions(await aget_versions(*keys), variant)
+
+
+def etag_from_versions(versions, variant=''):
+    digest = hashlib.md5((repr(sorted(versions.items())) + variant).encode()).hexdigest()
+    last_modified = datetime.fromtimestamp(int(max(versions.values())), tz=dt_timezone.utc)
+    return f'"{digest}"', last_modified
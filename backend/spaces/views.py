@@ -1,27 +1,94 @@
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.cache import cache
 from django.contrib.admin.views.decorators import staff_member_required
 from .models import FloorPlan
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
-from django.contrib.auth import get_user_model, authenticate
-from .models import Building, FloorPlan, Space, Reservation
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from .models import Building, FloorPlan, Space, Reservation, ReservationOccurrence, ReservationSlot, Notification
+from .async_api import AsyncAPIView, json_response
+from .authentication import CachedTokenAuthentication, QueryStringTokenAuthentication
+from .backends import get_login_lookup
+from .conflicts import ACTIVE_STATUSES, add_to_indexes, build_indexes, find_conflicts, format_conflicts, get_occurrence_slots
+from .events import get_broker, space_channel
+from .exports import EXPORT_FORMATS, export_reservations
+from .filters import FreeSpaceFilterBackend, ReservationFilterBackend
+from .images import CONTENT_TYPES
+from .tiles import TILE_FORMAT, get_descriptor_name, get_tile_name
+from .transitions import bulk_transition
+from .ical import ICalendarRenderer, build_calendar
+from .notifications import get_unread_count, mark_all_read, mark_read, notify_new_reservations
+from .pagination import NotificationPagination, ReservationPagination
+from .proximity import suggest_alternatives
+from .signals import CATALOG_VERSION_KEYS, bump_reservation_versions, publish_reservation_event
+from .versioning import aget_etag, get_etag
 from .serializers import (
     BuildingSerializer,
     FloorPlanSerializer,
     SpaceSerializer,
     ReservationSerializer,
+    ReservationRowSerializer,
+    get_fieldset,
+    NotificationSerializer,
     UserProfileSerializer
 )
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from django.contrib.auth import authenticate
 from rest_framework.authtoken.models import Token
 from rest_framework import viewsets
 from rest_framework.decorators import action
+from django.db import transaction
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, urlencode
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from django.conf import settings
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from operator import itemgetter
+import asyncio
+import calendar
+import json
+
+# Validade do catálogo serializado no cache (a chave já muda a cada alteração)
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Eventos ao vivo: intervalo do keepalive e espera sugerida para reconexão
+EVENTS_KEEPALIVE_SECONDS = 15
+EVENTS_RETRY_MS = 5000
+
+# Dias de histórico incluídos nos feeds iCalendar
+FEED_HISTORY_DAYS = 90
+
+# Quantidade máxima de reservas aceitas por POST /api/reservations/batch/
+BATCH_MAX_SIZE = 50
+
+# Quantidade máxima de ids em /api/reservations/confirm|cancel|complete/
+TRANSITION_MAX_SIZE = 500
+
+# Sugestões de salas em /api/spaces/<id>/alternatives/ (padrão e máximo) e
+# na resposta de conflito ao criar uma reserva
+ALTERNATIVES_DEFAULT = 5
+ALTERNATIVES_MAX = 20
+
+# Faixas de horário usadas pelo verificador de disponibilidade
+PERIODS = {
+    'matutino': ('07:00', '12:00'),
+    'vesperino': ('13:00', '18:00'),
+    'noturno': ('18:30', '22:00'),
+}
 
 @staff_member_required
 def get_floor_plan(request):
@@ -54,27 +121,124 @@ def get_floor_plan(request):
             'error': 'Erro ao carregar a planta'
         })
 
-class BuildingList(generics.ListAPIView):
+# Tiles e descritores têm o hash da planta na URL: nunca mudam de conteúdo
+TILE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+TILE_CONTENT_TYPES = {
+    'dzi': 'application/xml',
+    TILE_FORMAT: CONTENT_TYPES[TILE_FORMAT],
+}
+
+@require_GET
+def floor_plan_tile(request, pk, digest, level=None, column=None, row=None):
+    """
+    Descritor DZI (sem level) ou um tile da pirâmide da planta. Público, como
+    os demais arquivos de MEDIA, e lido direto do storage, sem consulta ao banco.
+    """
+    if not digest.isalnum():
+        raise Http404
+    if level is None:
+        name, content_type = get_descriptor_name(pk, digest), TILE_CONTENT_TYPES['dzi']
+    else:
+        name, content_type = get_tile_name(pk, digest, level, column, row), TILE_CONTENT_TYPES[TILE_FORMAT]
+
+    try:
+        response = FileResponse(default_storage.open(name), content_type=content_type)
+    except FileNotFoundError:
+        raise Http404
+    response['Cache-Control'] = TILE_CACHE_CONTROL
+    return response
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    # O cliente guarda a resposta, mas revalida sempre com If-None-Match
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+class ConditionalListMixin:
+    """
+    Listagens que mudam raramente: o ETag e o Last-Modified vêm dos carimbos
+    de versão de `version_keys`, e um cliente atualizado recebe 304 antes de
+    qualquer consulta ao banco ou serialização. Filtros e ?fields= mudam o
+    conteúdo, então a query string também entra no ETag.
+    """
+    version_keys = ()
+
+    def get_etag_variant(self, request):
+        # Parâmetros em ordem de nome: ?a=1&b=2 e ?b=2&a=1 têm o mesmo ETag
+        params = sorted(
+            ((key, value) for key, values in request.query_params.lists() for value in values),
+            key=itemgetter(0)
+        )
+        return urlencode(params)
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = get_etag(*self.version_keys, variant=self.get_etag_variant(request))
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        response = super().list(request, *args, **kwargs)
+        # O mesmo endereço responde 401 sem o token
+        patch_vary_headers(response, ('Authorization',))
+        return set_validators(response, etag, last_modified)
+
+class BuildingList(ConditionalListMixin, generics.ListAPIView):
     queryset = Building.objects.all()
     serializer_class = BuildingSerializer
     permission_classes = [IsAuthenticated]
+    version_keys = ('model:building',)
 
-class FloorList(generics.ListAPIView):
+class FloorList(ConditionalListMixin, generics.ListAPIView):
     serializer_class = FloorPlanSerializer
     permission_classes = [IsAuthenticated]
+    version_keys = ('model:floorplan',)
 
     def get_queryset(self):
         building_id = self.kwargs['pk']
         return FloorPlan.objects.filter(building_id=building_id)
 
-class SpaceList(generics.ListAPIView):
+class SpaceFieldsMixin:
+    """Salas com ?fields=/?omit= limitando as colunas e junções da consulta"""
     serializer_class = SpaceSerializer
+    # Colunas que cada campo do SpaceSerializer lê
+    field_columns = {
+        'id': 'id',
+        'name': 'name',
+        'building': 'building',
+        'building_name': 'building__name',
+        'floor_name': 'floor_name__name',
+        'capacity': 'capacity',
+        'location_x': 'location_x',
+        'location_y': 'location_y',
+    }
+
+    def get_fieldset(self):
+        return get_fieldset(self.request.query_params, list(self.field_columns))
+
+    def get_space_queryset(self):
+        fields = self.get_fieldset() or list(self.field_columns)
+        columns = [self.field_columns[name] for name in fields]
+        queryset = Space.objects.only(*columns)
+        # Só as junções dos nomes pedidos (select_related() vazio seguiria todas)
+        related = {column.split('__')[0] for column in columns if '__' in column}
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_fieldset())
+        return super().get_serializer(*args, **kwargs)
+
+class SpaceList(SpaceFieldsMixin, ConditionalListMixin, generics.ListAPIView):
+    """Salas, com os filtros ?building= e ?floor="""
     permission_classes = [IsAuthenticated]
+    version_keys = ('model:space', 'model:building', 'model:floorplan')
 
     def get_queryset(self):
         building = self.request.query_params.get('building')
         floor = self.request.query_params.get('floor')
-        queryset = Space.objects.all()
+        queryset = self.get_space_queryset()
         
         if building:
             queryset = queryset.filter(building_id=building)
@@ -83,117 +247,418 @@ class SpaceList(generics.ListAPIView):
             
         return queryset
 
-class SpaceAvailability(APIView):
+class FreeSpaceList(SpaceFieldsMixin, generics.ListAPIView):
+    """
+    GET /api/spaces/free/?date=&start=&end=: salas livres na janela (ver
+    FreeSpaceFilterBackend), da menor capacidade que atende para a maior
+    """
     permission_classes = [IsAuthenticated]
+    filter_backends = [FreeSpaceFilterBackend]
 
-    def get(self, request, pk):
-        date = request.query_params.get('date')
+    def get_queryset(self):
+        return self.get_space_queryset().order_by('capacity', 'name', 'id')
+
+class Catalog(AsyncAPIView):
+    """
+    Árvore completa campus → andares → salas ativas em uma resposta.
+    Montada com três consultas e guardada já serializada no cache
+    compartilhado, com a versão do catálogo na chave: qualquer alteração em
+    Building, FloorPlan ou Space gera uma chave nova.
+    """
+    version_keys = tuple(CATALOG_VERSION_KEYS.values())
+
+    async def get(self, request):
+        # As URLs das plantas são absolutas, então cada endereço do servidor
+        # tem o seu ETag (e a sua cópia no cache)
+        etag, last_modified = await aget_etag(*self.version_keys, variant=request.build_absolute_uri('/'))
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        cache_key = f'catalog:{etag.strip(chr(34))}'
+        content = await cache.aget(cache_key)
+        if content is None:
+            buildings, floors, spaces = get_catalog_querysets()
+            content = JSONRenderer().render(build_catalog(
+                [building async for building in buildings],
+                [floor async for floor in floors],
+                [space async for space in spaces],
+                self.drf_request,
+            ))
+            await cache.aset(cache_key, content, CATALOG_CACHE_TIMEOUT)
+
+        response = HttpResponse(content, content_type='application/json')
+        return set_validators(response, etag, last_modified)
+
+def get_catalog_querysets():
+    return (
+        Building.objects.all(),
+        FloorPlan.objects.order_by('name', 'pk'),
+        Space.objects.filter(is_active=True).select_related(
+            'building', 'floor_name'
+        ).order_by('name', 'pk'),
+    )
+
+def build_catalog(buildings, floors, spaces, request):
+    floors_by_building = {}
+    for floor in floors:
+        floors_by_building.setdefault(floor.building_id, []).append(floor)
+    spaces_by_floor = {}
+    for space in spaces:
+        spaces_by_floor.setdefault((space.building_id, space.floor_name_id), []).append(space)
+
+    catalog = []
+    for building in buildings:
+        building_data = BuildingSerializer(building).data
+        building_data['floors'] = []
+        for floor in floors_by_building.get(building.pk, []):
+            floor_data = FloorPlanSerializer(floor, context={'request': request}).data
+            floor_data['spaces'] = SpaceSerializer(
+                spaces_by_floor.get((building.pk, floor.pk), []), many=True
+            ).data
+            building_data['floors'].append(floor_data)
+        # Salas ainda sem andar cadastrado
+        building_data['spaces_without_floor'] = SpaceSerializer(
+            spaces_by_floor.get((building.pk, None), []), many=True
+        ).data
+        catalog.append(building_data)
+    return catalog
+
+class SpaceAvailability(AsyncAPIView):
+    async def get(self, request, pk):
+        date = request.GET.get('date')
         if not date:
-            return Response(
-                {"error": "Date parameter is required"}, 
+            return json_response(
+                {"error": "Date parameter is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         # Check if space has any reservations for the given date
-        has_reservations = Reservation.objects.filter(
+        has_reservations = await ReservationOccurrence.objects.filter(
             space_id=pk,
             date=date
-        ).exists()
+        ).aexists()
 
-        return Response({"available": not has_reservations})
+        return json_response({"available": not has_reservations})
 
-class UserProfile(APIView):
+class SpaceAlternatives(APIView):
+    """
+    GET /api/spaces/<id>/alternatives/?date=&start=&end=: as ?k= melhores salas
+    livres do mesmo tipo na mesma janela, por proximidade (ver
+    proximity.suggest_alternatives). Aceita ?min_capacity=.
+    """
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        serializer = UserProfileSerializer(request.user)
-        return Response(serializer.data)
+    def get(self, request, pk):
+        params = request.query_params
+        backend = FreeSpaceFilterBackend()
+        day, start, end = backend.parse_window(params)
+        k = backend.parse_id('k', params['k']) if params.get('k') else ALTERNATIVES_DEFAULT
+        if not 1 <= k <= ALTERNATIVES_MAX:
+            return Response(
+                {"k": f"Use um valor entre 1 e {ALTERNATIVES_MAX}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        min_capacity = params.get('min_capacity')
+        if min_capacity:
+            min_capacity = backend.parse_id('min_capacity', min_capacity)
 
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def debug_login(request):
-    username = request.data.get('username')
-    password = request.data.get('password')
-    
-    print(f"Debug login attempt for {username}")
-    
-    User = get_user_model()
-    try:
-        user = User.objects.get(username=username)
-        print(f"User found: {user.username}")
-        print(f"Password valid: {user.check_password(password)}")
-        
-        # Try authentication
-        auth_user = authenticate(request, username=username, password=password)
-        print(f"Auth result: {auth_user}")
-        
-        if auth_user:
-            from rest_framework.authtoken.models import Token
-            token, _ = Token.objects.get_or_create(user=auth_user)
-            return Response({
-                'token': token.key,
-                'user': {
-                    'id': auth_user.id,
-                    'username': auth_user.username,
-                    'email': auth_user.email,
-                    'first_name': auth_user.first_name,
-                    'last_name': auth_user.last_name
-                }
+        alternatives = suggest_alternatives(pk, day, start, end, k=k, min_capacity=min_capacity or None)
+        if alternatives is None:
+            raise NotFound('Sala não encontrada')
+        return Response(alternatives)
+
+class SpaceEvents(AsyncAPIView):
+    """
+    Fluxo Server-Sent Events com as alterações das reservas da sala
+    (criação, mudança de status, exclusão), para o calendário não precisar
+    refazer consultas periódicas. Aceita ?token= porque o EventSource do
+    navegador não envia cabeçalhos. Só funciona sob ASGI: sob WSGI cada
+    conexão aberta prenderia uma thread do servidor.
+    """
+    authentication_classes = (CachedTokenAuthentication, QueryStringTokenAuthentication)
+
+    async def get(self, request, pk):
+        if not isinstance(request, ASGIRequest):
+            return json_response(
+                {'detail': 'Eventos ao vivo exigem o servidor ASGI'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        if not await Space.objects.filter(pk=pk).aexists():
+            raise NotFound('Sala não encontrada')
+
+        response = StreamingHttpResponse(self.stream(space_channel(pk)), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # sem buffer no proxy (nginx)
+        return response
+
+    async def stream(self, channel):
+        broker = get_broker()
+        queue = broker.subscribe(channel)
+        try:
+            yield f'retry: {EVENTS_RETRY_MS}\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comentário SSE: mantém a conexão viva em proxies
+                    yield ': keepalive\n\n'
+                    continue
+                yield f'event: reservation\ndata: {json.dumps(event)}\n\n'
+        finally:
+            broker.unsubscribe(channel, queue)
+
+class SpaceCalendar(APIView):
+    """
+    Disponibilidade de uma sala para um mês inteiro.
+    Consulta as ocorrências confirmadas (reservas únicas e recorrentes já
+    expandidas) e retorna um status por dia, junto com os dados do tooltip.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        month = request.query_params.get('month')
+        period = request.query_params.get('period') or None
+
+        try:
+            if month:
+                first_day = datetime.strptime(month, '%Y-%m').date()
+            else:
+                first_day = timezone.localdate().replace(day=1)
+        except ValueError:
+            return Response(
+                {"error": "Parâmetro month deve estar no formato YYYY-MM"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if period and period not in PERIODS:
+            return Response(
+                {"error": f"Período inválido. Use um de: {', '.join(PERIODS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        last_day = first_day.replace(day=calendar.monthrange(first_day.year, first_day.month)[1])
+        period_range = None
+        if period:
+            period_start, period_end = PERIODS[period]
+            period_range = (
+                datetime.strptime(period_start, '%H:%M').time(),
+                datetime.strptime(period_end, '%H:%M').time(),
+            )
+
+        occurrences = ReservationOccurrence.objects.select_related(
+            'reservation',
+            'reservation__user'
+        ).filter(
+            space_id=pk,
+            date__range=(first_day, last_day),
+            status='confirmado'
+        )
+        if period_range:
+            occurrences = occurrences.filter(
+                start_time__lt=period_range[1],
+                end_time__gt=period_range[0]
+            )
+
+        days = {}
+        for occurrence in occurrences:
+            days.setdefault(occurrence.date, []).append(
+                (occurrence.reservation, occurrence.start_time, occurrence.end_time)
+            )
+
+        results = []
+        current = first_day
+        while current <= last_day:
+            occurrences = sorted(days.get(current, []), key=lambda item: item[1] or datetime.min.time())
+            if not occurrences:
+                day_status = 'disponivel'
+            elif any(not reservation.is_recurring for reservation, _, _ in occurrences):
+                day_status = 'ocupado'
+            else:
+                day_status = 'ocupado-recorrente'
+
+            results.append({
+                'date': current.isoformat(),
+                'status': day_status,
+                'reservations': [
+                    {
+                        'user_name': (reservation.user.email or '').split('@')[0] or 'Usuário',
+                        'user_email': reservation.user.email,
+                        'phone': reservation.phone or 'Não informado',
+                        'course': reservation.course or 'Não informado',
+                        'start_time': start.strftime('%H:%M') if start else '',
+                        'end_time': end.strftime('%H:%M') if end else '',
+                        'is_recurring': reservation.is_recurring,
+                    }
+                    for reservation, start, end in occurrences
+                ],
             })
-        
-    except User.DoesNotExist:
-        print(f"User not found: {username}")
-        return Response({
-            'detail': 'Usuário não encontrado'
-        }, status=401)
-    
-    return Response({
-        'detail': 'Credenciais inválidas'
-    }, status=401)
-
-@api_view(['POST'])
-@permission_classes([AllowAny])
-def test_login(request):
-    username = request.data.get('username')
-    password = request.data.get('password')
-    
-    print(f"Login attempt - Username: {username}")
-    
-    if not username or not password:
-        return Response({
-            'detail': 'Username and password are required'
-        }, status=400)
-    
-    user = authenticate(username=username, password=password)
-    print(f"Authentication result: {user}")
-    
-    if user:
-        token, created = Token.objects.get_or_create(user=user)
-        print(f"Token: {token.key} (Created: {created})")
-        
+            current += timedelta(days=1)
+
         return Response({
-            'token': token.key,
-            'user': {
-                'username': user.username,
-                'email': user.email
-            }
+            'space': pk,
+            'month': first_day.strftime('%Y-%m'),
+            'period': period,
+            'days': results,
         })
-    
-    return Response({
-        'detail': 'Invalid credentials'
-    }, status=401)
 
-class ReservationViewSet(viewsets.ModelViewSet):
-    serializer_class = ReservationSerializer
+class CalendarFeedView(APIView):
+    """
+    Base dos feeds iCalendar (assinatura em aplicativos de calendário).
+    O ETag vem dos carimbos de versão do cache, então um feed sem mudanças
+    responde 304 sem consultar a tabela de reservas.
+    """
     permission_classes = [IsAuthenticated]
+    authentication_classes = [*api_settings.DEFAULT_AUTHENTICATION_CLASSES, QueryStringTokenAuthentication]
+    renderer_classes = [ICalendarRenderer]
+    # Reservas do feed: as da sala ('space') ou as do usuário ('user'), com
+    # o id vindo de get_scope_id()
+    scope = 'space'
+    calendar_name = 'Reservas'
 
-    def get_queryset(self):
-        return Reservation.objects.select_related(
+    def get_scope_id(self):
+        return self.kwargs['pk']
+
+    def get_calendar_name(self):
+        return self.calendar_name
+
+    def get(self, request, *args, **kwargs):
+        scope_id = self.get_scope_id()
+        etag, last_modified = get_etag(f'reservations:{self.scope}:{scope_id}', *CATALOG_VERSION_KEYS.values())
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        since = timezone.localdate() - timedelta(days=FEED_HISTORY_DAYS)
+        reservations = Reservation.objects.filter(**{f'{self.scope}_id': scope_id}).select_related(
             'space',
             'space__building',
             'space__floor_name',
             'user'
-        ).filter(user=self.request.user).order_by('-date', '-start_time')
+        ).exclude(status='canceled').filter(
+            Q(is_recurring=False, date__gte=since) |
+            Q(is_recurring=True, recurring_end_date__gte=since)
+        ).prefetch_related('slots').order_by('pk')
+
+        response = Response(build_calendar(self.get_calendar_name(), reservations))
+        return set_validators(response, etag, last_modified)
+
+class SpaceCalendarFeed(CalendarFeedView):
+    def get_calendar_name(self):
+        space = get_object_or_404(Space.objects.select_related('building'), pk=self.kwargs['pk'])
+        return f'{space.name} - {space.building.name}'
+
+class UserCalendarFeed(CalendarFeedView):
+    scope = 'user'
+    calendar_name = 'Minhas reservas'
+
+    def get_scope_id(self):
+        return self.request.user.pk
+
+class UserProfile(AsyncAPIView):
+    async def get(self, request):
+        return json_response(UserProfileSerializer(request.user).data)
+
+# Pool limitado para o PBKDF2 do login: rajadas de login não ocupam todas as
+# threads do servidor nem bloqueiam o event loop sob ASGI
+LOGIN_EXECUTOR = ThreadPoolExecutor(
+    max_workers=settings.LOGIN_HASH_WORKERS,
+    thread_name_prefix='login-hash'
+)
+
+async def run_hasher(function, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(LOGIN_EXECUTOR, partial(function, *args))
+
+@csrf_exempt
+@require_POST
+async def login(request):
+    """
+    Login por nome de usuário ou e-mail institucional. Retorna o token e o
+    perfil na mesma resposta.
+    """
+    try:
+        data = json.loads(request.body or b'{}') if request.content_type == 'application/json' else request.POST
+        username = (data.get('username') or '').strip()
+        password = data.get('password') or ''
+    except (ValueError, AttributeError):
+        return JsonResponse({'detail': 'Requisição inválida'}, status=400)
+
+    if not username or not password:
+        return JsonResponse({'detail': 'Informe usuário e senha'}, status=400)
+
+    User = get_user_model()
+    user = await User.objects.filter(**get_login_lookup(username)).afirst()
+    if user is None:
+        # Mesmo custo de um usuário existente (evita enumeração por tempo)
+        await run_hasher(make_password, password)
+        return JsonResponse({'detail': 'Credenciais inválidas'}, status=401)
+
+    outdated = []
+    valid = await run_hasher(check_password, password, user.password, outdated.append)
+    if not valid or not user.is_active:
+        return JsonResponse({'detail': 'Credenciais inválidas'}, status=401)
+
+    if outdated:
+        # Hasher ou número de iterações mudou: regrava a senha no formato atual
+        user.password = await run_hasher(make_password, password)
+        await user.asave(update_fields=['password'])
+
+    token, _ = await Token.objects.aget_or_create(user=user)
+    return JsonResponse({
+        'token': token.key,
+        'user': UserProfileSerializer(user).data,
+    })
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Notificações do usuário, mais recentes primeiro (paginação por cursor,
+    ?read=true|false). O contador de não lidas vem de NotificationCounter,
+    sem contar linhas.
+    """
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = NotificationPagination
+
+    def get_queryset(self):
+        queryset = Notification.objects.filter(user=self.request.user)
+        read = self.request.query_params.get('read')
+        if read in ('true', 'false'):
+            queryset = queryset.filter(read=read == 'true')
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        return Response({'unread': get_unread_count(request.user)})
+
+    @action(detail=True, methods=['post'])
+    def read(self, request, pk=None):
+        if not mark_read(request.user, pk):
+            get_object_or_404(self.get_queryset(), pk=pk)
+        return Response({'unread': get_unread_count(request.user)})
+
+    @action(detail=False, methods=['post'])
+    def read_all(self, request):
+        updated = mark_all_read(request.user)
+        return Response({'updated': updated, 'unread': 0})
+
+def get_reservation_queryset():
+    """Reservas com sala, campus, andar e usuário já carregados para o serializer"""
+    return Reservation.objects.select_related(
+        'space',
+        'space__building',
+        'space__floor_name',
+        'user'
+    ).order_by('-date', '-start_time')
+
+class ReservationViewSet(viewsets.ModelViewSet):
+    serializer_class = ReservationSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = ReservationPagination
+    filter_backends = [ReservationFilterBackend]
+
+    def get_queryset(self):
+        return get_reservation_queryset().filter(user=self.request.user)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def all_reservations(self, request):
@@ -201,20 +666,197 @@ class ReservationViewSet(viewsets.ModelViewSet):
         Retorna TODAS as reservas de todos os usuários (não apenas do usuário logado).
         Útil para o calendário mostrar a disponibilidade baseado em todas as reservas.
         """
-        reservations = Reservation.objects.select_related(
-            'space',
-            'space__building',
-            'space__floor_name',
-            'user'
-        ).all().order_by('-date', '-start_time')
-        
-        # Aplicar filtros opcionais
-        space_id = request.query_params.get('space')
-        if space_id:
-            reservations = reservations.filter(space_id=space_id)
+        reservations = get_reservation_queryset()
         
-        serializer = self.get_serializer(reservations, many=True)
-        return Response(serializer.data)
+        # Aplicar filtros opcionais (space, building, status, date_from/date_to)
+        reservations = self.filter_queryset(reservations)
+        return self.get_paginated_response(self.serialize_page(reservations))
+
+    def serialize_page(self, queryset):
+        """
+        Página da listagem pelo caminho rápido (ReservationRowSerializer),
+        só com os campos de ?fields=/?omit=
+        """
+        serializer = ReservationRowSerializer(get_fieldset(self.request.query_params, ReservationRowSerializer.FIELDS))
+        cursor_fields = [name for name, _ in self.paginator.get_fields()]
+        page = self.paginate_queryset(serializer.project(queryset, extra=cursor_fields))
+        return serializer.serialize(page)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Exporta reservas em CSV ou XLSX (?type=csv|xlsx), com os mesmos filtros
+        da listagem. Com ?expand=1, reservas recorrentes saem com uma linha por
+        ocorrência. A equipe administrativa exporta as reservas de todos.
+        """
+        export_format = request.query_params.get('type', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {"error": f"Formato inválido. Use um de: {', '.join(EXPORT_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if request.user.is_staff:
+            reservations = Reservation.objects.all()
+        else:
+            reservations = Reservation.objects.filter(user=request.user)
+        reservations = self.filter_queryset(reservations).order_by('-date', '-start_time', '-id')
+
+        # Com ?expand=1, a janela ?date_from=/?date_to= também limita as ocorrências
+        expand = request.query_params.get('expand') in ('1', 'true')
+        backend = ReservationFilterBackend()
+        return export_reservations(
+            reservations, export_format, expand=expand,
+            date_from=backend.parse_date('date_from', request.query_params.get('date_from')),
+            date_to=backend.parse_date('date_to', request.query_params.get('date_to')),
+        )
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Cria várias reservas em uma requisição. Aceita uma lista ou
+        {"reservations": [...]} com até BATCH_MAX_SIZE itens. Os conflitos são
+        verificados contra o banco e entre os próprios itens em uma passada, as
+        reservas válidas são gravadas com bulk_create em uma única transação e
+        a resposta traz o resultado de cada item.
+        """
+        items = request.data.get('reservations') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response(
+                {"error": "Envie uma lista de reservas"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > BATCH_MAX_SIZE:
+            return Response(
+                {"error": f"Máximo de {BATCH_MAX_SIZE} reservas por lote"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        results = [None] * len(items)
+        with transaction.atomic():
+            space_ids = set()
+            for item in items:
+                if isinstance(item, dict):
+                    space_ids.add(item.get('space'))
+            for space_id in sorted(space_ids, key=str):
+                self.lock_space(space_id)
+
+            context = {**self.get_serializer_context(), 'check_conflicts': False}
+            candidates = []
+            for index, item in enumerate(items):
+                if not isinstance(item, dict):
+                    results[index] = {'index': index, 'status': 'error', 'errors': {'non_field_errors': ['Item inválido']}}
+                    continue
+                serializer = ReservationSerializer(data={**item, 'status': 'pending'}, context=context)
+                if not serializer.is_valid():
+                    results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+                    continue
+                reservation = Reservation(**serializer.validated_data)
+                reservation.user = request.user
+                reservation.status = 'pending'
+                if reservation.is_recurring and reservation.recurring_weekdays:
+                    reservation.normalize_recurring_times()
+                candidates.append((index, reservation, get_occurrence_slots(reservation)))
+
+            created = []
+            slots = [slot for _, _, reservation_slots in candidates for slot in reservation_slots]
+            if slots:
+                indexes = build_indexes(
+                    {reservation.space_id for _, reservation, _ in candidates},
+                    min(day for day, _, _ in slots),
+                    max(day for day, _, _ in slots)
+                )
+                for index, reservation, _ in candidates:
+                    conflicts = find_conflicts(reservation, indexes)
+                    if conflicts:
+                        results[index] = {
+                            'index': index,
+                            'status': 'error',
+                            'errors': {'non_field_errors': [format_conflicts(conflicts)]}
+                        }
+                        continue
+                    add_to_indexes(reservation, indexes)
+                    created.append((index, reservation))
+            else:
+                created = [(index, reservation) for index, reservation, _ in candidates]
+
+            if created:
+                reservations = Reservation.objects.bulk_create([reservation for _, reservation in created])
+                ReservationSlot.objects.bulk_create([
+                    slot for reservation in reservations for slot in reservation.build_slots()
+                ])
+                ReservationOccurrence.objects.bulk_create([
+                    occurrence
+                    for reservation in reservations
+                    for occurrence in reservation.build_occurrences()
+                ])
+                # bulk_create não dispara post_save
+                for space_id, user_id in {(r.space_id, r.user_id) for r in reservations}:
+                    bump_reservation_versions(space_id, user_id)
+                for reservation in reservations:
+                    publish_reservation_event(reservation, 'created')
+                notify_new_reservations(reservations)
+
+        if created:
+            saved = self.get_queryset().prefetch_related('slots').in_bulk([reservation.pk for _, reservation in created])
+            for index, reservation in created:
+                results[index] = {
+                    'index': index,
+                    'status': 'created',
+                    'reservation': self.get_serializer(saved[reservation.pk]).data
+                }
+
+        return Response(
+            {
+                'created': len(created),
+                'errors': len(items) - len(created),
+                'results': results,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        )
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def confirm(self, request):
+        """Confirma reservas pendentes em lote ({"ids": [...]}), sem conflito de horário"""
+        return self.transition(request, 'confirmado')
+
+    @action(detail=False, methods=['post'])
+    def cancel(self, request):
+        """Cancela reservas em lote; fora da equipe, só as do próprio usuário"""
+        return self.transition(request, 'canceled')
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def complete(self, request):
+        """Marca reservas confirmadas como concluídas em lote"""
+        return self.transition(request, 'completed')
+
+    def transition(self, request, target):
+        """
+        Mudança de status em lote (ver transitions.bulk_transition). A resposta
+        traz os ids atualizados e os ignorados, com o motivo de cada um.
+        """
+        ids = request.data.get('ids') if isinstance(request.data, dict) else None
+        if (
+            not isinstance(ids, list) or not ids
+            or not all(isinstance(pk, int) and not isinstance(pk, bool) for pk in ids)
+        ):
+            return Response(
+                {"error": "Envie {\"ids\": [...]} com os ids das reservas"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(ids) > TRANSITION_MAX_SIZE:
+            return Response(
+                {"error": f"Máximo de {TRANSITION_MAX_SIZE} reservas por lote"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = Reservation.objects.all() if request.user.is_staff else Reservation.objects.filter(user=request.user)
+        updated, skipped = bulk_transition(queryset, ids, target)
+        return Response({
+            'status': target,
+            'updated': updated,
+            'skipped': [{'id': pk, 'reason': reason} for pk, reason in skipped.items()],
+        })
 
     def create(self, request, *args, **kwargs):
         print("Received reservation data:", request.data)  # Debug log
@@ -225,18 +867,42 @@ class ReservationViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(data=data)
         
-        if not serializer.is_valid():
-            print("Validation errors:", serializer.errors)  # Debug log
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-            
-        self.perform_create(serializer)
+        # A verificação de conflito e a gravação acontecem na mesma transação,
+        # com a sala bloqueada, para que reservas simultâneas não se sobreponham
+        with transaction.atomic():
+            self.lock_space(data.get('space'))
+
+            if not serializer.is_valid():
+                print("Validation errors:", serializer.errors)  # Debug log
+                return Response(self.get_conflict_errors(serializer), status=status.HTTP_400_BAD_REQUEST)
+                
+            self.perform_create(serializer)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def get_conflict_errors(self, serializer):
+        """Erros da validação; em conflito de reserva única, com salas alternativas"""
+        reservation = getattr(serializer, 'conflicting_reservation', None)
+        if reservation is None or reservation.is_recurring:
+            return serializer.errors
+        alternatives = suggest_alternatives(
+            reservation.space_id, reservation.date, reservation.start_time, reservation.end_time,
+            k=ALTERNATIVES_DEFAULT
+        )
+        return {**serializer.errors, 'alternatives': alternatives or []}
+
+    def lock_space(self, space_id):
+        """Bloqueia a sala até o fim da transação (SELECT ... FOR UPDATE)"""
+        try:
+            Space.objects.select_for_update().filter(pk=int(space_id)).first()
+        except (TypeError, ValueError):
+            pass
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user, status='pending')
 
     def list(self, request, *args, **kwargs):
-        return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.get_paginated_response(self.serialize_page(queryset))
 
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
@@ -245,7 +911,20 @@ class ReservationViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
     def update(self, request, *args, **kwargs):
-        return super().update(request, *args, **kwargs)
+        # Mesmo fluxo do UpdateModelMixin, mas com uma única leitura da reserva.
+        # Só status para um estado inativo (cancelar ou concluir pelo app): não
+        # há conflito a checar, então a sala não precisa ser bloqueada. Voltar
+        # para pendente/confirmado passa pela checagem e bloqueia a sala
+        partial = kwargs.pop('partial', False)
+        status_only = partial and not set(request.data) - {'status'}
+        with transaction.atomic():
+            instance = self.get_object()
+            if not status_only or request.data.get('status') in ACTIVE_STATUSES:
+                self.lock_space(request.data.get('space', instance.space_id))
+            serializer = self.get_serializer(instance, data=request.data, partial=partial)
+            serializer.is_valid(raise_exception=True)
+            self.perform_update(serializer)
+        return Response(serializer.data)
 
     def partial_update(self, request, *args, **kwargs):
         """
@@ -253,3 +932,25 @@ class ReservationViewSet(viewsets.ModelViewSet):
         Útil para cancelar reservas alterando apenas o status.
         """
         return super().partial_update(request, *args, **kwargs)
+
+class ReservationList(AsyncAPIView):
+    """
+    GET /api/reservations/async/: a listagem do ReservationViewSet como view
+    assíncrona, com os mesmos filtros, campos e paginação por cursor. Fica em
+    rota própria para não encobrir a do router (criação, detalhe e ações
+    continuam no ViewSet).
+    """
+    async def get(self, request):
+        queryset = get_reservation_queryset().filter(user=request.user)
+        for backend in ReservationViewSet.filter_backends:
+            queryset = backend().filter_queryset(self.drf_request, queryset, self)
+
+        serializer = ReservationRowSerializer(
+            get_fieldset(self.drf_request.query_params, ReservationRowSerializer.FIELDS)
+        )
+        paginator = ReservationViewSet.pagination_class()
+        cursor_fields = [name for name, _ in paginator.get_fields()]
+        page = await paginator.apaginate_queryset(
+            serializer.project(queryset, extra=cursor_fields), self.drf_request, view=self
+        )
+        return json_response(paginator.get_paginated_data(await serializer.aserialize(page)))
@@ -52,7 +52,9 @@ import {
     getBuildings,
     getFloors,
     getSpaces,
-    checkAvailability
+    checkAvailability,
+    getSpaceCalendar,
+    subscribeToSpaceEvents
 } from '../../services/api';
 import type { 
     Building,
@@ -95,6 +97,7 @@ interface DayStatus {
     start_time?: string;
     end_time?: string;
   } | null;
+  reservations?: any[];
 }
 
 type AgendamentoStep = 'campus' | 'andar' | 'sala' | 'confirmacao' | 'resumo' | 'sucesso';
@@ -210,162 +213,49 @@ export const Agendamento: React.FC = () => {
   const [verificadorPeriodo, setVerificadorPeriodo] = useState<'matutino' | 'vesperino' | 'noturno' | ''>('');
   const [verificadorSelectedDate, setVerificadorSelectedDate] = useState<Date | null>(null);
 
-  // Função helper para obter horários do período
-  const getPeriodoTimeRange = (periodo: string): { start: string; end: string } | null => {
-    const timeRanges: Record<string, { start: string; end: string }> = {
-      'matutino': { start: '07:00', end: '12:00' },
-      'vesperino': { start: '13:00', end: '18:00' },
-      'noturno': { start: '18:30', end: '22:00' }
-    };
-    return timeRanges[periodo] || null;
-  };
-
-  // Função para verificar se há conflito de horário
-  const hasTimeConflict = (resStart: string, resEnd: string, periodoStart: string, periodoEnd: string): boolean => {
-    // Converte strings HH:MM para minutos para facilitar comparação
-    const toMinutes = (time: string) => {
-      const [h, m] = time.split(':').map(Number);
-      return h * 60 + m;
-    };
-
-    const resStartMin = toMinutes(resStart);
-    const resEndMin = toMinutes(resEnd);
-    const periodoStartMin = toMinutes(periodoStart);
-    const periodoEndMin = toMinutes(periodoEnd);
-
-    // Há conflito se os horários se sobrepõem
-    return !(resEndMin <= periodoStartMin || resStartMin >= periodoEndMin);
-  };
-
-  // Função para verificar disponibilidade de dia inteiro (sem horário específico)
-  const checkFullDayAvailability = async (date: Date, spaceId: number) => {
-    try {
-      if (isNaN(spaceId)) {
-        return { status: 'disponivel', reservations: [] };
-      }
-
-      const dateStr = format(date, 'yyyy-MM-dd');
-      const periodoTimeRange = getPeriodoTimeRange(verificadorPeriodo);
-
-      // Buscar TODAS as reservas de TODOS os usuários para a sala via API
-      const response = await api.get('/api/reservations/all_reservations/', {
-        params: { space: spaceId }
-      });
-      
-      const reservations = Array.isArray(response.data) ? response.data : response.data.results || [];
-
-      // Filtrar reservas que afetam este dia específico
-      const dayReservations = reservations.filter((res: any) => {
-        if (res.status !== 'confirmado') return false; // Só contar confirmadas
-
-        // Se tem período selecionado, filtrar por horário
-        if (periodoTimeRange && res.start_time && res.end_time) {
-          const resStart = res.start_time.substring(0, 5);
-          const resEnd = res.end_time.substring(0, 5);
-          
-          if (!hasTimeConflict(resStart, resEnd, periodoTimeRange.start, periodoTimeRange.end)) {
-            return false;
-          }
-        }
-
-        // Verificar conflitos normais (reservas únicas)
-        if (!res.is_recurring) {
-          if (!res.date) return false;
-          const resDate = format(new Date(res.date), 'yyyy-MM-dd');
-          return resDate === dateStr;
-        }
-
-        // Verificar conflitos com recorrências
-        if (res.is_recurring && res.recurring_days) {
-          const startDateRecurring = new Date(res.recurring_start_date);
-          const endDateRecurring = new Date(res.recurring_end_date);
-          
-          if (date < startDateRecurring || date > endDateRecurring) return false;
-          
-          const dayOfWeek = date.getDay();
-          const dayMap = { 0: 'dom', 1: 'seg', 2: 'ter', 3: 'qua', 4: 'qui', 5: 'sex', 6: 'sab' };
-          const dayCode = dayMap[dayOfWeek as keyof typeof dayMap];
-          
-          return res.recurring_days.includes(dayCode);
-
-        }
-
-        return false;
-      });
-
-      // Se não houver reservas, dia está disponível
-      if (dayReservations.length === 0) {
-        return { status: 'disponivel', reservations: [] };
-      }
-
-      // Se houver reservas confirmadas neste dia (seja única ou recorrente), mostrar como ocupado
-      const hasOccupado = dayReservations.some((res: any) => !res.is_recurring);
-      const hasOcupadoRecorrente = dayReservations.some((res: any) => res.is_recurring);
-
-      const status = hasOccupado ? 'ocupado' : hasOcupadoRecorrente ? 'ocupado-recorrente' : 'disponivel';
-
-      // Formatar as informações das reservas para o tooltip
-      const formattedReservations = dayReservations.map((res: any) => ({
-        user_name: res.user_email?.split('@')[0] || 'Usuário',
-        user_email: res.user_email,
-        phone: res.phone || 'Não informado',
-        course: res.course || 'Não informado',
-        start_time: res.start_time?.substring(0, 5) || '',
-        end_time: res.end_time?.substring(0, 5) || '',
-        is_recurring: res.is_recurring
-      }));
-
-      return { status, reservations: formattedReservations };
-    } catch (err) {
-      console.error('Error checking full day availability:', err);
-      return { status: 'disponivel', reservations: [] };
-    }
-  };
-
   // Função para carregar disponibilidade do mês para o verificador
+  // O servidor expande reservas únicas e recorrentes e retorna um status por dia
   const loadVerificadorMonthAvailability = async () => {
     if (!verificadorSala || verificadorLoadingAvailability) return;
 
+    const spaceId = parseInt(verificadorSala);
+    if (isNaN(spaceId)) return;
+
     setVerificadorLoadingAvailability(true);
-    
-    const year = verificadorCurrentDate.getFullYear();
-    const month = verificadorCurrentDate.getMonth();
-    const daysInMonth = new Date(year, month + 1, 0).getDate();
+
     const today = new Date();
     today.setHours(0, 0, 0, 0);
 
-    const newDayStatuses: DayStatus[] = [];
-    const spaceId = parseInt(verificadorSala);
-    
-    for (let day = 1; day <= daysInMonth; day++) {
-      const date = new Date(year, month, day);
-      date.setHours(0, 0, 0, 0);
-      
-      // Pular dias passados
-      if (date < today) {
-        newDayStatuses.push({
-          date: format(date, 'yyyy-MM-dd'),
-          status: 'ocupado',
-          reservation: null
-        });
-        continue;
-      }
+    try {
+      const calendar = await getSpaceCalendar(
+        spaceId,
+        format(verificadorCurrentDate, 'yyyy-MM'),
+        verificadorPeriodo || undefined
+      );
+
+      const newDayStatuses: DayStatus[] = calendar.days.map((day: any): DayStatus => {
+        const [year, month, dayOfMonth] = day.date.split('-').map(Number);
+        const date = new Date(year, month - 1, dayOfMonth);
+
+        // Pular dias passados
+        if (date < today) {
+          return { date: day.date, status: 'ocupado', reservation: null, reservations: [] };
+        }
 
-      try {
-        const result = await checkFullDayAvailability(date, spaceId);
-        
-        newDayStatuses.push({
-          date: format(date, 'yyyy-MM-dd'),
-          status: result.status as 'disponivel' | 'ocupado' | 'ocupado-recorrente' | 'selecionado',
-          reservation: result.reservations.length > 0 ? result.reservations[0] : null
-        });
-      } catch (error) {
-        console.error(`Error checking day ${date.toLocaleDateString()}:`, error);
-      }
-    }
+        return {
+          date: day.date,
+          status: day.status as 'disponivel' | 'ocupado' | 'ocupado-recorrente' | 'selecionado',
+          reservation: day.reservations.length > 0 ? day.reservations[0] : null,
+          reservations: day.reservations
+        };
+      });
 
-    setVerificadorDayStatuses(newDayStatuses);
-    setVerificadorLoadingAvailability(false);
+      setVerificadorDayStatuses(newDayStatuses);
+    } catch (error) {
+      console.error('Error loading month availability:', error);
+    } finally {
+      setVerificadorLoadingAvailability(false);
+    }
   };
 
   // Função para obter a classe CSS do dia no verificador
@@ -523,12 +413,21 @@ const checkDayAvailability = async (date: Date) => {
 
       // Buscar TODAS as reservas de TODOS os usuários (não apenas do usuário logado)
       const allReservations = await api.get('/api/reservations/all_reservations/', {
-          params: { space: spaceId }
+          params: {
+              space: spaceId,
+              status: 'confirmado',
+              date_from: dateStr,
+              date_to: dateStr,
+              page_size: 200,
+              // Só o que a verificação usa: o backend seleciona apenas essas colunas
+              fields: 'date,start_time,end_time,status,is_recurring,recurring_days,'
+                + 'recurring_start_date,recurring_end_date,user_email,phone,course'
+          }
       });
       
       console.log('All reservations for space:', allReservations.data);
       
-      const reservations = allReservations.data;
+      const reservations = allReservations.data.results;
 
         // Verificar conflitos normais (reservas únicas)
       const conflictingRes = reservations?.find((res: any) => {
@@ -735,7 +634,7 @@ const getDayClassName = (date: Date) => {
           try {
             // Buscar salas filtradas pelo andar (floor_id)
             const spacesData = await api.get('/api/spaces/', {
-              params: { floor: floor.id }
+              params: { floor: floor.id, fields: 'id,name' }
             });
             setVerificadorSalas(spacesData.data || []);
             setVerificadorSala(''); // Reset sala quando andar muda
@@ -766,6 +665,16 @@ const getDayClassName = (date: Date) => {
     }
   }, [verificadorPeriodo]);
 
+  // Recarregar quando outra pessoa criar, confirmar ou cancelar uma reserva da sala
+  useEffect(() => {
+    const spaceId = parseInt(verificadorSala);
+    if (isNaN(spaceId)) return;
+
+    return subscribeToSpaceEvents(spaceId, () => {
+      loadVerificadorMonthAvailability();
+    });
+  }, [verificadorSala, verificadorCurrentDate, verificadorPeriodo]);
+
   // Replace API calls with dummy data
   useEffect(() => {
     const storedProfile = localStorage.getItem('userProfile');
@@ -1633,11 +1542,7 @@ const getDayClassName = (date: Date) => {
                               const dayStatus = verificadorDayStatuses.find(d => d.date === format(date, 'yyyy-MM-dd'));
                               if (dayStatus && (dayStatus.status === 'ocupado' || dayStatus.status === 'ocupado-recorrente')) {
                                 setVerificadorHoveredDay(format(date, 'yyyy-MM-dd'));
-                                // Buscar todas as reservas para este dia
-                                const spaceId = parseInt(verificadorSala);
-                                checkFullDayAvailability(date, spaceId).then(result => {
-                                  setVerificadorHoveredReservations(result.reservations);
-                                });
+                                setVerificadorHoveredReservations(dayStatus.reservations || []);
                               }
                             }}
                             onMouseLeave={() => {
@@ -51,6 +51,11 @@ export const getUserProfile = async () => {
     return response.data;
 };
 
+export const getCatalog = async () => {
+    const response = await api.get('/api/catalog/');
+    return response.data;
+};
+
 export const getBuildings = async () => {
     const response = await api.get('/api/buildings/');
     return response.data;
@@ -161,11 +166,26 @@ export const createReservation = async (data: ReservationData) => {
   }
 };
 
+// Cria várias reservas de uma vez; a resposta traz o resultado de cada item
+export const createReservationsBatch = async (items: any[]) => {
+    const response = await api.post('/api/reservations/batch/', { reservations: items }, {
+        validateStatus: (status) => status === 201 || status === 400
+    });
+    return response.data;
+};
+
 export const getUserReservations = async () => {
     try {
-        const response = await api.get('/api/reservations/');
-        console.log('Received reservations:', response.data);
-        return response.data;
+        // A listagem é paginada por cursor: seguir os links "next" até o fim
+        const reservations: any[] = [];
+        let response = await api.get('/api/reservations/', { params: { page_size: 200 } });
+        reservations.push(...response.data.results);
+        while (response.data.next) {
+            response = await api.get(response.data.next);
+            reservations.push(...response.data.results);
+        }
+        console.log('Received reservations:', reservations);
+        return reservations;
     } catch (error) {
         console.error('Error fetching reservations:', error);
         throw error;
@@ -179,6 +199,47 @@ export const checkAvailability = async (spaceId: number, date: string) => {
     return response.data;
 };
 
+export const getSpaceCalendar = async (spaceId: number, month: string, period?: string) => {
+    const response = await api.get(`/api/spaces/${spaceId}/calendar/`, {
+        params: { month, ...(period ? { period } : {}) }
+    });
+    return response.data;
+};
+
+// Eventos ao vivo das reservas de uma sala (Server-Sent Events).
+// O EventSource não envia cabeçalhos, então o token vai na query string.
+export const subscribeToSpaceEvents = (spaceId: number, onEvent: (event: any) => void) => {
+    const token = localStorage.getItem('token') || '';
+    const source = new EventSource(
+        `${api.defaults.baseURL}/api/spaces/${spaceId}/events/?token=${encodeURIComponent(token)}`
+    );
+    source.addEventListener('reservation', (message) => {
+        onEvent(JSON.parse((message as MessageEvent).data));
+    });
+    return () => source.close();
+};
+
+// Notificações
+export const getNotifications = async (cursorUrl?: string) => {
+    const response = await api.get(cursorUrl || '/api/notifications/');
+    return response.data;
+};
+
+export const getUnreadNotificationCount = async () => {
+    const response = await api.get('/api/notifications/unread_count/');
+    return response.data.unread;
+};
+
+export const markNotificationRead = async (notificationId: number) => {
+    const response = await api.post(`/api/notifications/${notificationId}/read/`);
+    return response.data;
+};
+
+export const markAllNotificationsRead = async () => {
+    const response = await api.post('/api/notifications/read_all/');
+    return response.data;
+};
+
 export const cancelReservation = async (reservationId: number) => {
     try {
         console.log(`Sending PATCH request to /api/reservations/${reservationId}/`);